@@ -3,6 +3,27 @@
 -- Order matters to avoid foreign key constraint errors.
 
 BEGIN
+    -- Drop scheduler jobs first (they reference the package)
+   FOR j IN (
+      SELECT job_name
+        FROM USER_SCHEDULER_JOBS
+       WHERE job_name LIKE 'SHAREIT_%'
+   ) LOOP
+      dbms_scheduler.drop_job(
+         j.job_name,
+         force => TRUE
+      );
+   END LOOP;
+
+    -- Materialized views (05_reporting.sql) before their base tables
+   FOR m IN (
+      SELECT mview_name
+        FROM USER_MVIEWS
+       WHERE mview_name = 'SUBFORUM_STATS'
+   ) LOOP
+      EXECUTE IMMEDIATE 'DROP MATERIALIZED VIEW ' || m.mview_name;
+   END LOOP;
+
    FOR c IN (
       SELECT table_name
         FROM USER_TABLES
@@ -21,6 +42,8 @@ BEGIN
                              'SUBFORUMS',
                              'USERS',
                              'TRANSACTION_LOGS',
+                             'TRANSACTION_LOG_QUEUE',
+                             'USER_FEED',
                              'SUBREDDIT_RULES',
                              'SUBREDDITS' -- in case old ones exist
                               )
@@ -45,5 +68,31 @@ BEGIN
       WHEN OTHERS THEN
          NULL;
    END;
+
+    -- Object types of the pipelined reports (05_reporting.sql) and of the
+    -- batch procedures (01_ddl.sql)
+   FOR t IN (
+      SELECT type_name
+        FROM USER_TYPES
+       WHERE type_name IN ( 'T_POST_REPORT_TAB',
+                            'T_POST_REPORT_ROW',
+                            'T_USER_REPORT_TAB',
+                            'T_USER_REPORT_ROW',
+                            'T_ID_LIST',
+                            'T_VOTE_TAB',
+                            'T_VOTE_ROW' )
+   ) LOOP
+      EXECUTE IMMEDIATE 'DROP TYPE '
+                        || t.type_name
+                        || ' FORCE';
+   END LOOP;
+
+    -- Oracle Text preferences outlive the indexes that use them
+   BEGIN
+      ctx_ddl.drop_preference('shareit_post_ds');
+   EXCEPTION
+      WHEN OTHERS THEN
+         NULL;
+   END;
 END;
 /
@@ -3,13 +3,17 @@
 
 -- 1. USERS Table
 -- Stores user account information.
--- Karma is a derived value updated via triggers for performance.
+-- Karma is a derived value updated via triggers for performance; the
+-- leaderboard reads it through idx_users_karma.
+-- Unread_messages counts the user's unread MESSAGES rows; it is kept by
+-- trg_messages_unread so inbox polling is a primary-key read.
 CREATE TABLE users (
-   user_id       NUMBER,
-   username      VARCHAR2(50) NOT NULL,
-   email         VARCHAR2(100) NOT NULL,
-   password_hash VARCHAR2(255) NOT NULL,
-   karma         NUMBER DEFAULT 0,
+   user_id         NUMBER,
+   username        VARCHAR2(50) NOT NULL,
+   email           VARCHAR2(100) NOT NULL,
+   password_hash   VARCHAR2(255) NOT NULL,
+   karma           NUMBER DEFAULT 0 NOT NULL,
+   unread_messages NUMBER DEFAULT 0 NOT NULL,
    created_at    DATE DEFAULT SYSDATE,
    CONSTRAINT pk_users PRIMARY KEY ( user_id ),
    CONSTRAINT uq_users_username UNIQUE ( username ),
@@ -20,12 +24,23 @@ CREATE SEQUENCE seq_users_id START WITH 1 INCREMENT BY 1;
 
 -- 2. SUBFORUMS Table (Previously Subreddits)
 -- Communities within the platform.
+-- Subscriber_count is kept by trg_subscriptions_feed. Feed_on_read is set once
+-- the count passes shareit_pkg.c_feed_fanout_limit: from then on new posts are
+-- not copied into USER_FEED and home feeds read them from POSTS instead.
+-- Version is bumped by trg_posts_version whenever a post in the subforum is
+-- added, changed or removed; the backend builds feed ETags from it. The same
+-- trigger keeps last_post_at. Post counts and vote totals per subforum are in
+-- the SUBFORUM_STATS materialized view (05_reporting.sql).
 CREATE TABLE subforums (
-   subforum_id NUMBER,
-   name        VARCHAR2(50) NOT NULL,
-   description VARCHAR2(500),
-   created_at  DATE DEFAULT SYSDATE,
-   creator_id  NUMBER,
+   subforum_id      NUMBER,
+   name             VARCHAR2(50) NOT NULL,
+   description      VARCHAR2(500),
+   created_at       DATE DEFAULT SYSDATE,
+   creator_id       NUMBER,
+   subscriber_count NUMBER DEFAULT 0 NOT NULL,
+   feed_on_read     NUMBER(1) DEFAULT 0 NOT NULL,
+   version          NUMBER DEFAULT 0 NOT NULL,
+   last_post_at     DATE,
    CONSTRAINT pk_subforums PRIMARY KEY ( subforum_id ),
    CONSTRAINT uq_subforums_name UNIQUE ( name ),
    CONSTRAINT fk_subforums_creator FOREIGN KEY ( creator_id )
@@ -65,9 +80,23 @@ CREATE TABLE user_subscriptions (
          ON DELETE CASCADE
 );
 
+-- Fan-out: subscribers of a subforum (trg_posts_feed) and subscribed
+-- read-mode subforums of a user (GET /api/feed).
+CREATE INDEX idx_subs_subforum ON
+   user_subscriptions (
+      subforum_id,
+      user_id
+   );
+
 -- 5. POSTS Table
 -- User submitted content within a subforum.
 -- Upvotes is a derived value updated via triggers.
+-- Hot_score is the time-decayed ranking score (shareit_pkg.hot_score), kept in
+-- step with upvotes by trg_posts_hot_score. BINARY_DOUBLE so it round-trips
+-- exactly through the backend's keyset cursors.
+-- Version is bumped on every change a reader can see (votes, edits, comments)
+-- by trg_posts_version and trg_comments_version; the backend builds post
+-- ETags from it.
 CREATE TABLE posts (
    post_id      NUMBER,
    user_id      NUMBER NOT NULL,
@@ -75,7 +104,9 @@ CREATE TABLE posts (
    title        VARCHAR2(300) NOT NULL,
    content_text CLOB,
    upvotes      NUMBER DEFAULT 0,
+   hot_score    BINARY_DOUBLE DEFAULT 0,
    created_at   DATE DEFAULT SYSDATE,
+   version      NUMBER DEFAULT 0 NOT NULL,
    CONSTRAINT pk_posts PRIMARY KEY ( post_id ),
    CONSTRAINT fk_posts_user FOREIGN KEY ( user_id )
       REFERENCES users ( user_id )
@@ -190,13 +221,19 @@ CREATE TABLE reports (
    reporter_id NUMBER NOT NULL,
    post_id     NUMBER, -- Nullable, could report a comment
    comment_id  NUMBER, -- Nullable, could report a post
+   subforum_id NUMBER NOT NULL, -- Of the reported item, set by trg_reports_subforum
    reason      VARCHAR2(500) NOT NULL,
    status      VARCHAR2(20) DEFAULT 'OPEN',
    reported_at DATE DEFAULT SYSDATE,
+   resolved_by NUMBER, -- Moderator's user_id; no foreign key, the record outlives the account
+   resolved_at DATE,
    CONSTRAINT pk_reports PRIMARY KEY ( report_id ),
    CONSTRAINT fk_reports_reporter FOREIGN KEY ( reporter_id )
       REFERENCES users ( user_id )
          ON DELETE CASCADE,
+   CONSTRAINT fk_reports_subforum FOREIGN KEY ( subforum_id )
+      REFERENCES subforums ( subforum_id )
+         ON DELETE CASCADE,
    CONSTRAINT fk_reports_post FOREIGN KEY ( post_id )
       REFERENCES posts ( post_id )
          ON DELETE CASCADE,
@@ -271,6 +308,8 @@ CREATE SEQUENCE seq_user_awards_id START WITH 1 INCREMENT BY 1;
 
 -- 15. TRANSACTION_LOGS Table
 -- Audit log for Requirements #7.
+-- Interval-partitioned by month so shareit_pkg.purge_audit_logs can drop
+-- whole partitions past the retention period instead of deleting rows.
 CREATE TABLE transaction_logs (
    log_id           NUMBER,
    table_name       VARCHAR2(50),
@@ -278,9 +317,45 @@ CREATE TABLE transaction_logs (
    transaction_time DATE DEFAULT SYSDATE,
    details          VARCHAR2(4000),
    CONSTRAINT pk_transaction_logs PRIMARY KEY ( log_id )
+)
+   PARTITION BY RANGE ( transaction_time ) INTERVAL ( numtoyminterval(1, 'MONTH') )
+   ( PARTITION p_logs_initial VALUES LESS THAN ( DATE '2024-01-01' ) );
+
+-- Only used when draining the queue, in batches, so a large cache is cheap.
+CREATE SEQUENCE seq_logs_id START WITH 1 INCREMENT BY 1 CACHE 1000;
+
+-- 16. TRANSACTION_LOG_QUEUE Table
+-- Staging area the audit triggers write to. No key, index or sequence, so
+-- the insert inside a user transaction is a plain heap append. Drained into
+-- TRANSACTION_LOGS by shareit_pkg.drain_audit_queue (scheduler job).
+CREATE TABLE transaction_log_queue (
+   table_name       VARCHAR2(50),
+   transaction_type VARCHAR2(10),
+   transaction_time DATE DEFAULT SYSDATE,
+   details          VARCHAR2(4000)
 );
 
-CREATE SEQUENCE seq_logs_id START WITH 1 INCREMENT BY 1;
+-- 17. USER_FEED Table
+-- Materialized home feed (GET /api/feed): one row per (subscriber, post),
+-- written on post insert for subforums not in feed_on_read mode.
+-- Index-organized on the read order so a page is a single range scan.
+-- Trimmed to shareit_pkg.c_feed_retention_days by the shareit_feed_trim job.
+CREATE TABLE user_feed (
+   user_id     NUMBER NOT NULL,
+   created_at  DATE NOT NULL,
+   post_id     NUMBER NOT NULL,
+   subforum_id NUMBER NOT NULL,
+   CONSTRAINT pk_user_feed PRIMARY KEY ( user_id,
+                                         created_at,
+                                         post_id ),
+   CONSTRAINT fk_feed_user FOREIGN KEY ( user_id )
+      REFERENCES users ( user_id )
+         ON DELETE CASCADE,
+   CONSTRAINT fk_feed_post FOREIGN KEY ( post_id )
+      REFERENCES posts ( post_id )
+         ON DELETE CASCADE
+)
+ORGANIZATION INDEX COMPRESS 1;
 
 -- INDEXES (Requirement #3)
 -- Redundant: Unique constraint pk/uq already creates index
@@ -288,19 +363,159 @@ CREATE SEQUENCE seq_logs_id START WITH 1 INCREMENT BY 1;
 --    users (
 --       username
 --    );
-CREATE INDEX idx_posts_subforum ON
+-- Feed indexes for keyset pagination (GET /api/posts).
+-- Column order matches "ORDER BY created_at DESC, post_id DESC" so each page
+-- is an index range scan that stops after LIMIT rows, however deep the cursor.
+-- idx_posts_subforum_created also covers the subforum_id foreign key.
+CREATE INDEX idx_posts_created ON
+   posts (
+      created_at DESC,
+      post_id DESC
+   );
+CREATE INDEX idx_posts_subforum_created ON
+   posts (
+      subforum_id,
+      created_at DESC,
+      post_id DESC
+   );
+-- Ranked feeds (?sort=hot / ?sort=top) read these in order instead of
+-- sorting every post on each request.
+CREATE INDEX idx_posts_hot ON
+   posts (
+      hot_score DESC,
+      post_id DESC
+   );
+CREATE INDEX idx_posts_subforum_hot ON
    posts (
-      subforum_id
+      subforum_id,
+      hot_score DESC,
+      post_id DESC
+   );
+CREATE INDEX idx_posts_top ON
+   posts (
+      upvotes DESC,
+      post_id DESC
+   );
+CREATE INDEX idx_posts_subforum_top ON
+   posts (
+      subforum_id,
+      upvotes DESC,
+      post_id DESC
    );
 CREATE INDEX idx_posts_user ON
    posts (
       user_id
    );
-CREATE INDEX idx_comments_post ON
+-- Comment threads: children of a given parent within a post, in display
+-- order. Drives the CONNECT BY in GET /api/posts/<id>/comments and also
+-- covers the post_id foreign key.
+CREATE INDEX idx_comments_post_parent ON
    comments (
+      post_id,
+      parent_comment_id,
+      created_at,
+      comment_id
+   );
+-- Full-text search (GET /api/search), Oracle Text inverted indexes.
+-- Posts are indexed on title + body through a multi-column datastore;
+-- comments on their content. SYNC (ON COMMIT) folds new rows into the
+-- index when create_post / create_comment commit, so results stay current;
+-- the shareit_text_optimize job defragments what those small syncs leave.
+-- Requires the CTXAPP role.
+BEGIN
+   ctx_ddl.create_preference(
+      'shareit_post_ds',
+      'MULTI_COLUMN_DATASTORE'
+   );
+   ctx_ddl.set_attribute(
+      'shareit_post_ds',
+      'COLUMNS',
+      'title, content_text'
+   );
+END;
+/
+CREATE INDEX idx_posts_text ON
+   posts (
+      content_text
+   )
+      INDEXTYPE IS ctxsys.context PARAMETERS ( 'DATASTORE shareit_post_ds SYNC (ON COMMIT)' );
+CREATE INDEX idx_comments_text ON
+   comments (
+      content
+   )
+      INDEXTYPE IS ctxsys.context PARAMETERS ( 'SYNC (ON COMMIT)' );
+-- Cascading post deletes into USER_FEED
+CREATE INDEX idx_user_feed_post ON
+   user_feed (
       post_id
    );
-CREATE INDEX idx_messages_receiver ON
+-- Karma leaderboard (GET /api/leaderboard) and the karma reports: top-N is
+-- a range scan that stops after N entries. Index maintenance on the karma
+-- UPDATEs of the vote triggers keeps it current.
+CREATE INDEX idx_users_karma ON
+   users (
+      karma DESC,
+      user_id
+   );
+-- Range scans of shareit_pkg.remove_duplicate_reports, and cascading user deletes
+CREATE INDEX idx_reports_reporter ON
+   reports (
+      reporter_id
+   );
+-- Moderation queue (GET /api/moderation/queue): the reports of one subforum
+-- in one status, oldest first, paged by (reported_at, report_id) keyset. Each
+-- moderated subforum is one range scan that stops after a page, however many
+-- resolved reports have piled up beside the open ones; the open counts of
+-- GET /api/moderation/subforums are index-only. Also covers the subforum
+-- foreign key.
+CREATE INDEX idx_reports_queue ON
+   reports (
+      subforum_id,
+      status,
+      reported_at,
+      report_id
+   );
+-- Inbox and sent box, newest first, paged by (sent_at, message_id) keyset
+-- (GET /api/messages/inbox|sent). The other party's id trails each key so
+-- the two halves of a conversation (GET /api/messages/thread/<id>) are
+-- filtered inside the index; both also cover the foreign keys.
+CREATE INDEX idx_messages_inbox ON
    messages (
+      receiver_id,
+      sent_at DESC,
+      message_id DESC,
+      sender_id
+   );
+CREATE INDEX idx_messages_sent ON
+   messages (
+      sender_id,
+      sent_at DESC,
+      message_id DESC,
       receiver_id
-   );
\ No newline at end of file
+   );
+-- Unread messages only (NULL keys are not indexed), so "mark all read"
+-- touches the unread rows without walking the whole mailbox.
+CREATE INDEX idx_messages_unread ON
+   messages (
+      CASE
+         WHEN is_read = 0 THEN
+            receiver_id
+      END
+   );
+-- SQL-level collections for the batch procedures of shareit_pkg, which read
+-- their input with SELECT ... FROM TABLE(...) so a whole batch is one
+-- statement (and fires each compound trigger's AFTER STATEMENT once).
+CREATE OR REPLACE TYPE t_id_list FORCE AS
+   TABLE OF NUMBER;
+/
+
+CREATE OR REPLACE TYPE t_vote_row FORCE AS OBJECT (
+      user_id   NUMBER,
+      post_id   NUMBER,
+      vote_type NUMBER
+);
+/
+
+CREATE OR REPLACE TYPE t_vote_tab FORCE AS
+   TABLE OF t_vote_row;
+/
@@ -4,6 +4,20 @@
 
 CREATE OR REPLACE PACKAGE shareit_pkg AS
 
+    -- Collection type for array binds from the backend (cursor.arrayvar).
+   TYPE t_number_tab IS
+      TABLE OF NUMBER INDEX BY PLS_INTEGER;
+
+    -- Ranking
+    -- Reddit-style "hot" score: log10 of the net votes plus an age term.
+    -- Newer posts outrank older ones unless the older post has ~10x the votes
+    -- per 12.5 hours of age. Depends only on (upvotes, created_at), so the
+    -- stored value never goes stale and needs no periodic recalculation.
+   FUNCTION hot_score (
+      p_upvotes    IN NUMBER,
+      p_created_at IN DATE
+   ) RETURN BINARY_DOUBLE DETERMINISTIC;
+
     -- Requirement #4: Data Entry
 
     -- Users
@@ -80,6 +94,19 @@ CREATE OR REPLACE PACKAGE shareit_pkg AS
       p_vote_type            IN NUMBER
    );
 
+    -- BULK: Applies many votes in one call (vote_type 0 removes the vote).
+    -- Expects at most one entry per (user, post); the backend vote buffer
+    -- collapses repeats before calling. Commits once for the whole batch.
+    -- Votes whose post or user was deleted since the vote was cast are
+    -- dropped and counted in p_rejected; the rest are applied with one
+    -- DELETE and one MERGE over the whole batch.
+   PROCEDURE vote_posts_bulk (
+      p_user_ids   IN t_number_tab,
+      p_post_ids   IN t_number_tab,
+      p_vote_types IN t_number_tab,
+      p_rejected   OUT NUMBER
+   );
+
     -- Subscriptions
     -- MACHINE: Subscribes a user to a subforum using IDs.
    PROCEDURE subscribe_user (
@@ -93,6 +120,46 @@ CREATE OR REPLACE PACKAGE shareit_pkg AS
       p_subforum_name IN VARCHAR2
    );
 
+    -- Messages
+    -- Sends a direct message (unread until the receiver marks it read).
+   PROCEDURE send_message (
+      p_sender_id   IN NUMBER,
+      p_receiver_id IN NUMBER,
+      p_subject     IN VARCHAR2,
+      p_body        IN VARCHAR2
+   );
+
+    -- BULK: Marks the given messages read. Ids that are not in p_user_id's
+    -- inbox, or already read, are skipped. Commits once.
+   PROCEDURE mark_messages_read (
+      p_user_id     IN NUMBER,
+      p_message_ids IN t_number_tab
+   );
+
+    -- Marks every unread message of p_user_id read (via idx_messages_unread).
+   PROCEDURE mark_all_messages_read (
+      p_user_id IN NUMBER
+   );
+
+    -- Moderation
+    -- Reports a post (p_post_id) or a comment (p_comment_id) to the
+    -- moderators of its subforum. ORA-20005 if the item does not exist.
+   PROCEDURE report_item (
+      p_reporter_id IN NUMBER,
+      p_post_id     IN NUMBER,
+      p_comment_id  IN NUMBER,
+      p_reason      IN VARCHAR2
+   );
+
+    -- BULK: Closes the given open reports as 'RESOLVED' or 'DISMISSED'.
+    -- Reports outside the subforums p_moderator_id moderates, or no longer
+    -- open, are skipped. Commits once.
+   PROCEDURE set_reports_status (
+      p_moderator_id IN NUMBER,
+      p_report_ids   IN t_number_tab,
+      p_status       IN VARCHAR2
+   );
+
     -- Requirement #5: Data Update
     -- Updates a user's email address.
    PROCEDURE update_user_email (
@@ -100,6 +167,12 @@ CREATE OR REPLACE PACKAGE shareit_pkg AS
       p_new_email IN VARCHAR2
    );
 
+    -- Replaces a user's password hash (e.g. upgraded bcrypt cost on login).
+   PROCEDURE update_user_password (
+      p_user_id       IN NUMBER,
+      p_password_hash IN VARCHAR2
+   );
+
     -- Updates the content of a post.
    PROCEDURE update_post_content (
       p_post_id     IN NUMBER,
@@ -117,18 +190,88 @@ CREATE OR REPLACE PACKAGE shareit_pkg AS
       p_comment_id IN NUMBER
    );
 
+    -- Deletes a user (cascades to their content). Their sent messages are
+    -- deleted first, in a statement of their own, so trg_messages_unread
+    -- can still decrement the receivers' unread counters.
+   PROCEDURE delete_user (
+      p_user_id IN NUMBER
+   );
+
    -- =========================================================================
    --  MAINTENANCE (Requirement #10)
    -- =========================================================================
 
+   -- Duplicate cleanup runs online in short transactions: the table is
+   -- walked c_dedupe_range key values at a time and at most c_dedupe_batch
+   -- rows are deleted per commit. The oldest row of each group is kept.
+   c_dedupe_batch         CONSTANT PLS_INTEGER := 1000;
+   c_dedupe_range         CONSTANT PLS_INTEGER := 5000;
+
    -- Remove duplicate reports (spam) from the same user on the same item.
-   PROCEDURE remove_duplicate_reports;
+   PROCEDURE remove_duplicate_reports (
+      p_batch_size IN PLS_INTEGER DEFAULT c_dedupe_batch,
+      p_range_size IN PLS_INTEGER DEFAULT c_dedupe_range
+   );
 
    -- Remove duplicate posts (same user, same title, same content, same subforum)
-   PROCEDURE remove_duplicate_posts;
+   PROCEDURE remove_duplicate_posts (
+      p_batch_size IN PLS_INTEGER DEFAULT c_dedupe_batch,
+      p_range_size IN PLS_INTEGER DEFAULT c_dedupe_range
+   );
 
    -- Remove duplicate comments (same user, same post, same text)
-   PROCEDURE remove_duplicate_comments;
+   PROCEDURE remove_duplicate_comments (
+      p_batch_size IN PLS_INTEGER DEFAULT c_dedupe_batch,
+      p_range_size IN PLS_INTEGER DEFAULT c_dedupe_range
+   );
+
+   -- Audit pipeline
+   -- Defaults used by the scheduler jobs created in 04_triggers.sql.
+   c_audit_drain_batch    CONSTANT PLS_INTEGER := 1000;
+   c_audit_retention_days CONSTANT PLS_INTEGER := 90;
+
+   -- Move queued audit rows from TRANSACTION_LOG_QUEUE into TRANSACTION_LOGS,
+   -- p_batch_size rows per commit, until the queue is empty.
+   PROCEDURE drain_audit_queue (
+      p_batch_size IN PLS_INTEGER DEFAULT c_audit_drain_batch
+   );
+
+   -- Drop TRANSACTION_LOGS partitions that only hold rows older than
+   -- p_retention_days.
+   PROCEDURE purge_audit_logs (
+      p_retention_days IN PLS_INTEGER DEFAULT c_audit_retention_days
+   );
+
+   -- Recompute posts.hot_score for every post (backfill after a bulk load
+   -- with triggers disabled, or after changing the hot_score formula).
+   PROCEDURE refresh_hot_scores;
+
+   -- Home feed
+   -- Subforums with more subscribers than this are switched to fan-out on
+   -- read (subforums.feed_on_read) instead of copying each post to everyone.
+   c_feed_fanout_limit    CONSTANT PLS_INTEGER := 10000;
+   -- Recent posts copied into USER_FEED when a user subscribes.
+   c_feed_backfill        CONSTANT PLS_INTEGER := 100;
+   c_feed_retention_days  CONSTANT PLS_INTEGER := 30;
+
+   -- Delete USER_FEED rows older than p_retention_days.
+   PROCEDURE trim_user_feed (
+      p_retention_days IN PLS_INTEGER DEFAULT c_feed_retention_days
+   );
+
+   -- Subforum statistics
+   -- Brings the SUBFORUM_STATS materialized view up to date: 'F' applies the
+   -- changes logged on POSTS since the last refresh, 'C' recomputes it. The
+   -- shareit_stats_refresh job (05_reporting.sql) runs the fast refresh.
+   PROCEDURE refresh_subforum_stats (
+      p_method IN VARCHAR2 DEFAULT 'F'
+   );
+
+   -- Recompute everything the triggers normally maintain (vote counts, karma,
+   -- unread message counts, subscriber counts, hot scores, USER_FEED, subforum
+   -- statistics) from the base tables. Used after a bulk load with triggers disabled
+   -- (backend/benchmarks/dataset.py).
+   PROCEDURE rebuild_derived_data;
 
 END shareit_pkg;
 /
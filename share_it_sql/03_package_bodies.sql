@@ -3,6 +3,22 @@
 
 CREATE OR REPLACE PACKAGE BODY shareit_pkg AS
 
+   -- Array bind -> SQL collection, so a batch procedure can read the ids
+   -- with TABLE() and apply them in one statement
+   FUNCTION to_id_list (
+      p_ids IN t_number_tab
+   ) RETURN t_id_list IS
+      v_list t_id_list := t_id_list();
+      v_i    PLS_INTEGER := p_ids.FIRST;
+   BEGIN
+      WHILE v_i IS NOT NULL LOOP
+         v_list.EXTEND;
+         v_list(v_list.LAST) := p_ids(v_i);
+         v_i := p_ids.NEXT(v_i);
+      END LOOP;
+      RETURN v_list;
+   END to_id_list;
+
    -- =========================================================================
    --  UTILITY: ID Lookups
    -- =========================================================================
@@ -70,6 +86,24 @@ CREATE OR REPLACE PACKAGE BODY shareit_pkg AS
    END get_post_id;
 
 
+   -- =========================================================================
+   --  RANKING
+   -- =========================================================================
+
+   FUNCTION hot_score (
+      p_upvotes    IN NUMBER,
+      p_created_at IN DATE
+   ) RETURN BINARY_DOUBLE DETERMINISTIC IS
+      v_order   BINARY_DOUBLE;
+      v_seconds BINARY_DOUBLE;
+   BEGIN
+      v_order := LOG(10, GREATEST(ABS(NVL(p_upvotes, 0)), 1));
+      -- Seconds since the Reddit epoch (2005-12-08 07:46:43 UTC)
+      v_seconds := ( NVL(p_created_at, SYSDATE) - DATE '1970-01-01' ) * 86400 - 1134028003;
+      RETURN SIGN(NVL(p_upvotes, 0)) * v_order + v_seconds / 45000;
+   END hot_score;
+
+
    -- =========================================================================
    --  PROCEDURES: USERS
    -- =========================================================================
@@ -124,6 +158,28 @@ CREATE OR REPLACE PACKAGE BODY shareit_pkg AS
          ROLLBACK;
    END update_user_email;
 
+   PROCEDURE update_user_password (
+      p_user_id       IN NUMBER,
+      p_password_hash IN VARCHAR2
+   ) IS
+   BEGIN
+      UPDATE users
+         SET
+         password_hash = p_password_hash
+       WHERE user_id = p_user_id;
+
+      IF SQL%ROWCOUNT = 0 THEN
+         dbms_output.put_line('User not found with ID: ' || p_user_id);
+      ELSE
+         COMMIT;
+         dbms_output.put_line('User password updated successfully.');
+      END IF;
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error updating password: ' || sqlerrm);
+         ROLLBACK;
+   END update_user_password;
+
    -- =========================================================================
    --  PROCEDURES: SUBFORUMS
    -- =========================================================================
@@ -345,6 +401,32 @@ CREATE OR REPLACE PACKAGE BODY shareit_pkg AS
          ROLLBACK;
    END delete_comment;
 
+   PROCEDURE delete_user (
+      p_user_id IN NUMBER
+   ) IS
+   BEGIN
+      -- Left to ON DELETE CASCADE, these rows would be deleted while USERS
+      -- is mutating and trg_messages_unread could not update the receivers
+      DELETE FROM messages
+       WHERE sender_id = p_user_id;
+
+      DELETE FROM users
+       WHERE user_id = p_user_id;
+
+      IF SQL%ROWCOUNT = 0 THEN
+         dbms_output.put_line('User not found with ID: ' || p_user_id);
+         ROLLBACK;
+      ELSE
+         COMMIT;
+         dbms_output.put_line('User deleted successfully.');
+      END IF;
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error deleting user: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END delete_user;
+
    -- =========================================================================
    --  PROCEDURES: VOTES
    -- =========================================================================
@@ -415,6 +497,99 @@ CREATE OR REPLACE PACKAGE BODY shareit_pkg AS
    END vote_post;
 
 
+   -- BULK
+   PROCEDURE vote_posts_bulk (
+      p_user_ids   IN t_number_tab,
+      p_post_ids   IN t_number_tab,
+      p_vote_types IN t_number_tab,
+      p_rejected   OUT NUMBER
+   ) IS
+      v_votes t_vote_tab := t_vote_tab();
+   BEGIN
+      p_rejected := 0;
+      IF p_user_ids.COUNT = 0 THEN
+         RETURN;
+      END IF;
+
+      -- The array binds as one SQL collection, so each change below is a
+      -- single statement and trg_post_votes_aggregate updates every post
+      -- and author once for the whole batch
+      FOR i IN p_user_ids.FIRST..p_user_ids.LAST LOOP
+         v_votes.EXTEND;
+         v_votes(v_votes.LAST) := t_vote_row(
+            p_user_ids(i),
+            p_post_ids(i),
+            p_vote_types(i)
+         );
+      END LOOP;
+
+      -- A vote for a post or user that no longer exists is dropped instead
+      -- of failing (and, in the vote buffer, endlessly retrying) the whole
+      -- batch: the MERGE below only reads votes whose post and user exist
+      SELECT COUNT(*)
+        INTO p_rejected
+        FROM TABLE ( v_votes ) v
+       WHERE v.vote_type <> 0
+         AND ( NOT EXISTS (
+         SELECT 1
+           FROM posts p
+          WHERE p.post_id = v.post_id
+      )
+          OR NOT EXISTS (
+         SELECT 1
+           FROM users u
+          WHERE u.user_id = v.user_id
+      ) );
+
+      -- Removed votes
+      DELETE FROM post_votes pv
+       WHERE ( pv.user_id,
+               pv.post_id ) IN (
+         SELECT v.user_id,
+                v.post_id
+           FROM TABLE ( v_votes ) v
+          WHERE v.vote_type = 0
+      );
+
+      -- New or changed votes. Unchanged votes are skipped so they do not
+      -- fire the vote-count/karma triggers for a zero delta.
+      MERGE INTO post_votes pv
+      USING (
+         SELECT v.user_id,
+                v.post_id,
+                v.vote_type
+           FROM TABLE ( v_votes ) v
+           JOIN posts p ON p.post_id = v.post_id
+           JOIN users u ON u.user_id = v.user_id
+          WHERE v.vote_type <> 0
+      ) v ON ( pv.user_id = v.user_id
+         AND pv.post_id = v.post_id )
+      WHEN MATCHED THEN UPDATE
+      SET pv.vote_type = v.vote_type
+       WHERE pv.vote_type <> v.vote_type
+      WHEN NOT MATCHED THEN
+      INSERT (
+         user_id,
+         post_id,
+         vote_type )
+      VALUES
+         ( v.user_id,
+           v.post_id,
+           v.vote_type );
+
+      COMMIT;
+      dbms_output.put_line('Applied '
+                           || (p_user_ids.COUNT - p_rejected)
+                           || ' votes, rejected '
+                           || p_rejected || '.');
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error applying votes: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END vote_posts_bulk;
+
+
    -- =========================================================================
    --  PROCEDURES: SUBSCRIPTIONS
    -- =========================================================================
@@ -463,68 +638,706 @@ CREATE OR REPLACE PACKAGE BODY shareit_pkg AS
 
 
    -- =========================================================================
-   --  MAINTENANCE
+   --  PROCEDURES: MESSAGES
+   -- =========================================================================
+
+   PROCEDURE send_message (
+      p_sender_id   IN NUMBER,
+      p_receiver_id IN NUMBER,
+      p_subject     IN VARCHAR2,
+      p_body        IN VARCHAR2
+   ) IS
+   BEGIN
+      INSERT INTO messages (
+         message_id,
+         sender_id,
+         receiver_id,
+         subject,
+         body
+      ) VALUES ( seq_messages_id.NEXTVAL,
+                 p_sender_id,
+                 p_receiver_id,
+                 p_subject,
+                 p_body );
+      COMMIT;
+      dbms_output.put_line('Message sent from user '
+                           || p_sender_id
+                           || ' to user ' || p_receiver_id);
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error sending message: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END send_message;
+
+   PROCEDURE mark_messages_read (
+      p_user_id     IN NUMBER,
+      p_message_ids IN t_number_tab
+   ) IS
+      v_ids   t_id_list := to_id_list(p_message_ids);
+      v_count NUMBER;
+   BEGIN
+      IF v_ids.COUNT = 0 THEN
+         RETURN;
+      END IF;
+
+      -- One statement, so trg_messages_unread updates the counter once
+      UPDATE messages
+         SET
+         is_read = 1
+       WHERE message_id IN (
+         SELECT column_value
+           FROM TABLE ( v_ids )
+      )
+         AND receiver_id = p_user_id
+         AND is_read = 0;
+      v_count := SQL%ROWCOUNT;
+
+      COMMIT;
+      dbms_output.put_line('Marked ' || v_count || ' messages read.');
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error marking messages read: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END mark_messages_read;
+
+   PROCEDURE mark_all_messages_read (
+      p_user_id IN NUMBER
+   ) IS
+      v_count NUMBER;
+   BEGIN
+      -- Same expression as idx_messages_unread, so only unread rows are visited
+      UPDATE messages
+         SET
+         is_read = 1
+       WHERE
+         CASE
+            WHEN is_read = 0 THEN
+               receiver_id
+         END = p_user_id;
+      v_count := SQL%ROWCOUNT;
+
+      COMMIT;
+      dbms_output.put_line('Marked ' || v_count || ' messages read.');
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error marking messages read: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END mark_all_messages_read;
+
+   -- =========================================================================
+   --  PROCEDURES: MODERATION
    -- =========================================================================
 
-   PROCEDURE remove_duplicate_reports IS
+   PROCEDURE report_item (
+      p_reporter_id IN NUMBER,
+      p_post_id     IN NUMBER,
+      p_comment_id  IN NUMBER,
+      p_reason      IN VARCHAR2
+   ) IS
+   BEGIN
+      -- subforum_id is filled in by trg_reports_subforum
+      INSERT INTO reports (
+         report_id,
+         reporter_id,
+         post_id,
+         comment_id,
+         reason
+      ) VALUES ( seq_reports_id.NEXTVAL,
+                 p_reporter_id,
+                 p_post_id,
+                 p_comment_id,
+                 p_reason );
+      COMMIT;
+      dbms_output.put_line('Report filed by user ' || p_reporter_id);
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error filing report: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END report_item;
+
+   PROCEDURE set_reports_status (
+      p_moderator_id IN NUMBER,
+      p_report_ids   IN t_number_tab,
+      p_status       IN VARCHAR2
+   ) IS
+      v_ids   t_id_list := to_id_list(p_report_ids);
+      v_count NUMBER;
    BEGIN
-      DELETE FROM reports a
-       WHERE rowid > (
-         SELECT MIN(rowid)
-           FROM reports b
-          WHERE a.reporter_id = b.reporter_id
-            AND a.reason = b.reason
-            AND NVL(a.post_id, -1) = NVL(b.post_id, -1)
-            AND NVL(a.comment_id, -1) = NVL(b.comment_id, -1)
+      IF p_status NOT IN ( 'RESOLVED',
+                           'DISMISSED' ) THEN
+         raise_application_error(
+            -20004,
+            'Invalid report status: ' || p_status
+         );
+      END IF;
+      IF v_ids.COUNT = 0 THEN
+         RETURN;
+      END IF;
+
+      -- One statement for the whole batch; each row is found by primary key
+      -- and checked against the moderator's subforums (pk_moderators)
+      UPDATE reports r
+         SET r.status = p_status,
+             r.resolved_by = p_moderator_id,
+             r.resolved_at = sysdate
+       WHERE r.report_id IN (
+         SELECT column_value
+           FROM TABLE ( v_ids )
+      )
+         AND r.status = 'OPEN'
+         AND EXISTS (
+         SELECT 1
+           FROM moderators m
+          WHERE m.user_id = p_moderator_id
+            AND m.subforum_id = r.subforum_id
       );
+      v_count := SQL%ROWCOUNT;
 
-      dbms_output.put_line('Deleted ' || SQL%ROWCOUNT || ' duplicate reports.');
       COMMIT;
+      dbms_output.put_line('Closed ' || v_count || ' reports as ' || p_status || '.');
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error updating reports: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END set_reports_status;
+
+
+   -- =========================================================================
+   --  MAINTENANCE
+   -- =========================================================================
+
+   -- The remove_duplicate_* procedures walk the table in ranges of their
+   -- grouping key (p_range_size ids at a time, over an index), find the
+   -- duplicates of each range in one analytic pass (ROW_NUMBER over the
+   -- duplicate key, oldest row kept), and delete them by primary key,
+   -- p_batch_size rows per commit. Transactions stay short, so they can run
+   -- online without long-held locks or undo growth; progress shows up in
+   -- V$SESSION_LONGOPS.
+
+   TYPE t_id_tab IS
+      TABLE OF NUMBER;
+
+   PROCEDURE report_dedupe_progress (
+      p_op     IN VARCHAR2,
+      p_rindex IN OUT BINARY_INTEGER,
+      p_slno   IN OUT BINARY_INTEGER,
+      p_done   IN NUMBER,
+      p_total  IN NUMBER
+   ) IS
+   BEGIN
+      dbms_application_info.set_session_longops(
+         rindex    => p_rindex,
+         slno      => p_slno,
+         op_name   => p_op,
+         sofar     => p_done,
+         totalwork => p_total,
+         units     => 'ids'
+      );
+   END report_dedupe_progress;
+
+   PROCEDURE remove_duplicate_reports (
+      p_batch_size IN PLS_INTEGER DEFAULT c_dedupe_batch,
+      p_range_size IN PLS_INTEGER DEFAULT c_dedupe_range
+   ) IS
+      v_ids     t_id_tab;
+      v_min     NUMBER;
+      v_max     NUMBER;
+      v_lo      NUMBER;
+      v_deleted NUMBER := 0;
+      v_rindex  BINARY_INTEGER := dbms_application_info.set_session_longops_nohint;
+      v_slno    BINARY_INTEGER;
+   BEGIN
+      SELECT MIN(reporter_id),
+             MAX(reporter_id)
+        INTO
+         v_min,
+         v_max
+        FROM reports;
+
+      v_lo := v_min;
+      WHILE v_lo <= v_max LOOP
+         SELECT report_id
+         BULK COLLECT
+           INTO v_ids
+           FROM (
+            SELECT r.report_id,
+                   ROW_NUMBER()
+                   OVER(PARTITION BY r.reporter_id,
+                                     r.reason,
+                                     r.post_id,
+                                     r.comment_id
+                        ORDER BY r.report_id
+                   ) AS rn
+              FROM reports r
+             WHERE r.reporter_id BETWEEN v_lo AND v_lo + p_range_size - 1
+         )
+          WHERE rn > 1;
+
+         FOR i IN 0..ceil(v_ids.COUNT / p_batch_size) - 1 LOOP
+            FORALL j IN i * p_batch_size + 1..least(
+               (i + 1) * p_batch_size,
+               v_ids.COUNT
+            )
+               DELETE FROM reports
+                WHERE report_id = v_ids(j);
+            v_deleted := v_deleted + SQL%ROWCOUNT;
+            COMMIT;
+         END LOOP;
+
+         v_lo := v_lo + p_range_size;
+         report_dedupe_progress(
+            'remove_duplicate_reports',
+            v_rindex,
+            v_slno,
+            least(v_lo - v_min, v_max - v_min + 1),
+            v_max - v_min + 1
+         );
+      END LOOP;
+
+      dbms_output.put_line('Deleted ' || v_deleted || ' duplicate reports.');
    EXCEPTION
       WHEN OTHERS THEN
          dbms_output.put_line('Error removing duplicate reports: ' || sqlerrm);
          ROLLBACK;
    END remove_duplicate_reports;
 
-   PROCEDURE remove_duplicate_posts IS
-   BEGIN
-      DELETE FROM posts a
-       WHERE rowid > (
-         SELECT MIN(rowid)
-           FROM posts b
-          WHERE a.user_id = b.user_id
-            AND a.subforum_id = b.subforum_id
-            AND a.title = b.title
-            -- Compare CLOBs safely
-            AND dbms_lob.compare(a.content_text, b.content_text) = 0
-      );
+   PROCEDURE remove_duplicate_posts (
+      p_batch_size IN PLS_INTEGER DEFAULT c_dedupe_batch,
+      p_range_size IN PLS_INTEGER DEFAULT c_dedupe_range
+   ) IS
+      v_ids     t_id_tab;
+      v_min     NUMBER;
+      v_max     NUMBER;
+      v_lo      NUMBER;
+      v_deleted NUMBER := 0;
+      v_rindex  BINARY_INTEGER := dbms_application_info.set_session_longops_nohint;
+      v_slno    BINARY_INTEGER;
+   BEGIN
+      SELECT MIN(user_id),
+             MAX(user_id)
+        INTO
+         v_min,
+         v_max
+        FROM posts;
 
-      dbms_output.put_line('Deleted ' || SQL%ROWCOUNT || ' duplicate posts.');
-      COMMIT;
+      v_lo := v_min;
+      WHILE v_lo <= v_max LOOP
+         -- CLOBs cannot be partitioned on, so bodies are grouped by length
+         -- and a hash of their first 1000 characters (at most 4000 bytes,
+         -- the SQL limit for DBMS_LOB.SUBSTR). A group can still hold bodies
+         -- that differ further on, so a row is a duplicate only if an earlier
+         -- row of its group has the same full text: the earliest copy of each
+         -- text is kept. Rows alone in their group skip the comparison.
+         WITH g AS (
+            SELECT p.post_id,
+                   p.user_id,
+                   p.subforum_id,
+                   p.title,
+                   p.content_text,
+                   dbms_lob.getlength(p.content_text) AS content_len,
+                   standard_hash(
+                      dbms_lob.substr(
+                         p.content_text,
+                         1000,
+                         1
+                      ),
+                      'SHA256'
+                   ) AS head_hash
+              FROM posts p
+             WHERE p.user_id BETWEEN v_lo AND v_lo + p_range_size - 1
+         )
+         SELECT post_id
+         BULK COLLECT
+           INTO v_ids
+           FROM (
+            SELECT g.*,
+                   ROW_NUMBER()
+                   OVER(PARTITION BY g.user_id,
+                                     g.subforum_id,
+                                     g.title,
+                                     g.content_len,
+                                     g.head_hash
+                        ORDER BY g.post_id
+                   ) AS rn
+              FROM g
+         ) d
+          WHERE d.rn > 1
+            AND EXISTS (
+            SELECT 1
+              FROM g e
+             WHERE e.user_id = d.user_id
+               AND e.subforum_id = d.subforum_id
+               AND e.title = d.title
+               AND e.content_len = d.content_len
+               AND e.head_hash = d.head_hash
+               AND e.post_id < d.post_id
+               AND dbms_lob.compare(
+               e.content_text,
+               d.content_text
+            ) = 0
+         );
+
+         FOR i IN 0..ceil(v_ids.COUNT / p_batch_size) - 1 LOOP
+            FORALL j IN i * p_batch_size + 1..least(
+               (i + 1) * p_batch_size,
+               v_ids.COUNT
+            )
+               DELETE FROM posts
+                WHERE post_id = v_ids(j);
+            v_deleted := v_deleted + SQL%ROWCOUNT;
+            COMMIT;
+         END LOOP;
+
+         v_lo := v_lo + p_range_size;
+         report_dedupe_progress(
+            'remove_duplicate_posts',
+            v_rindex,
+            v_slno,
+            least(v_lo - v_min, v_max - v_min + 1),
+            v_max - v_min + 1
+         );
+      END LOOP;
+
+      dbms_output.put_line('Deleted ' || v_deleted || ' duplicate posts.');
    EXCEPTION
       WHEN OTHERS THEN
          dbms_output.put_line('Error removing duplicate posts: ' || sqlerrm);
          ROLLBACK;
    END remove_duplicate_posts;
 
-   PROCEDURE remove_duplicate_comments IS
+   PROCEDURE remove_duplicate_comments (
+      p_batch_size IN PLS_INTEGER DEFAULT c_dedupe_batch,
+      p_range_size IN PLS_INTEGER DEFAULT c_dedupe_range
+   ) IS
+      v_ids     t_id_tab;
+      v_min     NUMBER;
+      v_max     NUMBER;
+      v_lo      NUMBER;
+      v_deleted NUMBER := 0;
+      v_rindex  BINARY_INTEGER := dbms_application_info.set_session_longops_nohint;
+      v_slno    BINARY_INTEGER;
    BEGIN
-      DELETE FROM comments a
-       WHERE rowid > (
-         SELECT MIN(rowid)
-           FROM comments b
-          WHERE a.user_id = b.user_id
-            AND a.post_id = b.post_id
-            AND a.content = b.content
-      );
+      -- Ranges of post_id, the leading column of idx_comments_post_parent
+      SELECT MIN(post_id),
+             MAX(post_id)
+        INTO
+         v_min,
+         v_max
+        FROM comments;
 
-      dbms_output.put_line('Deleted ' || SQL%ROWCOUNT || ' duplicate comments.');
-      COMMIT;
+      v_lo := v_min;
+      WHILE v_lo <= v_max LOOP
+         -- Hashing the text keeps the sort keys short (content is up to 2000 bytes)
+         SELECT comment_id
+         BULK COLLECT
+           INTO v_ids
+           FROM (
+            SELECT c.comment_id,
+                   ROW_NUMBER()
+                   OVER(PARTITION BY c.post_id,
+                                     c.user_id,
+                                     standard_hash(
+                                        c.content,
+                                        'SHA256'
+                                     )
+                        ORDER BY c.comment_id
+                   ) AS rn
+              FROM comments c
+             WHERE c.post_id BETWEEN v_lo AND v_lo + p_range_size - 1
+         )
+          WHERE rn > 1;
+
+         -- Deleting a duplicate cascades to its replies, which a later
+         -- batch may also list; those deletes simply find nothing
+         FOR i IN 0..ceil(v_ids.COUNT / p_batch_size) - 1 LOOP
+            FORALL j IN i * p_batch_size + 1..least(
+               (i + 1) * p_batch_size,
+               v_ids.COUNT
+            )
+               DELETE FROM comments
+                WHERE comment_id = v_ids(j);
+            v_deleted := v_deleted + SQL%ROWCOUNT;
+            COMMIT;
+         END LOOP;
+
+         v_lo := v_lo + p_range_size;
+         report_dedupe_progress(
+            'remove_duplicate_comments',
+            v_rindex,
+            v_slno,
+            least(v_lo - v_min, v_max - v_min + 1),
+            v_max - v_min + 1
+         );
+      END LOOP;
+
+      dbms_output.put_line('Deleted ' || v_deleted || ' duplicate comments.');
    EXCEPTION
       WHEN OTHERS THEN
          dbms_output.put_line('Error removing duplicate comments: ' || sqlerrm);
          ROLLBACK;
    END remove_duplicate_comments;
 
+   PROCEDURE refresh_hot_scores IS
+   BEGIN
+      UPDATE posts
+         SET
+         hot_score = shareit_pkg.hot_score(upvotes, created_at);
+
+      dbms_output.put_line('Refreshed hot score for ' || SQL%ROWCOUNT || ' posts.');
+
+      -- HOT_SCORE is in every feed row, so every feed ETag changes
+      UPDATE subforums
+         SET
+         version = version + 1;
+      COMMIT;
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error refreshing hot scores: ' || sqlerrm);
+         ROLLBACK;
+   END refresh_hot_scores;
+
+   PROCEDURE trim_user_feed (
+      p_retention_days IN PLS_INTEGER DEFAULT c_feed_retention_days
+   ) IS
+   BEGIN
+      DELETE FROM user_feed
+       WHERE created_at < sysdate - p_retention_days;
+
+      dbms_output.put_line('Trimmed ' || SQL%ROWCOUNT || ' feed entries.');
+      COMMIT;
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error trimming user feed: ' || sqlerrm);
+         ROLLBACK;
+   END trim_user_feed;
+
+   PROCEDURE refresh_subforum_stats (
+      p_method IN VARCHAR2 DEFAULT 'F'
+   ) IS
+   BEGIN
+      -- By name: SUBFORUM_STATS is created after this package (05_reporting.sql)
+      dbms_mview.refresh(
+         list   => 'SUBFORUM_STATS',
+         method => p_method
+      );
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error refreshing subforum stats: ' || sqlerrm);
+         RAISE;
+   END refresh_subforum_stats;
+
+   PROCEDURE rebuild_derived_data IS
+   BEGIN
+      -- 1. Vote counts, one aggregate pass over POST_VOTES
+      UPDATE posts
+         SET
+         upvotes = 0
+       WHERE upvotes <> 0;
+
+      MERGE INTO posts p
+      USING (
+         SELECT post_id,
+                SUM(vote_type) AS total
+           FROM post_votes
+          GROUP BY post_id
+      ) v ON ( p.post_id = v.post_id )
+      WHEN MATCHED THEN UPDATE
+      SET p.upvotes = v.total;
+
+      -- 2. Karma from votes on each user's posts and comments
+      UPDATE users
+         SET
+         karma = 0
+       WHERE karma <> 0;
+
+      MERGE INTO users u
+      USING (
+         SELECT author_id,
+                SUM(vote_type) AS total
+           FROM (
+            SELECT p.user_id AS author_id,
+                   pv.vote_type
+              FROM post_votes pv
+              JOIN posts p
+            ON p.post_id = pv.post_id
+            UNION ALL
+            SELECT c.user_id,
+                   cv.vote_type
+              FROM comment_votes cv
+              JOIN comments c
+            ON c.comment_id = cv.comment_id
+         )
+          GROUP BY author_id
+      ) k ON ( u.user_id = k.author_id )
+      WHEN MATCHED THEN UPDATE
+      SET u.karma = k.total;
+
+      -- 3. Unread message counts
+      MERGE INTO users u
+      USING (
+         SELECT us.user_id,
+                COUNT(m.message_id) AS total
+           FROM users us
+           LEFT JOIN messages m
+         ON m.receiver_id = us.user_id
+            AND m.is_read = 0
+          GROUP BY us.user_id
+      ) m ON ( u.user_id = m.user_id )
+      WHEN MATCHED THEN UPDATE
+      SET u.unread_messages = m.total
+      WHERE u.unread_messages <> m.total;
+
+      -- 4. Subscriber counts, fan-out mode and newest post
+      MERGE INTO subforums s
+      USING (
+         SELECT sf.subforum_id,
+                (
+                   SELECT COUNT(*)
+                     FROM user_subscriptions us
+                    WHERE us.subforum_id = sf.subforum_id
+                ) AS total,
+                (
+                   SELECT MAX(p.created_at)
+                     FROM posts p
+                    WHERE p.subforum_id = sf.subforum_id
+                ) AS last_post_at
+           FROM subforums sf
+      ) c ON ( s.subforum_id = c.subforum_id )
+      WHEN MATCHED THEN UPDATE
+      SET s.subscriber_count = c.total,
+          s.last_post_at = c.last_post_at,
+          s.feed_on_read =
+             CASE
+                WHEN c.total > c_feed_fanout_limit THEN
+                   1
+                ELSE
+                   0
+             END;
+
+      COMMIT;
+
+      -- 5. Hot scores (commits)
+      refresh_hot_scores;
+
+      -- 6. Materialized home feeds, within the retention window
+      EXECUTE IMMEDIATE 'TRUNCATE TABLE user_feed';
+      INSERT /*+ APPEND */ INTO user_feed (
+         user_id,
+         created_at,
+         post_id,
+         subforum_id
+      )
+         SELECT us.user_id,
+                p.created_at,
+                p.post_id,
+                p.subforum_id
+           FROM user_subscriptions us
+           JOIN subforums s
+         ON s.subforum_id = us.subforum_id
+           JOIN posts p
+         ON p.subforum_id = us.subforum_id
+          WHERE s.feed_on_read = 0
+            AND p.created_at >= sysdate - c_feed_retention_days;
+
+      dbms_output.put_line('Rebuilt ' || SQL%ROWCOUNT || ' feed entries.');
+      COMMIT;
+
+      -- 7. Per-subforum statistics (commits)
+      refresh_subforum_stats('C');
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error rebuilding derived data: ' || sqlerrm);
+         ROLLBACK;
+         RAISE;
+   END rebuild_derived_data;
+
+   PROCEDURE drain_audit_queue (
+      p_batch_size IN PLS_INTEGER DEFAULT c_audit_drain_batch
+   ) IS
+      TYPE t_rowid_tab IS
+         TABLE OF ROWID;
+      v_rowids t_rowid_tab;
+      v_total  NUMBER := 0;
+      CURSOR c_queue IS
+      SELECT rowid
+        FROM transaction_log_queue;
+   BEGIN
+      LOOP
+         OPEN c_queue;
+         FETCH c_queue
+         BULK COLLECT INTO v_rowids
+         LIMIT p_batch_size;
+         CLOSE c_queue;
+         EXIT WHEN v_rowids.COUNT = 0;
+
+         FORALL i IN 1..v_rowids.COUNT
+            INSERT INTO transaction_logs (
+               log_id,
+               table_name,
+               transaction_type,
+               transaction_time,
+               details
+            )
+               SELECT seq_logs_id.NEXTVAL,
+                      q.table_name,
+                      q.transaction_type,
+                      q.transaction_time,
+                      q.details
+                 FROM transaction_log_queue q
+                WHERE q.rowid = v_rowids(i);
+
+         FORALL i IN 1..v_rowids.COUNT
+            DELETE FROM transaction_log_queue
+             WHERE rowid = v_rowids(i);
+
+         v_total := v_total + v_rowids.COUNT;
+         COMMIT;
+      END LOOP;
+
+      dbms_output.put_line('Drained ' || v_total || ' audit log entries.');
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error draining audit queue: ' || sqlerrm);
+         ROLLBACK;
+   END drain_audit_queue;
+
+   PROCEDURE purge_audit_logs (
+      p_retention_days IN PLS_INTEGER DEFAULT c_audit_retention_days
+   ) IS
+      v_high_value VARCHAR2(4000);
+      v_bound      DATE;
+      v_dropped    NUMBER := 0;
+   BEGIN
+      -- The first (range) partition is the interval anchor and cannot be dropped.
+      FOR p IN (
+         SELECT partition_name,
+                high_value
+           FROM user_tab_partitions
+          WHERE table_name = 'TRANSACTION_LOGS'
+            AND partition_position > 1
+          ORDER BY partition_position
+      ) LOOP
+         v_high_value := p.high_value;
+         EXECUTE IMMEDIATE 'SELECT ' || v_high_value || ' FROM dual'
+           INTO v_bound;
+         EXIT WHEN v_bound > SYSDATE - p_retention_days;
+
+         EXECUTE IMMEDIATE 'ALTER TABLE transaction_logs DROP PARTITION '
+                           || p.partition_name
+                           || ' UPDATE GLOBAL INDEXES';
+         v_dropped := v_dropped + 1;
+      END LOOP;
+
+      dbms_output.put_line('Dropped ' || v_dropped || ' audit log partitions.');
+   EXCEPTION
+      WHEN OTHERS THEN
+         dbms_output.put_line('Error purging audit logs: ' || sqlerrm);
+   END purge_audit_logs;
+
 END shareit_pkg;
 /
\ No newline at end of file
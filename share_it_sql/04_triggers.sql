@@ -1,12 +1,21 @@
 -- 04_triggers.sql
 -- PL/SQL Triggers
 -- Contains triggers for auditing, karma calculation, and vote count synchronization.
+-- Vote triggers are compound (statement-level); see 07_benchmark_vote_triggers.sql
+-- for the row-level versions they replaced and a throughput comparison.
 
 -- Requirement #7: Data entry to transaction table via trigger
+-- The audit triggers append to TRANSACTION_LOG_QUEUE (no index, no sequence)
+-- and the shareit_audit_drain job moves rows into TRANSACTION_LOGS in batches,
+-- keeping the log write cheap inside user transactions. See the jobs at the
+-- end of this file.
 
 -- Trigger for POSTS table (Audit)
+-- Every column but VERSION: version stamps (trg_comments_version) are not
+-- changes to the post and would add an audit row per comment.
 CREATE OR REPLACE TRIGGER trg_posts_log AFTER
-   INSERT OR UPDATE OR DELETE ON posts
+   INSERT OR UPDATE OF post_id, user_id, subforum_id, title, content_text, upvotes, hot_score, created_at
+   OR DELETE ON posts
    FOR EACH ROW
 DECLARE
    v_type    VARCHAR2(10);
@@ -27,13 +36,11 @@ BEGIN
                    || ' deleted.';
    END IF;
 
-   INSERT INTO transaction_logs (
-      log_id,
+   INSERT INTO transaction_log_queue (
       table_name,
       transaction_type,
       details
-   ) VALUES ( seq_logs_id.NEXTVAL,
-              'POSTS',
+   ) VALUES ( 'POSTS',
               v_type,
               v_details );
 END;
@@ -62,128 +69,672 @@ BEGIN
                    || ' deleted.';
    END IF;
 
-   INSERT INTO transaction_logs (
-      log_id,
+   INSERT INTO transaction_log_queue (
       table_name,
       transaction_type,
       details
-   ) VALUES ( seq_logs_id.NEXTVAL,
-              'USERS',
+   ) VALUES ( 'USERS',
               v_type,
               v_details );
 END;
 /
 
--- Trigger for POST_VOTES (Update Post Upvotes Count)
--- Keeps the denormalized upvotes column in POSTS table in sync.
-CREATE OR REPLACE TRIGGER trg_post_votes_count AFTER
-   INSERT OR UPDATE OR DELETE ON post_votes
+-- Vote aggregation triggers
+-- Statement-level (compound) triggers: each row only records its vote delta
+-- in memory; AFTER STATEMENT applies one UPDATE per distinct post and per
+-- distinct author. A multi-row vote change (bulk load, or vote_posts_bulk,
+-- which applies a batch as one DELETE and one MERGE) therefore touches each
+-- hot posts/users row once per statement instead of once per vote.
+
+-- Drop the row-level triggers these replace, when re-running on an existing schema.
+BEGIN
+   FOR t IN (
+      SELECT trigger_name
+        FROM USER_TRIGGERS
+       WHERE trigger_name IN ( 'TRG_POST_VOTES_COUNT',
+                               'TRG_POST_VOTES_KARMA' )
+   ) LOOP
+      EXECUTE IMMEDIATE 'DROP TRIGGER ' || t.trigger_name;
+   END LOOP;
+END;
+/
+
+-- Trigger for POST_VOTES (Update Post Upvotes Count and Author Karma)
+-- Keeps the denormalized upvotes column in POSTS and the karma of the
+-- *author* of each post in sync.
+CREATE OR REPLACE TRIGGER trg_post_votes_aggregate
+   FOR INSERT OR UPDATE OR DELETE ON post_votes
+COMPOUND TRIGGER
+
+   TYPE t_delta_tab IS
+      TABLE OF NUMBER INDEX BY PLS_INTEGER;
+
+   -- post_id -> net vote change in this statement
+   g_post_deltas t_delta_tab;
+
+   -- Raised when the votes are being removed by ON DELETE CASCADE from POSTS
+   e_mutating EXCEPTION;
+   PRAGMA exception_init ( e_mutating, -4091 );
+
+   PROCEDURE add_delta (
+      p_key   IN NUMBER,
+      p_delta IN NUMBER
+   ) IS
+   BEGIN
+      IF g_post_deltas.EXISTS(p_key) THEN
+         g_post_deltas(p_key) := g_post_deltas(p_key) + p_delta;
+      ELSE
+         g_post_deltas(p_key) := p_delta;
+      END IF;
+   END add_delta;
+
+   AFTER EACH ROW IS
+   BEGIN
+      IF INSERTING THEN
+         add_delta(:new.post_id, :new.vote_type);
+      ELSIF DELETING THEN
+         add_delta(:old.post_id, - :old.vote_type);
+      ELSIF UPDATING THEN
+         add_delta(:old.post_id, - :old.vote_type);
+         add_delta(:new.post_id, :new.vote_type);
+      END IF;
+   END AFTER EACH ROW;
+
+   AFTER STATEMENT IS
+      v_post_ids   t_delta_tab;
+      v_deltas     t_delta_tab;
+      v_authors    t_delta_tab;
+      v_karma      t_delta_tab;
+      v_author_ids t_delta_tab;
+      v_karma_vals t_delta_tab;
+      v_key        PLS_INTEGER;
+      v_n          PLS_INTEGER := 0;
+      v_found      PLS_INTEGER := 0;
+   BEGIN
+      -- 1. Densify the deltas, in post_id order (stable lock order). Posts
+      --    whose votes cancel out are still updated: a voter's own USER_VOTE
+      --    changed, so trg_posts_version has to move the post's version.
+      v_key := g_post_deltas.FIRST;
+      WHILE v_key IS NOT NULL LOOP
+         v_n := v_n + 1;
+         v_post_ids(v_n) := v_key;
+         v_deltas(v_n) := g_post_deltas(v_key);
+         v_key := g_post_deltas.NEXT(v_key);
+      END LOOP;
+      g_post_deltas.DELETE;
+
+      IF v_n = 0 THEN
+         RETURN;
+      END IF;
+
+      -- 2. One UPDATE per post; RETURNING collects each post's author
+      FORALL i IN 1..v_n
+         UPDATE posts
+            SET
+            upvotes = upvotes + v_deltas(i)
+          WHERE post_id = v_post_ids(i)
+         RETURNING user_id BULK COLLECT INTO v_authors;
+
+      -- 3. Fold post deltas into author deltas. v_authors only has entries
+      --    for posts that still exist, so pair them up via SQL%BULK_ROWCOUNT.
+      FOR i IN 1..v_n LOOP
+         IF SQL%BULK_ROWCOUNT(i) > 0 THEN
+            v_found := v_found + 1;
+            v_key := v_authors(v_found);
+            IF v_karma.EXISTS(v_key) THEN
+               v_karma(v_key) := v_karma(v_key) + v_deltas(i);
+            ELSE
+               v_karma(v_key) := v_deltas(i);
+            END IF;
+         END IF;
+      END LOOP;
+
+      -- 4. One UPDATE per author
+      v_n := 0;
+      v_key := v_karma.FIRST;
+      WHILE v_key IS NOT NULL LOOP
+         IF v_karma(v_key) <> 0 THEN
+            v_n := v_n + 1;
+            v_author_ids(v_n) := v_key;
+            v_karma_vals(v_n) := v_karma(v_key);
+         END IF;
+         v_key := v_karma.NEXT(v_key);
+      END LOOP;
+
+      FORALL i IN 1..v_n
+         UPDATE users
+            SET
+            karma = karma + v_karma_vals(i)
+          WHERE user_id = v_author_ids(i);
+   EXCEPTION
+      WHEN e_mutating THEN
+         -- Post is being deleted, its count no longer matters; ignore
+         NULL;
+   END AFTER STATEMENT;
+
+END trg_post_votes_aggregate;
+/
+
+-- Trigger for POSTS (Hot Score)
+-- Recomputes the ranking score whenever upvotes changes, which includes the
+-- UPDATE issued by trg_post_votes_aggregate, so ?sort=hot stays an index read.
+CREATE OR REPLACE TRIGGER trg_posts_hot_score BEFORE
+   INSERT OR UPDATE OF upvotes, created_at ON posts
    FOR EACH ROW
 BEGIN
-   IF INSERTING THEN
-        -- New vote: Add vote_type (1 or -1) to total
-      UPDATE posts
-         SET
-         upvotes = upvotes + :new.vote_type
-       WHERE post_id = :new.post_id;
-   ELSIF DELETING THEN
-        -- Removed vote: Subtract vote_type (1 becomes -1, -1 becomes +1)
-      UPDATE posts
-         SET
-         upvotes = upvotes - :old.vote_type
-       WHERE post_id = :old.post_id;
-   ELSIF UPDATING THEN
-        -- Changed vote: Subtract old, add new
-      UPDATE posts
-         SET
-         upvotes = upvotes - :old.vote_type + :new.vote_type
-       WHERE post_id = :new.post_id;
-   END IF;
+   :new.hot_score := shareit_pkg.hot_score(
+      :new.upvotes,
+      :new.created_at
+   );
 END;
 /
 
--- Trigger for POST_VOTES (Update User Karma)
--- Updates the karma of the *author* of the post.
-CREATE OR REPLACE TRIGGER trg_post_votes_karma AFTER
-   INSERT OR UPDATE OR DELETE ON post_votes
+-- Trigger for POSTS (Version Stamps)
+-- Bumps posts.version on every visible change to a post (votes arrive as
+-- UPDATEs of upvotes from trg_post_votes_aggregate) and subforums.version
+-- once per statement for each subforum whose posts were added, changed or
+-- removed. The backend turns these into ETags and answers If-None-Match with
+-- a primary-key read instead of the feed or detail query. The same UPDATE
+-- moves subforums.last_post_at forward for inserted posts, and re-reads it
+-- from POSTS for subforums that lost posts in the statement.
+CREATE OR REPLACE TRIGGER trg_posts_version
+   FOR INSERT OR UPDATE OF title, content_text, upvotes OR DELETE ON posts
+COMPOUND TRIGGER
+
+   TYPE t_flag_tab IS
+      TABLE OF PLS_INTEGER INDEX BY PLS_INTEGER;
+
+   TYPE t_date_tab IS
+      TABLE OF DATE INDEX BY PLS_INTEGER;
+
+   -- subforum_id -> 1 for every subforum touched by this statement
+   g_subforums t_flag_tab;
+   -- subforum_id -> newest created_at among the posts inserted
+   g_last_posts t_date_tab;
+   -- subforum_id -> 1 where this statement deleted posts
+   g_deletes t_flag_tab;
+
+   -- Raised when the posts are being removed by ON DELETE CASCADE from SUBFORUMS
+   e_mutating EXCEPTION;
+   PRAGMA exception_init ( e_mutating, -4091 );
+
+   BEFORE EACH ROW IS
+   BEGIN
+      IF UPDATING THEN
+         :new.version := :old.version + 1;
+      END IF;
+   END BEFORE EACH ROW;
+
+   AFTER EACH ROW IS
+   BEGIN
+      IF DELETING THEN
+         g_subforums(:old.subforum_id) := 1;
+         g_deletes(:old.subforum_id) := 1;
+      ELSE
+         g_subforums(:new.subforum_id) := 1;
+      END IF;
+      IF INSERTING THEN
+         IF NOT g_last_posts.EXISTS(:new.subforum_id)
+         OR g_last_posts(:new.subforum_id) < :new.created_at THEN
+            g_last_posts(:new.subforum_id) := :new.created_at;
+         END IF;
+      END IF;
+   END AFTER EACH ROW;
+
+   AFTER STATEMENT IS
+      v_key       PLS_INTEGER;
+      v_last_post DATE;
+   BEGIN
+      -- subforum_id order (stable lock order)
+      v_key := g_subforums.FIRST;
+      WHILE v_key IS NOT NULL LOOP
+         v_last_post := NULL;
+         IF g_deletes.EXISTS(v_key) THEN
+            -- The newest post may be gone: read the new one off the top of
+            -- idx_posts_subforum_created (POSTS can be queried here, in the
+            -- statement section)
+            BEGIN
+               SELECT created_at
+                 INTO v_last_post
+                 FROM posts
+                WHERE subforum_id = v_key
+                ORDER BY created_at DESC
+                FETCH FIRST 1 ROW ONLY;
+            EXCEPTION
+               WHEN no_data_found THEN
+                  v_last_post := NULL;
+            END;
+            UPDATE subforums
+               SET
+               version = version + 1,
+               last_post_at = v_last_post
+             WHERE subforum_id = v_key;
+         ELSE
+            IF g_last_posts.EXISTS(v_key) THEN
+               v_last_post := g_last_posts(v_key);
+            END IF;
+            UPDATE subforums
+               SET
+               version = version + 1,
+               last_post_at = greatest(
+                  nvl(last_post_at, v_last_post),
+                  nvl(v_last_post, last_post_at)
+               )
+             WHERE subforum_id = v_key;
+         END IF;
+         v_key := g_subforums.NEXT(v_key);
+      END LOOP;
+      g_subforums.DELETE;
+      g_last_posts.DELETE;
+      g_deletes.DELETE;
+   EXCEPTION
+      WHEN e_mutating THEN
+         -- Subforum is being deleted with its posts; ignore
+         g_subforums.DELETE;
+         g_last_posts.DELETE;
+         g_deletes.DELETE;
+   END AFTER STATEMENT;
+
+END trg_posts_version;
+/
+
+-- Trigger for COMMENTS (Post Version Stamp)
+-- Comments are part of the post detail, so any change to them moves the
+-- post's version. Only VERSION is set, which fires neither trg_posts_version
+-- nor the audit trigger. Compound, so a statement bumps (and locks) each
+-- post once, after its rows, rather than once per comment.
+CREATE OR REPLACE TRIGGER trg_comments_version
+   FOR INSERT OR UPDATE OF content OR DELETE ON comments
+COMPOUND TRIGGER
+
+   TYPE t_flag_tab IS
+      TABLE OF PLS_INTEGER INDEX BY PLS_INTEGER;
+
+   -- post_id -> 1 for every post whose comments this statement changed
+   g_posts t_flag_tab;
+
+   -- Raised when the comments are being removed by ON DELETE CASCADE from POSTS
+   e_mutating EXCEPTION;
+   PRAGMA exception_init ( e_mutating, -4091 );
+
+   AFTER EACH ROW IS
+   BEGIN
+      g_posts(nvl(
+         :new.post_id,
+         :old.post_id
+      )) := 1;
+   END AFTER EACH ROW;
+
+   AFTER STATEMENT IS
+      v_key PLS_INTEGER;
+   BEGIN
+      -- post_id order (stable lock order)
+      v_key := g_posts.FIRST;
+      WHILE v_key IS NOT NULL LOOP
+         UPDATE posts
+            SET
+            version = version + 1
+          WHERE post_id = v_key;
+         v_key := g_posts.NEXT(v_key);
+      END LOOP;
+      g_posts.DELETE;
+   EXCEPTION
+      WHEN e_mutating THEN
+         -- Post is being deleted with its comments; ignore
+         g_posts.DELETE;
+   END AFTER STATEMENT;
+
+END trg_comments_version;
+/
+
+-- Trigger for POSTS (Home Feed Fan-out)
+-- Copies each new post into the USER_FEED of every subscriber, unless the
+-- subforum is in feed_on_read mode (too many subscribers to copy to).
+CREATE OR REPLACE TRIGGER trg_posts_feed AFTER
+   INSERT ON posts
+   FOR EACH ROW
+BEGIN
+   INSERT INTO user_feed (
+      user_id,
+      created_at,
+      post_id,
+      subforum_id
+   )
+      SELECT us.user_id,
+             :new.created_at,
+             :new.post_id,
+             :new.subforum_id
+        FROM user_subscriptions us
+        JOIN subforums s
+      ON s.subforum_id = us.subforum_id
+       WHERE us.subforum_id = :new.subforum_id
+         AND s.feed_on_read = 0;
+END;
+/
+
+-- Trigger for USER_SUBSCRIPTIONS (Subscriber Count + Feed Backfill)
+-- Keeps subforums.subscriber_count, switches a subforum to feed_on_read once
+-- it passes shareit_pkg.c_feed_fanout_limit (and leaves it there, so its
+-- posts never fall between the two modes), seeds a new subscriber's feed
+-- with recent posts and removes them again on unsubscribe.
+CREATE OR REPLACE TRIGGER trg_subscriptions_feed AFTER
+   INSERT OR DELETE ON user_subscriptions
    FOR EACH ROW
 DECLARE
-   v_author_id NUMBER;
+   e_mutating EXCEPTION;
+   PRAGMA exception_init ( e_mutating, -4091 );
+   v_feed_on_read NUMBER;
 BEGIN
    IF INSERTING THEN
-      SELECT user_id
-        INTO v_author_id
-        FROM posts
-       WHERE post_id = :new.post_id;
-      UPDATE users
-         SET
-         karma = karma + :new.vote_type
-       WHERE user_id = v_author_id;
-   ELSIF DELETING THEN
-      SELECT user_id
-        INTO v_author_id
-        FROM posts
-       WHERE post_id = :old.post_id;
-      UPDATE users
-         SET
-         karma = karma - :old.vote_type
-       WHERE user_id = v_author_id;
-   ELSIF UPDATING THEN
-      SELECT user_id
-        INTO v_author_id
-        FROM posts
-       WHERE post_id = :new.post_id;
-      UPDATE users
+      UPDATE subforums
+         SET subscriber_count = subscriber_count + 1,
+             feed_on_read =
+                CASE
+                   WHEN subscriber_count + 1 > shareit_pkg.c_feed_fanout_limit THEN
+                      1
+                   ELSE
+                      feed_on_read
+                END
+       WHERE subforum_id = :new.subforum_id
+      RETURNING feed_on_read INTO v_feed_on_read;
+
+      IF v_feed_on_read = 0 THEN
+         INSERT INTO user_feed (
+            user_id,
+            created_at,
+            post_id,
+            subforum_id
+         )
+            SELECT :new.user_id,
+                   p.created_at,
+                   p.post_id,
+                   p.subforum_id
+              FROM posts p
+             WHERE p.subforum_id = :new.subforum_id
+             ORDER BY p.created_at DESC,
+                      p.post_id DESC
+             FETCH FIRST shareit_pkg.c_feed_backfill ROWS ONLY;
+      END IF;
+   ELSE
+      UPDATE subforums
          SET
-         karma = karma - :old.vote_type + :new.vote_type
-       WHERE user_id = v_author_id;
+         subscriber_count = subscriber_count - 1
+       WHERE subforum_id = :old.subforum_id;
+
+      DELETE FROM user_feed
+       WHERE user_id = :old.user_id
+         AND subforum_id = :old.subforum_id;
    END IF;
 EXCEPTION
-   WHEN NO_DATA_FOUND THEN
-        -- Post might have been deleted, ignore
+   WHEN e_mutating THEN
+      -- User or subforum is being deleted; cascades clean up USER_FEED
       NULL;
 END;
 /
 
 -- Trigger for COMMENT_VOTES (Update User Karma)
--- Updates the karma of the *author* of the comment.
-CREATE OR REPLACE TRIGGER trg_comment_votes_karma AFTER
-   INSERT OR UPDATE OR DELETE ON comment_votes
+-- Updates the karma of the *author* of the comment, once per author per statement.
+CREATE OR REPLACE TRIGGER trg_comment_votes_karma
+   FOR INSERT OR UPDATE OR DELETE ON comment_votes
+COMPOUND TRIGGER
+
+   TYPE t_delta_tab IS
+      TABLE OF NUMBER INDEX BY PLS_INTEGER;
+
+   -- comment_id -> net vote change in this statement
+   g_comment_deltas t_delta_tab;
+
+   e_mutating EXCEPTION;
+   PRAGMA exception_init ( e_mutating, -4091 );
+
+   PROCEDURE add_delta (
+      p_key   IN NUMBER,
+      p_delta IN NUMBER
+   ) IS
+   BEGIN
+      IF g_comment_deltas.EXISTS(p_key) THEN
+         g_comment_deltas(p_key) := g_comment_deltas(p_key) + p_delta;
+      ELSE
+         g_comment_deltas(p_key) := p_delta;
+      END IF;
+   END add_delta;
+
+   AFTER EACH ROW IS
+   BEGIN
+      IF INSERTING THEN
+         add_delta(:new.comment_id, :new.vote_type);
+      ELSIF DELETING THEN
+         add_delta(:old.comment_id, - :old.vote_type);
+      ELSIF UPDATING THEN
+         add_delta(:old.comment_id, - :old.vote_type);
+         add_delta(:new.comment_id, :new.vote_type);
+      END IF;
+   END AFTER EACH ROW;
+
+   AFTER STATEMENT IS
+      v_karma      t_delta_tab;
+      v_author_ids t_delta_tab;
+      v_karma_vals t_delta_tab;
+      v_author_id  NUMBER;
+      v_key        PLS_INTEGER;
+      v_n          PLS_INTEGER := 0;
+   BEGIN
+      -- 1. One author lookup per distinct comment
+      v_key := g_comment_deltas.FIRST;
+      WHILE v_key IS NOT NULL LOOP
+         IF g_comment_deltas(v_key) <> 0 THEN
+            BEGIN
+               SELECT user_id
+                 INTO v_author_id
+                 FROM comments
+                WHERE comment_id = v_key;
+               IF v_karma.EXISTS(v_author_id) THEN
+                  v_karma(v_author_id) := v_karma(v_author_id) + g_comment_deltas(v_key);
+               ELSE
+                  v_karma(v_author_id) := g_comment_deltas(v_key);
+               END IF;
+            EXCEPTION
+               WHEN NO_DATA_FOUND THEN
+                  -- Comment might have been deleted, ignore
+                  NULL;
+            END;
+         END IF;
+         v_key := g_comment_deltas.NEXT(v_key);
+      END LOOP;
+      g_comment_deltas.DELETE;
+
+      -- 2. One UPDATE per author
+      v_key := v_karma.FIRST;
+      WHILE v_key IS NOT NULL LOOP
+         IF v_karma(v_key) <> 0 THEN
+            v_n := v_n + 1;
+            v_author_ids(v_n) := v_key;
+            v_karma_vals(v_n) := v_karma(v_key);
+         END IF;
+         v_key := v_karma.NEXT(v_key);
+      END LOOP;
+
+      FORALL i IN 1..v_n
+         UPDATE users
+            SET
+            karma = karma + v_karma_vals(i)
+          WHERE user_id = v_author_ids(i);
+   EXCEPTION
+      WHEN e_mutating THEN
+         -- Comment is being deleted; ignore
+         NULL;
+   END AFTER STATEMENT;
+
+END trg_comment_votes_karma;
+/
+
+-- Trigger for MESSAGES (Unread Counter)
+-- Keeps users.unread_messages in step with the receiver's unread rows, so the
+-- backend reads the badge count by primary key instead of counting the inbox.
+-- Compound like the vote triggers: a bulk "mark read" becomes one UPDATE per
+-- receiver.
+CREATE OR REPLACE TRIGGER trg_messages_unread
+   FOR INSERT OR UPDATE OF is_read, receiver_id OR DELETE ON messages
+COMPOUND TRIGGER
+
+   TYPE t_delta_tab IS
+      TABLE OF NUMBER INDEX BY PLS_INTEGER;
+
+   -- receiver_id -> change in unread messages in this statement
+   g_unread_deltas t_delta_tab;
+
+   -- Raised when the messages are being removed by ON DELETE CASCADE from USERS
+   e_mutating EXCEPTION;
+   PRAGMA exception_init ( e_mutating, -4091 );
+
+   PROCEDURE add_delta (
+      p_key   IN NUMBER,
+      p_delta IN NUMBER
+   ) IS
+   BEGIN
+      IF p_delta = 0 THEN
+         RETURN;
+      ELSIF g_unread_deltas.EXISTS(p_key) THEN
+         g_unread_deltas(p_key) := g_unread_deltas(p_key) + p_delta;
+      ELSE
+         g_unread_deltas(p_key) := p_delta;
+      END IF;
+   END add_delta;
+
+   AFTER EACH ROW IS
+   BEGIN
+      IF INSERTING THEN
+         add_delta(:new.receiver_id, 1 - :new.is_read);
+      ELSIF DELETING THEN
+         add_delta(:old.receiver_id, :old.is_read - 1);
+      ELSIF UPDATING THEN
+         add_delta(:old.receiver_id, :old.is_read - 1);
+         add_delta(:new.receiver_id, 1 - :new.is_read);
+      END IF;
+   END AFTER EACH ROW;
+
+   AFTER STATEMENT IS
+      v_user_ids t_delta_tab;
+      v_deltas   t_delta_tab;
+      v_key      PLS_INTEGER;
+      v_n        PLS_INTEGER := 0;
+   BEGIN
+      -- user_id order (stable lock order), receivers whose count moved
+      v_key := g_unread_deltas.FIRST;
+      WHILE v_key IS NOT NULL LOOP
+         IF g_unread_deltas(v_key) <> 0 THEN
+            v_n := v_n + 1;
+            v_user_ids(v_n) := v_key;
+            v_deltas(v_n) := g_unread_deltas(v_key);
+         END IF;
+         v_key := g_unread_deltas.NEXT(v_key);
+      END LOOP;
+      g_unread_deltas.DELETE;
+
+      FORALL i IN 1..v_n
+         UPDATE users
+            SET
+            unread_messages = unread_messages + v_deltas(i)
+          WHERE user_id = v_user_ids(i);
+   EXCEPTION
+      WHEN e_mutating THEN
+         -- The messages are being removed by the cascade of a USERS delete.
+         -- shareit_pkg.delete_user deletes a user's sent messages before the
+         -- user, so the only messages left to the cascade are the deleted
+         -- user's own inbox, whose counter goes with them. (A DELETE FROM
+         -- users outside delete_user leaves the receivers of that user's
+         -- unread messages over-counted until rebuild_derived_data.)
+         g_unread_deltas.DELETE;
+   END AFTER STATEMENT;
+
+END trg_messages_unread;
+/
+
+-- Trigger for REPORTS (Subforum)
+-- Copies the subforum of the reported post (or of the post the reported
+-- comment is on) into reports.subforum_id, so the moderation queue is read
+-- from idx_reports_queue without joining through posts and comments.
+CREATE OR REPLACE TRIGGER trg_reports_subforum BEFORE
+   INSERT OR UPDATE OF post_id, comment_id ON reports
    FOR EACH ROW
-DECLARE
-   v_author_id NUMBER;
 BEGIN
-   IF INSERTING THEN
-      SELECT user_id
-        INTO v_author_id
-        FROM comments
-       WHERE comment_id = :new.comment_id;
-      UPDATE users
-         SET
-         karma = karma + :new.vote_type
-       WHERE user_id = v_author_id;
-   ELSIF DELETING THEN
-      SELECT user_id
-        INTO v_author_id
-        FROM comments
-       WHERE comment_id = :old.comment_id;
-      UPDATE users
-         SET
-         karma = karma - :old.vote_type
-       WHERE user_id = v_author_id;
-   ELSIF UPDATING THEN
-      SELECT user_id
-        INTO v_author_id
-        FROM comments
-       WHERE comment_id = :new.comment_id;
-      UPDATE users
-         SET
-         karma = karma - :old.vote_type + :new.vote_type
-       WHERE user_id = v_author_id;
+   IF :new.post_id IS NOT NULL THEN
+      SELECT subforum_id
+        INTO :new.subforum_id
+        FROM posts
+       WHERE post_id = :new.post_id;
+   ELSE
+      SELECT p.subforum_id
+        INTO :new.subforum_id
+        FROM comments c
+        JOIN posts p
+      ON p.post_id = c.post_id
+       WHERE c.comment_id = :new.comment_id;
    END IF;
 EXCEPTION
    WHEN NO_DATA_FOUND THEN
-        -- Comment might have been deleted, ignore
-      NULL;
+      raise_application_error(
+         -20005,
+         'Reported post or comment not found'
+      );
+END;
+/
+
+-- Audit pipeline (background jobs)
+-- shareit_audit_drain: moves queued audit rows into TRANSACTION_LOGS.
+-- shareit_audit_purge: drops TRANSACTION_LOGS partitions past retention.
+-- shareit_text_optimize: compacts the Oracle Text search indexes.
+-- shareit_feed_trim: drops USER_FEED rows past shareit_pkg.c_feed_retention_days.
+-- Batch size and retention default to shareit_pkg.c_audit_drain_batch and
+-- shareit_pkg.c_audit_retention_days; pass arguments in job_action to override.
+BEGIN
+   FOR j IN (
+      SELECT job_name
+        FROM USER_SCHEDULER_JOBS
+       WHERE job_name IN ( 'SHAREIT_AUDIT_DRAIN',
+                           'SHAREIT_AUDIT_PURGE',
+                           'SHAREIT_TEXT_OPTIMIZE',
+                           'SHAREIT_FEED_TRIM' )
+   ) LOOP
+      dbms_scheduler.drop_job(
+         j.job_name,
+         force => TRUE
+      );
+   END LOOP;
+
+   dbms_scheduler.create_job(
+      job_name        => 'shareit_audit_drain',
+      job_type        => 'PLSQL_BLOCK',
+      job_action      => 'BEGIN shareit_pkg.drain_audit_queue; END;',
+      repeat_interval => 'FREQ=SECONDLY;INTERVAL=10',
+      enabled         => TRUE,
+      comments        => 'Drain TRANSACTION_LOG_QUEUE into TRANSACTION_LOGS'
+   );
+   dbms_scheduler.create_job(
+      job_name        => 'shareit_audit_purge',
+      job_type        => 'PLSQL_BLOCK',
+      job_action      => 'BEGIN shareit_pkg.purge_audit_logs; END;',
+      repeat_interval => 'FREQ=DAILY;BYHOUR=3',
+      enabled         => TRUE,
+      comments        => 'Apply TRANSACTION_LOGS retention policy'
+   );
+   -- SYNC (ON COMMIT) writes many small index fragments; merge them nightly
+   dbms_scheduler.create_job(
+      job_name        => 'shareit_text_optimize',
+      job_type        => 'PLSQL_BLOCK',
+      job_action      => 'BEGIN ctx_ddl.optimize_index(''idx_posts_text'', ''FULL''); '
+                         || 'ctx_ddl.optimize_index(''idx_comments_text'', ''FULL''); END;',
+      repeat_interval => 'FREQ=DAILY;BYHOUR=4',
+      enabled         => TRUE,
+      comments        => 'Optimize the full-text search indexes'
+   );
+   dbms_scheduler.create_job(
+      job_name        => 'shareit_feed_trim',
+      job_type        => 'PLSQL_BLOCK',
+      job_action      => 'BEGIN shareit_pkg.trim_user_feed; END;',
+      repeat_interval => 'FREQ=DAILY;BYHOUR=3;BYMINUTE=30',
+      enabled         => TRUE,
+      comments        => 'Trim materialized home feeds'
+   );
 END;
 /
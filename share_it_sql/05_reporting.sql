@@ -1,6 +1,8 @@
 -- 05_reporting.sql
 -- Reporting with Dynamic SQL (Requirement #8)
--- Procedures to generate reports based on dynamic criteria.
+-- Procedures to generate reports based on dynamic criteria, pipelined
+-- table functions returning the same reports as rows, and the
+-- SUBFORUM_STATS rollup.
 
 -- Report: Get posts filtered by upvotes and optionally by subforum
 CREATE OR REPLACE PROCEDURE get_filtered_posts (
@@ -88,3 +90,182 @@ EXCEPTION
       END IF;
 END get_user_report;
 /
+
+-- Pipelined versions of the two reports, for the backend's /api/reports
+-- endpoints (and SELECT ... FROM TABLE(...) anywhere else). Rows are read
+-- from the dynamic cursor with BULK COLLECT LIMIT and piped out batch by
+-- batch, so session memory stays flat however large the report is, and the
+-- client receives the first rows before the last ones have been read.
+
+CREATE OR REPLACE TYPE t_post_report_row FORCE AS OBJECT (
+      post_id       NUMBER,
+      title         VARCHAR2(300),
+      upvotes       NUMBER,
+      subforum_name VARCHAR2(50),
+      username      VARCHAR2(50),
+      created_at    DATE
+);
+/
+
+CREATE OR REPLACE TYPE t_post_report_tab FORCE AS
+   TABLE OF t_post_report_row;
+/
+
+CREATE OR REPLACE TYPE t_user_report_row FORCE AS OBJECT (
+      user_id  NUMBER,
+      username VARCHAR2(50),
+      karma    NUMBER
+);
+/
+
+CREATE OR REPLACE TYPE t_user_report_tab FORCE AS
+   TABLE OF t_user_report_row;
+/
+
+-- Report: posts with at least p_min_upvotes, optionally in one subforum,
+-- most upvoted first (the order of idx_posts_top / idx_posts_subforum_top,
+-- so no sort is needed before the first row comes out)
+CREATE OR REPLACE FUNCTION report_filtered_posts (
+   p_min_upvotes   IN NUMBER DEFAULT 0,
+   p_subforum_name IN VARCHAR2 DEFAULT NULL
+) RETURN t_post_report_tab
+   PIPELINED
+IS
+   c_fetch_limit CONSTANT PLS_INTEGER := 1000;
+   TYPE t_rows IS
+      TABLE OF t_post_report_row;
+   v_rows   t_rows;
+   v_sql    VARCHAR2(2000);
+   v_cursor SYS_REFCURSOR;
+BEGIN
+   v_sql := 'SELECT t_post_report_row(p.post_id, p.title, p.upvotes, s.name, u.username, p.created_at) '
+            || 'FROM POSTS p '
+            || 'JOIN SUBFORUMS s ON p.subforum_id = s.subforum_id '
+            || 'JOIN USERS u ON p.user_id = u.user_id '
+            || 'WHERE p.upvotes >= :1';
+
+   IF p_subforum_name IS NOT NULL THEN
+      v_sql := v_sql || ' AND s.name = :2 ORDER BY p.upvotes DESC, p.post_id DESC';
+      OPEN v_cursor FOR v_sql
+         USING p_min_upvotes,p_subforum_name;
+   ELSE
+      v_sql := v_sql || ' ORDER BY p.upvotes DESC, p.post_id DESC';
+      OPEN v_cursor FOR v_sql
+         USING p_min_upvotes;
+   END IF;
+
+   LOOP
+      FETCH v_cursor
+      BULK COLLECT INTO v_rows
+      LIMIT c_fetch_limit;
+      FOR i IN 1..v_rows.COUNT LOOP
+         PIPE ROW ( v_rows(i) );
+      END LOOP;
+      EXIT WHEN v_rows.COUNT < c_fetch_limit;
+   END LOOP;
+   CLOSE v_cursor;
+   RETURN;
+EXCEPTION
+   WHEN NO_DATA_NEEDED THEN
+      -- The consumer stopped reading (e.g. a cancelled download)
+      IF v_cursor%ISOPEN THEN
+         CLOSE v_cursor;
+      END IF;
+      RAISE;
+   WHEN OTHERS THEN
+      IF v_cursor%ISOPEN THEN
+         CLOSE v_cursor;
+      END IF;
+      RAISE;
+END report_filtered_posts;
+/
+
+-- Report: users with at least p_min_karma, highest karma first
+CREATE OR REPLACE FUNCTION report_user_karma (
+   p_min_karma IN NUMBER DEFAULT 0
+) RETURN t_user_report_tab
+   PIPELINED
+IS
+   c_fetch_limit CONSTANT PLS_INTEGER := 1000;
+   TYPE t_rows IS
+      TABLE OF t_user_report_row;
+   v_rows   t_rows;
+   v_sql    VARCHAR2(1000);
+   v_cursor SYS_REFCURSOR;
+BEGIN
+   v_sql := 'SELECT t_user_report_row(user_id, username, karma) '
+            || 'FROM USERS WHERE karma >= :1 ORDER BY karma DESC, user_id';
+   OPEN v_cursor FOR v_sql
+      USING p_min_karma;
+
+   LOOP
+      FETCH v_cursor
+      BULK COLLECT INTO v_rows
+      LIMIT c_fetch_limit;
+      FOR i IN 1..v_rows.COUNT LOOP
+         PIPE ROW ( v_rows(i) );
+      END LOOP;
+      EXIT WHEN v_rows.COUNT < c_fetch_limit;
+   END LOOP;
+   CLOSE v_cursor;
+   RETURN;
+EXCEPTION
+   WHEN NO_DATA_NEEDED THEN
+      IF v_cursor%ISOPEN THEN
+         CLOSE v_cursor;
+      END IF;
+      RAISE;
+   WHEN OTHERS THEN
+      IF v_cursor%ISOPEN THEN
+         CLOSE v_cursor;
+      END IF;
+      RAISE;
+END report_user_karma;
+/
+
+-- Subforum statistics rollup (GET /api/subforums)
+-- Post count and vote total per subforum, kept in a materialized view instead
+-- of a GROUP BY over POSTS per request. The MV log records changed POSTS rows
+-- and the shareit_stats_refresh job folds them in every minute (fast
+-- refresh: only the logged rows are read), so writes pay one log insert and
+-- readers see figures at most a minute old. COUNT(upvotes) is what makes
+-- SUM(upvotes) fast-refreshable after updates and deletes.
+-- Subscriber counts and the newest post are kept on SUBFORUMS by triggers.
+CREATE MATERIALIZED VIEW LOG ON posts
+   WITH ROWID, SEQUENCE ( subforum_id,
+                          upvotes )
+   INCLUDING NEW VALUES;
+
+CREATE MATERIALIZED VIEW subforum_stats
+   BUILD IMMEDIATE
+   REFRESH FAST ON DEMAND
+AS
+   SELECT subforum_id,
+          COUNT(*) AS post_count,
+          SUM(upvotes) AS total_upvotes,
+          COUNT(upvotes) AS upvotes_count
+     FROM posts
+    GROUP BY subforum_id;
+
+BEGIN
+   FOR j IN (
+      SELECT job_name
+        FROM USER_SCHEDULER_JOBS
+       WHERE job_name = 'SHAREIT_STATS_REFRESH'
+   ) LOOP
+      dbms_scheduler.drop_job(
+         j.job_name,
+         force => TRUE
+      );
+   END LOOP;
+
+   dbms_scheduler.create_job(
+      job_name        => 'shareit_stats_refresh',
+      job_type        => 'PLSQL_BLOCK',
+      job_action      => 'BEGIN shareit_pkg.refresh_subforum_stats; END;',
+      repeat_interval => 'FREQ=MINUTELY;INTERVAL=1',
+      enabled         => TRUE,
+      comments        => 'Fast refresh of the SUBFORUM_STATS materialized view'
+   );
+END;
+/
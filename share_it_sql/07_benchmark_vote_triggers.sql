@@ -0,0 +1,222 @@
+-- 07_benchmark_vote_triggers.sql
+-- Benchmark: bulk vote insert throughput with the row-level vote triggers
+-- (as they were before 04_triggers.sql switched to compound triggers) versus
+-- the current statement-level trg_post_votes_aggregate.
+-- Not part of run_all.sql; run manually against a built schema:
+--    @07_benchmark_vote_triggers.sql
+-- Each load is rolled back, and the scratch data is removed at the end.
+
+SET SERVEROUTPUT ON;
+
+-- 1. Row-level triggers (pre-compound versions), created DISABLED
+
+-- Upvotes count, one UPDATE on POSTS per vote row
+CREATE OR REPLACE TRIGGER trg_bench_row_count AFTER
+   INSERT OR UPDATE OR DELETE ON post_votes
+   FOR EACH ROW
+   DISABLE
+BEGIN
+   IF INSERTING THEN
+        -- New vote: Add vote_type (1 or -1) to total
+      UPDATE posts
+         SET
+         upvotes = upvotes + :new.vote_type
+       WHERE post_id = :new.post_id;
+   ELSIF DELETING THEN
+        -- Removed vote: Subtract vote_type (1 becomes -1, -1 becomes +1)
+      UPDATE posts
+         SET
+         upvotes = upvotes - :old.vote_type
+       WHERE post_id = :old.post_id;
+   ELSIF UPDATING THEN
+        -- Changed vote: Subtract old, add new
+      UPDATE posts
+         SET
+         upvotes = upvotes - :old.vote_type + :new.vote_type
+       WHERE post_id = :new.post_id;
+   END IF;
+END;
+/
+
+-- Author karma, one SELECT + UPDATE on USERS per vote row
+CREATE OR REPLACE TRIGGER trg_bench_row_karma AFTER
+   INSERT OR UPDATE OR DELETE ON post_votes
+   FOR EACH ROW
+   DISABLE
+DECLARE
+   v_author_id NUMBER;
+BEGIN
+   IF INSERTING THEN
+      SELECT user_id
+        INTO v_author_id
+        FROM posts
+       WHERE post_id = :new.post_id;
+      UPDATE users
+         SET
+         karma = karma + :new.vote_type
+       WHERE user_id = v_author_id;
+   ELSIF DELETING THEN
+      SELECT user_id
+        INTO v_author_id
+        FROM posts
+       WHERE post_id = :old.post_id;
+      UPDATE users
+         SET
+         karma = karma - :old.vote_type
+       WHERE user_id = v_author_id;
+   ELSIF UPDATING THEN
+      SELECT user_id
+        INTO v_author_id
+        FROM posts
+       WHERE post_id = :new.post_id;
+      UPDATE users
+         SET
+         karma = karma - :old.vote_type + :new.vote_type
+       WHERE user_id = v_author_id;
+   END IF;
+EXCEPTION
+   WHEN NO_DATA_FOUND THEN
+        -- Post might have been deleted, ignore
+      NULL;
+END;
+/
+
+-- 2. Scratch data: c_users voters, each voting on all c_posts posts.
+--    Few posts and one author concentrate the updates on hot rows, which is
+--    the case the compound trigger is meant to help.
+DECLARE
+   c_users CONSTANT PLS_INTEGER := 500;
+   c_posts CONSTANT PLS_INTEGER := 40;
+   v_author_id   NUMBER;
+   v_subforum_id NUMBER;
+BEGIN
+   FOR i IN 1..c_users LOOP
+      INSERT INTO users (
+         user_id,
+         username,
+         email,
+         password_hash
+      ) VALUES ( seq_users_id.nextval,
+                 'bench_user_' || i,
+                 'bench_user_' || i || '@bench.local',
+                 'x' );
+   END LOOP;
+
+   SELECT user_id
+     INTO v_author_id
+     FROM users
+    WHERE username = 'bench_user_1';
+
+   v_subforum_id := seq_subforums_id.nextval;
+   INSERT INTO subforums (
+      subforum_id,
+      name,
+      description,
+      creator_id
+   ) VALUES ( v_subforum_id,
+              'bench_votes',
+              'Scratch subforum for 07_benchmark_vote_triggers.sql',
+              v_author_id );
+
+   FOR i IN 1..c_posts LOOP
+      INSERT INTO posts (
+         post_id,
+         user_id,
+         subforum_id,
+         title,
+         content_text
+      ) VALUES ( seq_posts_id.nextval,
+                 v_author_id,
+                 v_subforum_id,
+                 'bench post ' || i,
+                 'bench' );
+   END LOOP;
+   COMMIT;
+END;
+/
+
+-- 3. Run the same multi-row INSERT under each trigger set
+DECLARE
+   PROCEDURE set_triggers (
+      p_row_level IN BOOLEAN
+   ) IS
+      v_row      VARCHAR2(10) := CASE WHEN p_row_level THEN 'ENABLE' ELSE 'DISABLE' END;
+      v_compound VARCHAR2(10) := CASE WHEN p_row_level THEN 'DISABLE' ELSE 'ENABLE' END;
+   BEGIN
+      EXECUTE IMMEDIATE 'ALTER TRIGGER trg_bench_row_count ' || v_row;
+      EXECUTE IMMEDIATE 'ALTER TRIGGER trg_bench_row_karma ' || v_row;
+      EXECUTE IMMEDIATE 'ALTER TRIGGER trg_post_votes_aggregate ' || v_compound;
+   END set_triggers;
+
+   PROCEDURE run_load (
+      p_label IN VARCHAR2
+   ) IS
+      v_start   NUMBER;
+      v_elapsed NUMBER;
+      v_rows    NUMBER;
+      v_upvotes NUMBER;
+      v_karma   NUMBER;
+   BEGIN
+      v_start := dbms_utility.get_time;
+
+      INSERT INTO post_votes (
+         user_id,
+         post_id,
+         vote_type
+      )
+         SELECT u.user_id,
+                p.post_id,
+                CASE WHEN MOD(u.user_id + p.post_id, 4) = 0 THEN -1 ELSE 1 END
+           FROM users u
+          CROSS JOIN posts p
+          WHERE u.username LIKE 'bench\_user\_%' ESCAPE '\'
+            AND p.subforum_id = (
+            SELECT subforum_id
+              FROM subforums
+             WHERE name = 'bench_votes'
+         );
+      v_rows := SQL%ROWCOUNT;
+      v_elapsed := greatest(dbms_utility.get_time - v_start, 1) / 100;
+
+      -- Both trigger sets must leave the same totals behind
+      SELECT SUM(p.upvotes)
+        INTO v_upvotes
+        FROM posts p
+        JOIN subforums s ON p.subforum_id = s.subforum_id
+       WHERE s.name = 'bench_votes';
+      SELECT karma
+        INTO v_karma
+        FROM users
+       WHERE username = 'bench_user_1';
+
+      dbms_output.put_line(RPAD(p_label, 12)
+                           || ' | Rows: ' || v_rows
+                           || ' | Seconds: ' || TO_CHAR(v_elapsed, 'FM9990.00')
+                           || ' | Rows/sec: ' || ROUND(v_rows / v_elapsed)
+                           || ' | Upvotes: ' || v_upvotes
+                           || ' | Author karma: ' || v_karma);
+      ROLLBACK;
+   END run_load;
+BEGIN
+   dbms_output.put_line('--- Bulk vote insert: row-level vs compound triggers ---');
+   set_triggers(TRUE);
+   run_load('Row-level');
+   set_triggers(FALSE);
+   run_load('Compound');
+EXCEPTION
+   WHEN OTHERS THEN
+      dbms_output.put_line('Error in vote trigger benchmark: ' || sqlerrm);
+      ROLLBACK;
+      set_triggers(FALSE);
+END;
+/
+
+-- 4. Cleanup (deleting the subforum cascades to its posts)
+DROP TRIGGER trg_bench_row_count;
+DROP TRIGGER trg_bench_row_karma;
+
+DELETE FROM subforums
+ WHERE name = 'bench_votes';
+DELETE FROM users
+ WHERE username LIKE 'bench\_user\_%' ESCAPE '\';
+COMMIT;
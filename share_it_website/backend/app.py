@@ -1,10 +1,14 @@
 from flask import Flask
 from flask_cors import CORS
 from config import Config
+import metrics
+import compression
 
 app = Flask(__name__)
 app.config.from_object(Config)
-CORS(app) # Enable CORS for frontend
+CORS(app, expose_headers=["X-Next-Cursor", "ETag"]) # Enable CORS for frontend
+metrics.init_app(app) # Request timing for /api/metrics
+compression.init_app(app) # gzip/brotli for large JSON bodies
 
 from routes import *
 
@@ -0,0 +1,231 @@
+import asyncio
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, Response, request, jsonify
+from werkzeug.exceptions import HTTPException
+from config import Config
+from app import app as flask_app
+from async_db import open_async_pool, close_async_pool, fetch_all, fetch_one
+from cache import subforum_id_cache, post_detail_cache
+from compression import negotiate, encode
+from http_cache import make_etag, matching_etag, not_modified
+from json_provider import FastJSONProvider
+from live_updates import live_updates, parse_post_ids, format_event
+from pagination import decode_cursor, parse_limit, parse_preview_length
+from queries import (SUBFORUM_ID_QUERY, FEED_VERSION_QUERY, SUBFORUM_VERSION_QUERY, POST_VERSION_QUERY,
+                     POST_DETAIL_QUERY, COMMENTS_QUERY, FEED_COLUMNS, FEED_PREVIEW_COLUMNS, POST_DETAIL_COLUMNS,
+                     COMMENTS_COLUMNS, build_feed_query)
+from results import parse_format, split_page, list_body
+from ranking import SORT_COLUMNS, SORT_KEY_TYPES, WINDOW_DAYS
+from vote_buffer import apply_pending_votes, pending_votes_key
+
+# Async serving mode (production entry point):
+#     uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 4
+#
+# The read-heavy routes below run on asyncio with the oracledb async pool, so
+# a request waiting on Oracle does not hold a thread. Every other route (and
+# everything in mock mode) is passed through to the Flask app in routes.py.
+
+async_app = Quart(__name__)
+async_app.config.from_object(Config)
+async_app.json = FastJSONProvider(async_app)
+
+
+@async_app.before_serving
+async def startup():
+    if not Config.USE_MOCK_DB:
+        open_async_pool()
+
+
+@async_app.after_serving
+async def shutdown():
+    await close_async_pool()
+
+
+@async_app.after_request
+async def add_cors_headers(response):
+    # Mirrors flask_cors in app.py for the routes served here
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Expose-Headers'] = 'X-Next-Cursor, ETag'
+    return response
+
+
+@async_app.after_request
+async def compress_response(response):
+    # Same negotiation as compression.py does for the Flask routes
+    coding = negotiate(response, request.accept_encodings)
+    if coding:
+        encode(response, coding, await response.get_data())
+    return response
+
+
+@async_app.route('/api/posts', methods=['GET'])
+async def get_posts():
+    subforum_name = request.args.get('subforum_name')
+    current_user_id = request.args.get('current_user_id')
+    sort = request.args.get('sort', 'new')
+    window = request.args.get('window', 'all')
+
+    if sort not in SORT_COLUMNS:
+        return jsonify({"error": f"Invalid sort: {sort}"}), 400
+    if window not in WINDOW_DAYS:
+        return jsonify({"error": f"Invalid window: {window}"}), 400
+    sort_col, sort_key = SORT_COLUMNS[sort]
+
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor'], SORT_KEY_TYPES[sort], int) if request.args.get('cursor') else None
+        preview_len = parse_preview_length(request.args.get('preview'))
+        fmt = parse_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        subforum_id = None
+        if subforum_name:
+            subforum_id = subforum_id_cache.get(subforum_name)
+            if subforum_id is None:
+                row = await fetch_one(SUBFORUM_ID_QUERY, [subforum_name])
+                if not row:
+                    return jsonify({"error": "Subforum not found"}), 404
+                subforum_id = row[0]
+                subforum_id_cache.set(subforum_name, subforum_id)
+
+        # Conditional GET, as in routes.get_posts
+        etag = None
+        if not WINDOW_DAYS[window]:
+            if subforum_id is None:
+                version = tuple(await fetch_one(FEED_VERSION_QUERY, []))
+            else:
+                row = await fetch_one(SUBFORUM_VERSION_QUERY, [subforum_id])
+                version = row[0] if row else None
+            etag = make_etag('posts', request.full_path, version, pending_votes_key(current_user_id))
+            matched = matching_etag(request.if_none_match, etag)
+            if matched:
+                return not_modified(Response, matched)
+
+        query, params = build_feed_query(current_user_id, sort_col, limit, subforum_id=subforum_id,
+                                         window_days=WINDOW_DAYS[window], after=after, preview_len=preview_len)
+        columns = FEED_PREVIEW_COLUMNS if preview_len else FEED_COLUMNS
+        rows = await fetch_all(query, params, columns if fmt == 'rows' else None, rows=limit + 1,
+                               fetch_lobs=False)
+        posts, next_cursor = split_page(rows, columns, fmt, limit, (sort_key, 'POST_ID'))
+
+        apply_pending_votes(posts, current_user_id, columns if fmt == 'columns' else None)
+        response = jsonify(list_body(posts, columns, fmt))
+        if etag:
+            response.set_etag(etag)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except Exception as e:
+        async_app.logger.exception("Error fetching posts")
+        return jsonify({"error": str(e)}), 500
+
+
+@async_app.route('/api/posts/<int:post_id>', methods=['GET'])
+async def get_post_details(post_id):
+    current_user_id = request.args.get('current_user_id')
+
+    if not current_user_id:
+        cached = post_detail_cache.get(post_id)
+        if cached is not None:
+            etag, payload = cached
+            matched = matching_etag(request.if_none_match, etag)
+            if matched:
+                return not_modified(Response, matched)
+            response = jsonify(payload)
+            response.set_etag(etag)
+            return response, 200
+
+    try:
+        pending = pending_votes_key(current_user_id)
+        if request.if_none_match:
+            row = await fetch_one(POST_VERSION_QUERY, [post_id])
+            if row:
+                matched = matching_etag(request.if_none_match,
+                                        make_etag('post', post_id, row[0], current_user_id, pending))
+                if matched:
+                    return not_modified(Response, matched)
+
+        safe_user_id = int(current_user_id) if current_user_id else -1
+        # Post and comments are independent, so run them at the same time on
+        # two pooled connections instead of one after the other.
+        post, comments = await asyncio.gather(
+            fetch_one(POST_DETAIL_QUERY, [safe_user_id, post_id], POST_DETAIL_COLUMNS, fetch_lobs=False),
+            fetch_all(COMMENTS_QUERY, [post_id], COMMENTS_COLUMNS)
+        )
+        if not post:
+            return jsonify({"error": "Post not found"}), 404
+
+        etag = make_etag('post', post_id, post.pop('VERSION'), current_user_id, pending)
+        payload = {"post": post, "comments": comments}
+        if not current_user_id:
+            post_detail_cache.set(post_id, (etag, payload))
+        else:
+            apply_pending_votes([post], current_user_id)
+        response = jsonify(payload)
+        response.set_etag(etag)
+        return response, 200
+    except Exception as e:
+        async_app.logger.exception("Error fetching post details")
+        return jsonify({"error": str(e)}), 500
+
+
+@async_app.route('/api/live', methods=['GET'])
+async def live_stream():
+    # Same stream as routes.live_stream, but a waiting client costs a
+    # coroutine instead of a worker thread. The hub notifies from its own
+    # thread, hence call_soon_threadsafe.
+    try:
+        post_ids = parse_post_ids(request.args.get('posts'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    sub = live_updates.subscribe(post_ids, lambda: loop.call_soon_threadsafe(wakeup.set))
+    if sub is None:
+        return jsonify({"error": "Too many live streams, try again later"}), 503
+    dumps = async_app.json.dumps_bytes
+
+    async def stream():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), Config.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                wakeup.clear()
+                for update in sub.drain():
+                    yield format_event(update, dumps)
+        finally:
+            live_updates.unsubscribe(sub)
+
+    response = Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.timeout = None  # open until the client leaves
+    return response
+
+
+_flask_asgi = WsgiToAsgi(flask_app)
+_async_routes = async_app.url_map.bind('localhost')
+
+
+def _served_async(scope):
+    if Config.USE_MOCK_DB:
+        return False
+    try:
+        _async_routes.match(scope['path'], method=scope['method'])
+        return True
+    except HTTPException:
+        return False
+
+
+async def application(scope, receive, send):
+    # Lifespan events go to Quart (opens/closes the async pool)
+    if scope['type'] == 'lifespan' or (scope['type'] == 'http' and _served_async(scope)):
+        await async_app(scope, receive, send)
+    else:
+        await _flask_asgi(scope, receive, send)
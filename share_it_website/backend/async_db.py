@@ -0,0 +1,61 @@
+import oracledb
+from config import Config
+from results import tune, map_rows
+
+# asyncio connection pool for the async serving mode (asgi.py).
+# Same sizing knobs as the threaded pool in db.py.
+
+_pool = None
+
+
+def open_async_pool():
+    global _pool
+    if _pool is None:
+        _pool = oracledb.create_pool_async(
+            user=Config.ORACLE_USER,
+            password=Config.ORACLE_PASSWORD,
+            dsn=Config.ORACLE_DSN,
+            min=Config.ORACLE_POOL_MIN,
+            max=Config.ORACLE_POOL_MAX,
+            increment=Config.ORACLE_POOL_INCREMENT,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=Config.ORACLE_POOL_WAIT_TIMEOUT,
+            ping_interval=Config.ORACLE_POOL_PING_INTERVAL,
+            timeout=Config.ORACLE_POOL_IDLE_TIMEOUT
+        )
+    return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def get_async_connection():
+    # Use as: async with get_async_connection() as conn: ...
+    return open_async_pool().acquire()
+
+
+async def fetch_all(query, params=None, columns=None, rows=None, **kwargs):
+    # columns: rows come back as dicts (results.map_rows); rows: how many to
+    # expect, when it is known (results.tune)
+    async with get_async_connection() as conn:
+        with conn.cursor() as cursor:
+            if rows is not None:
+                tune(cursor, rows)
+            await cursor.execute(query, params, **kwargs)
+            if columns is not None:
+                map_rows(cursor, columns)
+            return await cursor.fetchall()
+
+
+async def fetch_one(query, params=None, columns=None, **kwargs):
+    async with get_async_connection() as conn:
+        with conn.cursor() as cursor:
+            tune(cursor, 1)
+            await cursor.execute(query, params, **kwargs)
+            if columns is not None:
+                map_rows(cursor, columns)
+            return await cursor.fetchone()
@@ -0,0 +1,308 @@
+# Synthetic dataset generator and bulk loader for scale testing.
+#
+# Generates a skewed, production-shaped dataset:
+#   - subforum sizes (subscribers and posts) follow a power law,
+#   - a few users write most of the posts and comments,
+#   - votes and comments concentrate on a few popular posts,
+#   - comment threads reply to the latest comment often enough to build
+#     long chains, so tree depths have a long tail.
+# The same --seed always produces the same rows.
+#
+# Loading into Oracle (ORACLE_* env vars, see config.py):
+#     cd share_it_website/backend
+#     python -m benchmarks.dataset --posts 1000000 --comments 3000000 --votes 6000000
+#
+# Rows go in with array DML (executemany, --batch-size rows per round-trip)
+# and INSERT /*+ APPEND_VALUES */ direct-path writes. Triggers and foreign
+# keys on the loaded tables are disabled for the load (Oracle silently falls
+# back to conventional inserts otherwise) and re-enabled afterwards; then
+# shareit_pkg.rebuild_derived_data recomputes the trigger-maintained columns
+# and the sequences are moved past the loaded ids. Existing rows are kept:
+# generated ids start after the current maximum of each table.
+#
+# load_mock() fills the in-process MockDB instead (users, subforums, posts
+# and subscriptions), for benchmarks that run without a database; --mock
+# only generates the rows and reports generation speed.
+
+import argparse
+import datetime
+import itertools
+import random
+import time
+
+import bcrypt
+import oracledb
+
+from config import Config
+
+WORDS = ("oracle query index table join cursor commit rollback schema trigger "
+         "package sequence partition python flask react vote karma post thread "
+         "reply meme news question answer bug fix release deploy cache latency "
+         "benchmark cloud server client async pool lock deadlock plan optimizer "
+         "hint scan sort hash merge nested loop row column view").split()
+
+# Password for every generated user ("password"), hashed once at the lowest
+# bcrypt cost; login rehashes it to BCRYPT_ROUNDS on first use.
+PASSWORD_HASH = bcrypt.hashpw(b"password", bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def zipf_cum_weights(n, exponent):
+    # Cumulative weights for random.choices: rank r is picked with
+    # probability proportional to 1 / r^exponent.
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+class Dataset:
+    def __init__(self, users, subforums, posts, comments, votes, subscriptions_per_user,
+                 days=365, skew=1.1, seed=42, id_offsets=None):
+        self.n_users = users
+        self.n_subforums = subforums
+        self.n_posts = posts
+        self.n_comments = comments
+        self.n_votes = votes
+        self.subscriptions_per_user = subscriptions_per_user
+        self.skew = skew
+        self.seed = seed
+        self.offsets = {"users": 0, "subforums": 0, "posts": 0, "comments": 0, **(id_offsets or {})}
+        self.now = datetime.datetime.now().replace(microsecond=0)
+        self.start = self.now - datetime.timedelta(days=days)
+
+        rng = random.Random(seed)
+        # Popularity ranks are shuffled so the popular rows are spread across
+        # the id range instead of being the first few ids.
+        self.user_rank = self._ranked(rng, users)
+        self.subforum_rank = self._ranked(rng, subforums)
+        self.user_weights = zipf_cum_weights(users, skew)
+        self.subforum_weights = zipf_cum_weights(subforums, skew)
+
+        # Post placement is needed by several tables, so it is fixed up front.
+        self.post_subforum = rng.choices(self.subforum_rank, cum_weights=self.subforum_weights, k=posts)
+        self.post_user = rng.choices(self.user_rank, cum_weights=self.user_weights, k=posts)
+        span = (self.now - self.start).total_seconds()
+        self.post_created = [self.start + datetime.timedelta(seconds=span * i / max(posts, 1))
+                             for i in range(posts)]
+        self.post_rank = self._ranked(rng, posts)
+        self.post_weights = zipf_cum_weights(posts, skew)
+
+    @staticmethod
+    def _ranked(rng, n):
+        ids = list(range(n))
+        rng.shuffle(ids)
+        return ids
+
+    def user_id(self, i):
+        return self.offsets["users"] + i + 1
+
+    def subforum_id(self, i):
+        return self.offsets["subforums"] + i + 1
+
+    def post_id(self, i):
+        return self.offsets["posts"] + i + 1
+
+    def comment_id(self, i):
+        return self.offsets["comments"] + i + 1
+
+    def _text(self, rng, mean_words, max_chars):
+        n = max(1, int(rng.lognormvariate(0, 0.8) * mean_words))
+        return " ".join(rng.choices(WORDS, k=n))[:max_chars]
+
+    # Each generator yields tuples in the column order of LOAD_ORDER below.
+
+    def users(self):
+        rng = random.Random(self.seed + 1)
+        for i in range(self.n_users):
+            uid = self.user_id(i)
+            created = self.start + datetime.timedelta(seconds=rng.random() * 86400 * 30)
+            yield (uid, f"gen_user{uid}", f"gen_user{uid}@example.com", PASSWORD_HASH, 0, created)
+
+    def subforums(self):
+        rng = random.Random(self.seed + 2)
+        for i in range(self.n_subforums):
+            sid = self.subforum_id(i)
+            creator = self.user_id(rng.randrange(self.n_users))
+            yield (sid, f"gen_sub{sid}", self._text(rng, 8, 500), self.start, creator)
+
+    def subscriptions(self):
+        rng = random.Random(self.seed + 3)
+        for i in range(self.n_users):
+            # Most users follow a handful of subforums, a few follow hundreds
+            k = min(self.n_subforums, int(rng.paretovariate(1.5) * self.subscriptions_per_user / 3))
+            chosen = set()
+            while len(chosen) < k:
+                chosen.update(rng.choices(self.subforum_rank, cum_weights=self.subforum_weights, k=k - len(chosen)))
+            for s in sorted(chosen):
+                yield (self.user_id(i), self.subforum_id(s), self.start)
+
+    def posts(self):
+        rng = random.Random(self.seed + 4)
+        for i in range(self.n_posts):
+            yield (self.post_id(i), self.user_id(self.post_user[i]), self.subforum_id(self.post_subforum[i]),
+                   self._text(rng, 8, 300), self._text(rng, 60, 4000), 0, self.post_created[i])
+
+    def comments(self):
+        rng = random.Random(self.seed + 5)
+        threads = {}  # post index -> [(comment_id, created_at)]
+        batch = 10000
+        for start in range(0, self.n_comments, batch):
+            count = min(batch, self.n_comments - start)
+            on_posts = rng.choices(self.post_rank, cum_weights=self.post_weights, k=count)
+            authors = rng.choices(self.user_rank, cum_weights=self.user_weights, k=count)
+            for j in range(count):
+                p = on_posts[j]
+                thread = threads.setdefault(p, [])
+                parent_id, after = None, self.post_created[p]
+                if thread and rng.random() < 0.7:
+                    # Replying to the newest comment grows chains; replying to
+                    # a random one grows breadth.
+                    parent_id, after = thread[-1] if rng.random() < 0.5 else rng.choice(thread)
+                created = min(self.now, after + datetime.timedelta(seconds=int(rng.expovariate(1 / 3600))))
+                cid = self.comment_id(start + j)
+                thread.append((cid, created))
+                yield (cid, self.post_id(p), self.user_id(authors[j]), parent_id,
+                       self._text(rng, 20, 2000), created)
+
+    def post_votes(self):
+        rng = random.Random(self.seed + 6)
+        total_weight = self.post_weights[-1] if self.post_weights else 1
+        previous = 0.0
+        for rank, cum in enumerate(self.post_weights):
+            # Expected share of the votes for this popularity rank, with
+            # stochastic rounding so small shares still get some votes.
+            expected = self.n_votes * (cum - previous) / total_weight
+            previous = cum
+            k = min(self.n_users, int(expected) + (rng.random() < expected % 1))
+            if not k:
+                continue
+            post_id = self.post_id(self.post_rank[rank])
+            for u in rng.sample(range(self.n_users), k):
+                yield (self.user_id(u), post_id, 1 if rng.random() < 0.8 else -1)
+
+
+# (table, columns, generator method), in foreign key order
+LOAD_ORDER = [
+    ("users", "user_id, username, email, password_hash, karma, created_at", "users"),
+    ("subforums", "subforum_id, name, description, created_at, creator_id", "subforums"),
+    ("user_subscriptions", "user_id, subforum_id, joined_at", "subscriptions"),
+    ("posts", "post_id, user_id, subforum_id, title, content_text, upvotes, created_at", "posts"),
+    ("comments", "comment_id, post_id, user_id, parent_comment_id, content, created_at", "comments"),
+    ("post_votes", "user_id, post_id, vote_type", "post_votes"),
+]
+
+# table -> (id column, sequence) for tables keyed by a sequence
+SEQUENCES = {"users": ("user_id", "seq_users_id"), "subforums": ("subforum_id", "seq_subforums_id"),
+             "posts": ("post_id", "seq_posts_id"), "comments": ("comment_id", "seq_comments_id")}
+
+
+def current_max_ids(cursor):
+    offsets = {}
+    for table, (id_col, _) in SEQUENCES.items():
+        cursor.execute(f"SELECT NVL(MAX({id_col}), 0) FROM {table}")
+        offsets[table] = cursor.fetchone()[0]
+    return offsets
+
+
+def set_constraints(cursor, tables, enable):
+    # Foreign keys of the loaded tables (direct-path needs them off)
+    names = ", ".join(f"'{t.upper()}'" for t in tables)
+    cursor.execute(f"""
+        SELECT table_name, constraint_name FROM user_constraints
+        WHERE constraint_type = 'R' AND table_name IN ({names})
+    """)
+    for table, constraint in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {table} {'ENABLE' if enable else 'DISABLE'} CONSTRAINT {constraint}")
+
+
+def set_triggers(cursor, tables, enable):
+    for table in tables:
+        cursor.execute(f"ALTER TABLE {table} {'ENABLE' if enable else 'DISABLE'} ALL TRIGGERS")
+
+
+def load_oracle(args):
+    conn = oracledb.connect(user=Config.ORACLE_USER, password=Config.ORACLE_PASSWORD, dsn=Config.ORACLE_DSN)
+    cursor = conn.cursor()
+    dataset = make_dataset(args, id_offsets=current_max_ids(cursor))
+    tables = [t for t, _, _ in LOAD_ORDER]
+
+    set_triggers(cursor, tables, False)
+    set_constraints(cursor, tables, False)
+    try:
+        for table, columns, method in LOAD_ORDER:
+            binds = ", ".join(f":{i + 1}" for i in range(len(columns.split(","))))
+            sql = f"INSERT /*+ APPEND_VALUES */ INTO {table} ({columns}) VALUES ({binds})"
+            started, loaded = time.perf_counter(), 0
+            for batch in batched(getattr(dataset, method)(), args.batch_size):
+                cursor.executemany(sql, batch)
+                # Direct-path rows are unreadable until commit, so commit per batch
+                conn.commit()
+                loaded += len(batch)
+            elapsed = time.perf_counter() - started
+            print(f"{table:<20} {loaded:>10} rows {elapsed:8.1f}s {loaded / max(elapsed, 1e-9):>10.0f} rows/s")
+    finally:
+        # Validates the loaded rows against their foreign keys
+        set_constraints(cursor, tables, True)
+        set_triggers(cursor, tables, True)
+
+    started = time.perf_counter()
+    cursor.callproc('shareit_pkg.rebuild_derived_data')
+    for table, (id_col, seq) in SEQUENCES.items():
+        cursor.execute(f"SELECT NVL(MAX({id_col}), 0) + 1 FROM {table}")
+        cursor.execute(f"ALTER SEQUENCE {seq} RESTART START WITH {cursor.fetchone()[0]}")
+    cursor.callproc('dbms_stats.gather_schema_stats', [Config.ORACLE_USER.upper()])
+    print(f"derived data + stats {time.perf_counter() - started:8.1f}s")
+    conn.close()
+
+
+def load_mock(dataset):
+    # MockDB keeps its rows at class level, so this is visible to every
+    # connection in the process. Build the Dataset with
+    # id_offsets=MockDB.store.max_ids() to keep the seed rows.
+    from db import MockDB
+
+    with MockDB.store.lock:
+        MockDB.store.bulk_load(users=dataset.users(), subforums=dataset.subforums(),
+                               subscriptions=dataset.subscriptions(), posts=dataset.posts())
+
+
+def make_dataset(args, id_offsets=None):
+    return Dataset(users=args.users, subforums=args.subforums, posts=args.posts, comments=args.comments,
+                   votes=args.votes, subscriptions_per_user=args.subscriptions, days=args.days,
+                   skew=args.skew, seed=args.seed, id_offsets=id_offsets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and bulk load a synthetic ShareIt dataset")
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--subforums', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--comments', type=int, default=3000000)
+    parser.add_argument('--votes', type=int, default=6000000)
+    parser.add_argument('--subscriptions', type=int, default=10, help='typical subscriptions per user')
+    parser.add_argument('--days', type=int, default=365, help='time span of the posts')
+    parser.add_argument('--skew', type=float, default=1.1, help='power-law exponent for popularity')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=50000, help='rows per executemany round-trip')
+    parser.add_argument('--mock', action='store_true', help='generate only, without loading into Oracle')
+    args = parser.parse_args()
+
+    if args.mock:
+        # Generation only: reports how fast rows are produced
+        dataset = make_dataset(args)
+        for table, _, method in LOAD_ORDER:
+            started = time.perf_counter()
+            count = sum(1 for _ in getattr(dataset, method)())
+            print(f"{table:<20} {count:>10} rows {time.perf_counter() - started:8.1f}s")
+    else:
+        load_oracle(args)
+
+
+if __name__ == '__main__':
+    main()
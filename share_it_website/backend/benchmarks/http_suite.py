@@ -0,0 +1,260 @@
+# Latency/throughput benchmark for every backend route, with regression
+# thresholds against a stored baseline.
+#
+# Runs in-process against the mock DB (no Oracle, no network), seeded with a
+# synthetic dataset from benchmarks/dataset.py. Each scenario is driven by
+# --concurrency threads for --seconds, --repeat times; the medians of
+# p50/p95/p99 latency and requests/sec are compared with
+# benchmarks/baseline.json:
+#
+#     cd share_it_website/backend
+#     python -m benchmarks.http_suite                      # compare, exit 1 on regression
+#     python -m benchmarks.http_suite --update-baseline    # record a new baseline
+#     python -m benchmarks.http_suite --only feed_new,login --concurrency 16
+#
+# A scenario regresses when its p95 grows, or its requests/sec drops, by more
+# than --threshold (default 25%); p95 changes under --min-delta-ms are treated
+# as noise. Baselines are machine specific: record one on the machine that
+# runs the comparison.
+#
+# bcrypt runs at cost 4 here so login/register measure the route, not the
+# hash; see benchmarks/login_storm.py for hashing under load.
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from app import app
+from benchmarks.dataset import Dataset, load_mock
+from config import Config
+from db import MockDB
+from vote_buffer import vote_buffer
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Dataset loaded into the mock DB on top of its seed rows
+DATASET = dict(users=20000, subforums=500, posts=50000, comments=0, votes=0, subscriptions_per_user=10)
+
+_counter = itertools.count(1)
+_loaded = {}  # filled by prepare(): highest ids and the subforum names
+
+
+def _post_id(rng):
+    return rng.randint(1, _loaded['posts'])
+
+
+def _user_id(rng):
+    return rng.randint(1, _loaded['users'])
+
+
+def _subforum_id(rng):
+    return rng.randint(1, _loaded['subforums'])
+
+
+# name -> (method, path(rng), body(rng) or None)
+SCENARIOS = {
+    "health": ("GET", lambda rng: "/api/health", None),
+    "feed_new": ("GET", lambda rng: "/api/posts?limit=25", None),
+    "feed_hot_preview": ("GET", lambda rng: "/api/posts?sort=hot&limit=25&preview=300", None),
+    "feed_hot_columns": ("GET", lambda rng: "/api/posts?sort=hot&limit=100&format=columns", None),
+    "feed_top_week": ("GET", lambda rng: "/api/posts?sort=top&window=week&limit=25", None),
+    "feed_subforum": ("GET", lambda rng: f"/api/posts?subforum_name={rng.choice(_loaded['names'])}&limit=25", None),
+    "home_feed": ("GET", lambda rng: f"/api/feed?current_user_id={_user_id(rng)}&limit=25", None),
+    "search": ("GET", lambda rng: "/api/search?q=oracle+index&limit=25", None),
+    "post_detail": ("GET", lambda rng: f"/api/posts/{_post_id(rng)}", None),
+    "post_detail_user": ("GET", lambda rng: f"/api/posts/{_post_id(rng)}?current_user_id={_user_id(rng)}", None),
+    "comment_tree": ("GET", lambda rng: f"/api/posts/{_post_id(rng)}/comments", None),
+    "subforums": ("GET", lambda rng: "/api/subforums", None),
+    "leaderboard": ("GET", lambda rng: f"/api/leaderboard?limit={rng.choice((10, 25, 100))}", None),
+    "inbox": ("GET", lambda rng: f"/api/messages/inbox?current_user_id={_user_id(rng)}&limit=25", None),
+    "unread_count": ("GET", lambda rng: f"/api/messages/unread?current_user_id={_user_id(rng)}", None),
+    "send_message": ("POST", lambda rng: "/api/messages",
+                     lambda rng: {"sender_id": _user_id(rng), "receiver_id": _user_id(rng), "subject": "bench",
+                                  "body": "bench message"}),
+    "report_item": ("POST", lambda rng: "/api/moderation/reports",
+                    lambda rng: {"reporter_id": _user_id(rng), "post_id": _post_id(rng), "reason": "bench"}),
+    "mod_queue": ("GET", lambda rng: "/api/moderation/queue?current_user_id=2&limit=25", None),
+    "create_post": ("POST", lambda rng: "/api/posts",
+                    lambda rng: {"user_id": _user_id(rng), "subforum_id": 1, "title": "bench", "content": "bench body"}),
+    "create_comment": ("POST", lambda rng: f"/api/posts/{_post_id(rng)}/comments",
+                       lambda rng: {"user_id": _user_id(rng), "content": "bench comment"}),
+    "vote": ("POST", lambda rng: f"/api/posts/{_post_id(rng)}/vote",
+             lambda rng: {"user_id": _user_id(rng), "vote_type": rng.choice((1, -1))}),
+    "vote_batch": ("POST", lambda rng: "/api/votes/batch",
+                   lambda rng: {"votes": [{"user_id": _user_id(rng), "post_id": _post_id(rng), "vote_type": 1}
+                                          for _ in range(20)]}),
+    "subscribe": ("POST", lambda rng: f"/api/subforums/{_subforum_id(rng)}/subscribe",
+                  lambda rng: {"user_id": _user_id(rng)}),
+    "register": ("POST", lambda rng: "/api/register",
+                 lambda rng: {"username": f"bench{next(_counter)}", "email": f"bench{next(_counter)}@example.com",
+                              "password": "bench-password"}),
+    "login": ("POST", lambda rng: "/api/login", lambda rng: {"username": "bench_login", "password": "bench-password"}),
+    "pool_stats": ("GET", lambda rng: "/api/pool/stats", None),
+    "cache_stats": ("GET", lambda rng: "/api/cache/stats", None),
+    "vote_stats": ("GET", lambda rng: "/api/votes/stats", None),
+    "metrics": ("GET", lambda rng: "/api/metrics", None),
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_scenario(name, concurrency, seconds, seed):
+    method, path, body = SCENARIOS[name]
+    latencies, errors = [], {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(worker_seed):
+        client = app.test_client()
+        rng = random.Random(worker_seed)
+        local, local_errors = [], {}
+        while time.perf_counter() < deadline:
+            kwargs = {}
+            if body:
+                kwargs = {"data": json.dumps(body(rng)), "content_type": "application/json"}
+            start = time.perf_counter()
+            res = client.open(path(rng), method=method, **kwargs)
+            local.append((time.perf_counter() - start) * 1000)
+            if res.status_code >= 400:
+                local_errors[res.status_code] = local_errors.get(res.status_code, 0) + 1
+        with lock:
+            latencies.extend(local)
+            for code, n in local_errors.items():
+                errors[code] = errors.get(code, 0) + n
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(seed + i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "errors": {str(code): n for code, n in sorted(errors.items())},
+    }
+
+
+def median_run(runs):
+    # Per-metric median over repeated runs of one scenario
+    merged = {key: statistics.median(r[key] for r in runs)
+              for key in ("requests", "rps", "p50_ms", "p95_ms", "p99_ms", "mean_ms")}
+    merged["errors"] = {}
+    for r in runs:
+        for code, n in r["errors"].items():
+            merged["errors"][code] = merged["errors"].get(code, 0) + n
+    return merged
+
+
+def find_regressions(results, baseline, threshold, min_delta_ms=0.0):
+    # Scenarios missing from the baseline are new and cannot regress.
+    # Latency changes under min_delta_ms are ignored: with several client
+    # threads sharing the GIL, sub-millisecond routes get a few ms of
+    # scheduling jitter in their tail.
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if (base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + threshold)
+                and current["p95_ms"] - base["p95_ms"] > min_delta_ms):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {base['rps']} -> {current['rps']}")
+        if current["errors"] and not base.get("errors"):
+            regressions.append(f"{name}: errors {current['errors']}")
+    return regressions
+
+
+def prepare():
+    Config.USE_MOCK_DB = True
+    Config.BCRYPT_ROUNDS = 4
+    app.config['TESTING'] = True
+    app.config['USE_MOCK_DB'] = True
+    load_mock(Dataset(**DATASET, id_offsets=MockDB.store.max_ids()))
+    MockDB.store.build_text_index()  # otherwise the first search pays for it
+    _loaded.update(MockDB.store.max_ids())
+    _loaded['names'] = sorted(MockDB.store.subforum_ids)
+    app.test_client().post('/api/register', data=json.dumps({
+        "username": "bench_login", "email": "bench_login@example.com", "password": "bench-password"
+    }), content_type='application/json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every backend route against the mock DB")
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads per scenario')
+    parser.add_argument('--seconds', type=float, default=1.0, help='duration of each run')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario; the median is reported')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed p95/rps regression (0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='ignore p95 changes smaller than this')
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = {}
+    # Keep anything the routes print out of the timings and the report
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            prepare()
+        for name in names:
+            runs = []
+            with contextlib.redirect_stdout(devnull):
+                for i in range(args.repeat):
+                    runs.append(run_scenario(name, args.concurrency, args.seconds, args.seed + i * 1000))
+                    vote_buffer.flush()
+            results[name] = median_run(runs)
+            r = results[name]
+            print(f"{name:<18} {r['requests']:>7} req {r['rps']:>9.1f} req/s "
+                  f"p50={r['p50_ms']:7.2f}ms p95={r['p95_ms']:7.2f}ms p99={r['p99_ms']:7.2f}ms"
+                  + (f" errors={r['errors']}" if r['errors'] else ""))
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = find_regressions(results, baseline, args.threshold, args.min_delta_ms)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# Read latency during a login storm.
+#
+# Measures GET /api/subforums latency on its own, then again while
+# --logins threads hammer POST /api/login. With hashing on the bounded
+# bcrypt pool (passwords.py) the reads should stay close to the baseline,
+# and logins beyond the pool's queue get 429 instead of piling up.
+#
+# Runs in-process against the mock DB:
+#     cd share_it_website/backend
+#     USE_MOCK_DB=True python -m benchmarks.login_storm --logins 32 --seconds 5
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from app import app
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure_reads(seconds, stop):
+    client = app.test_client()
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline and not stop.is_set():
+        start = time.perf_counter()
+        client.get('/api/subforums')
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def login_worker(stop, results, lock):
+    client = app.test_client()
+    body = json.dumps({"username": "storm_user", "password": "storm-password"})
+    while not stop.is_set():
+        res = client.post('/api/login', data=body, content_type='application/json')
+        with lock:
+            results[res.status_code] = results.get(res.status_code, 0) + 1
+
+
+def report(label, samples):
+    print(f"{label:<14} reads={len(samples):<6} "
+          f"p50={percentile(samples, 50):7.2f}ms p95={percentile(samples, 95):7.2f}ms "
+          f"p99={percentile(samples, 99):7.2f}ms mean={statistics.fmean(samples) if samples else 0:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=32, help='concurrent login threads')
+    parser.add_argument('--seconds', type=float, default=5.0, help='duration of each phase')
+    args = parser.parse_args()
+
+    app.config['TESTING'] = True
+    client = app.test_client()
+    client.post('/api/register', data=json.dumps({
+        "username": "storm_user", "email": "storm@example.com", "password": "storm-password"
+    }), content_type='application/json')
+
+    report("baseline", measure_reads(args.seconds, threading.Event()))
+
+    stop = threading.Event()
+    results, lock = {}, threading.Lock()
+    workers = [threading.Thread(target=login_worker, args=(stop, results, lock), daemon=True)
+               for _ in range(args.logins)]
+    for w in workers:
+        w.start()
+    try:
+        report("login storm", measure_reads(args.seconds, stop))
+    finally:
+        stop.set()
+        for w in workers:
+            w.join()
+    print("login responses: " + ", ".join(f"{code}={n}" for code, n in sorted(results.items())))
+
+
+if __name__ == '__main__':
+    main()
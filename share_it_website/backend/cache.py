@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+# In-process read cache for data that changes rarely (subforums, anonymous
+# post detail). Each worker process has its own copy; write routes call
+# invalidate()/clear() for the entries they affect.
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < time.monotonic():
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Subforum list with statistics for GET /api/subforums (single key)
+subforum_list_cache = TTLCache('subforum_list', 1, Config.STATS_CACHE_TTL_SECONDS)
+# Subforum name -> subforum_id
+subforum_id_cache = TTLCache('subforum_id', Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL_SECONDS)
+# post_id -> (etag, {"post": ..., "comments": ...}) for requests without current_user_id
+post_detail_cache = TTLCache('post_detail', Config.CACHE_MAX_ENTRIES, Config.POST_CACHE_TTL_SECONDS)
+
+# limit -> top users for GET /api/leaderboard
+leaderboard_cache = TTLCache('leaderboard', 16, Config.STATS_CACHE_TTL_SECONDS)
+
+ALL_CACHES = [subforum_list_cache, subforum_id_cache, post_detail_cache, leaderboard_cache]
+
+
+def cache_stats():
+    return {c.name: c.stats() for c in ALL_CACHES}
@@ -0,0 +1,53 @@
+import gzip
+from flask import request
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+# Content-Encoding negotiation for JSON and text responses. Bodies under
+# COMPRESS_MIN_SIZE bytes go out as they are (the headers and CPU cost more
+# than they save), as do streamed bodies. Brotli is preferred when the client
+# accepts it and the module is installed.
+
+COMPRESSIBLE_TYPES = {'application/json', 'text/plain', 'text/csv', 'application/x-ndjson'}
+
+
+def negotiate(response, accept_encodings):
+    # Content-coding to apply to this response, or None
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or (response.content_length or 0) < Config.COMPRESS_MIN_SIZE):
+        return None
+    # The body depends on Accept-Encoding from here on, even when sent as is
+    response.vary.add('Accept-Encoding')
+    return accept_encodings.best_match(['br', 'gzip'] if brotli is not None else ['gzip'])
+
+
+def encode(response, coding, data):
+    if coding == 'br':
+        body = brotli.compress(data, quality=Config.BROTLI_QUALITY)
+    else:
+        # mtime=0 keeps the output identical for identical input, as the
+        # strong ETag promises
+        body = gzip.compress(data, compresslevel=Config.GZIP_LEVEL, mtime=0)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = coding
+    etag, weak = response.get_etag()
+    if etag:
+        # Each encoding is its own representation (see http_cache.CODINGS)
+        response.set_etag(f"{etag}-{coding}", weak)
+    return response
+
+
+def _after_request(response):
+    coding = negotiate(response, request.accept_encodings)
+    if coding:
+        encode(response, coding, response.get_data())
+    return response
+
+
+def init_app(app):
+    app.after_request(_after_request)
@@ -9,3 +9,71 @@ class Config:
     ORACLE_PASSWORD = os.environ.get('ORACLE_PASSWORD') or 'oracle'
     ORACLE_DSN = os.environ.get('ORACLE_DSN') or 'localhost:1521/xe'
     USE_MOCK_DB = os.environ.get('USE_MOCK_DB', 'True').lower() == 'true'
+
+    # Connection pool sizing (see db.get_pool)
+    ORACLE_POOL_MIN = int(os.environ.get('ORACLE_POOL_MIN', 2))
+    ORACLE_POOL_MAX = int(os.environ.get('ORACLE_POOL_MAX', 10))
+    ORACLE_POOL_INCREMENT = int(os.environ.get('ORACLE_POOL_INCREMENT', 1))
+    # Milliseconds a request waits for a free connection before failing
+    ORACLE_POOL_WAIT_TIMEOUT = int(os.environ.get('ORACLE_POOL_WAIT_TIMEOUT', 5000))
+    # Seconds a connection may sit idle before it is pinged on acquire (health check)
+    ORACLE_POOL_PING_INTERVAL = int(os.environ.get('ORACLE_POOL_PING_INTERVAL', 60))
+    # Seconds before idle connections above ORACLE_POOL_MIN are closed
+    ORACLE_POOL_IDLE_TIMEOUT = int(os.environ.get('ORACLE_POOL_IDLE_TIMEOUT', 300))
+
+    # Keyset pagination defaults for list endpoints (see pagination.py)
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 25))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+    # Upper bound for ?preview= on the feed (characters of content_text)
+    MAX_PREVIEW_LENGTH = int(os.environ.get('MAX_PREVIEW_LENGTH', 1000))
+
+    # In-process read cache (see cache.py)
+    CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1000))
+    # Subforum statistics and the karma leaderboard; SUBFORUM_STATS itself is
+    # refreshed every minute
+    STATS_CACHE_TTL_SECONDS = int(os.environ.get('STATS_CACHE_TTL_SECONDS', 60))
+    LEADERBOARD_SIZE = int(os.environ.get('LEADERBOARD_SIZE', 10))
+    # Post detail changes with every vote/comment, so it gets a shorter TTL
+    POST_CACHE_TTL_SECONDS = int(os.environ.get('POST_CACHE_TTL_SECONDS', 30))
+
+    # Response compression (see compression.py): bodies smaller than this are sent as is
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    # Brotli's default (11) is too slow for per-request use
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 4))
+
+    # Write-behind vote buffer (see vote_buffer.py)
+    VOTE_BUFFER_ENABLED = os.environ.get('VOTE_BUFFER_ENABLED', 'True').lower() == 'true'
+    # Seconds between flushes; a flush also happens once VOTE_FLUSH_MAX votes are pending
+    VOTE_FLUSH_INTERVAL = float(os.environ.get('VOTE_FLUSH_INTERVAL', 0.5))
+    VOTE_FLUSH_MAX = int(os.environ.get('VOTE_FLUSH_MAX', 500))
+
+    # Live updates over Server-Sent Events (see live_updates.py)
+    # Seconds between updates for one post; bursts in between are merged
+    LIVE_UPDATE_INTERVAL = float(os.environ.get('LIVE_UPDATE_INTERVAL', 1.0))
+    # Open streams per process (each holds a worker thread under WSGI)
+    LIVE_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_MAX_SUBSCRIBERS', 200))
+    LIVE_MAX_POSTS = int(os.environ.get('LIVE_MAX_POSTS', 100))
+    # Seconds of silence before a keep-alive comment, which also detects closed clients
+    LIVE_HEARTBEAT_SECONDS = float(os.environ.get('LIVE_HEARTBEAT_SECONDS', 15))
+
+    # Comment tree endpoint: default / maximum levels returned per request
+    COMMENT_TREE_DEPTH = int(os.environ.get('COMMENT_TREE_DEPTH', 5))
+    MAX_COMMENT_TREE_DEPTH = int(os.environ.get('MAX_COMMENT_TREE_DEPTH', 10))
+    # Rows per round-trip for a comment tree (a page of comments with their replies)
+    COMMENT_TREE_FETCH_SIZE = int(os.environ.get('COMMENT_TREE_FETCH_SIZE', 500))
+
+    # Rows per round-trip (and per streamed chunk) for /api/reports exports
+    REPORT_FETCH_SIZE = int(os.environ.get('REPORT_FETCH_SIZE', 1000))
+
+    # Statements slower than this are logged with their binds (see metrics.py)
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+
+    # Password hashing (see passwords.py)
+    # Cost factor for new hashes; existing hashes are upgraded on next login
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', 2))
+    # Hash/check requests allowed to wait for a worker before answering 429
+    BCRYPT_QUEUE_LIMIT = int(os.environ.get('BCRYPT_QUEUE_LIMIT', 8))
+    BCRYPT_TIMEOUT = float(os.environ.get('BCRYPT_TIMEOUT', 10))
@@ -0,0 +1,30 @@
+import hashlib
+
+# Conditional GET for the feed and post detail.
+# ETags are strong tags hashed from the version stamps the schema keeps
+# (posts.version, subforums.version; bumped by trg_posts_version and
+# trg_comments_version) plus whatever else the body depends on: the path and
+# query string, and the requesting user's votes still in the vote buffer.
+# Reading a stamp is a primary-key lookup, so a client that sends back a
+# current If-None-Match gets its 304 without the feed or detail query running.
+
+# compression.py appends the content-coding to the tag of encoded responses
+CODINGS = ('gzip', 'br')
+
+
+def make_etag(*parts):
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def matching_etag(if_none_match, etag):
+    # The variant of etag (plain or encoded) the client already has, or None
+    for tag in (etag, *(f"{etag}-{coding}" for coding in CODINGS)):
+        if if_none_match.contains(tag):
+            return tag
+    return None
+
+
+def not_modified(response_class, etag):
+    response = response_class("", status=304)
+    response.set_etag(etag)
+    return response
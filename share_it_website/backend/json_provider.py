@@ -0,0 +1,59 @@
+import datetime
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder gives the same output, slower
+    orjson = None
+
+# JSON encoding for row-heavy responses (feeds, comment trees, reports).
+# Flask's default provider formats every datetime through email.utils, which
+# dominates encoding time for rows carrying CREATED_AT; the formatter below
+# writes the same RFC 822 text directly. With orjson installed the rest of
+# the encoding runs in native code as well, and the body is built as bytes
+# without a str round-trip.
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+_ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                   if orjson is not None else 0)
+
+
+def http_date(value):
+    # Same text as werkzeug.http.http_date: naive datetimes are taken as UTC
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        hour, minute, second = value.hour, value.minute, value.second
+    else:
+        hour = minute = second = 0
+    return (f"{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+            f"{hour:02d}:{minute:02d}:{second:02d} GMT")
+
+
+def _default(value):
+    if isinstance(value, datetime.date):
+        return http_date(value)
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def dumps_bytes(self, obj):
+        # Compact, sorted keys: what Flask's provider sends outside debug mode
+        if orjson is not None:
+            return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+        return json.dumps(obj, default=_default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                          separators=(",", ":")).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
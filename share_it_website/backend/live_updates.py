@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from config import Config
+from queries import build_post_scores_query
+
+# In-process pub/sub behind GET /api/live (Server-Sent Events).
+# Write paths publish what changed on a post: its vote total once a vote is
+# written (vote_buffer.write_votes, or vote_post when unbuffered) and new
+# comments (create_comment). Updates are coalesced per post and fanned out
+# at most once per LIVE_UPDATE_INTERVAL to the streams watching that post, so
+# a vote storm costs each client one small event per interval and nobody
+# polls /api/posts/<id>. A slow client's undelivered updates are merged too,
+# so what a stream holds is bounded by the posts it watches.
+# Each worker process has its own hub: a stream sees the writes handled by
+# the process it is connected to.
+
+live_log = logging.getLogger('shareit.live')
+
+
+def _merge(pending, post_id, update):
+    # Latest total wins; deltas and comment counts add up
+    current = pending.get(post_id)
+    if current is None:
+        pending[post_id] = dict(update, POST_ID=post_id)
+        return
+    if "UPVOTES" in update:
+        current["UPVOTES"] = update["UPVOTES"]
+        if "DELTA" in update and "DELTA" in current:
+            current["DELTA"] += update["DELTA"]
+        else:
+            current.pop("DELTA", None)
+    if "NEW_COMMENTS" in update:
+        current["NEW_COMMENTS"] = current.get("NEW_COMMENTS", 0) + update["NEW_COMMENTS"]
+
+
+class Subscription:
+    def __init__(self, post_ids, notify):
+        self.post_ids = frozenset(post_ids)
+        self._notify = notify  # wakes the stream; called from the hub's thread
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def deliver(self, post_id, update):
+        with self._lock:
+            _merge(self._pending, post_id, update)
+        self._notify()
+
+    def drain(self):
+        with self._lock:
+            updates, self._pending = self._pending, {}
+        return list(updates.values())
+
+
+class LiveUpdates:
+    def __init__(self, interval, max_subscribers):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._watchers = {}  # post_id -> set of Subscription
+        self._pending = {}   # post_id -> coalesced update
+        self._scores = {}    # post_id -> last published UPVOTES, for DELTA
+        self._thread = None
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.flushes = 0
+
+    def subscribe(self, post_ids, notify):
+        # None when the stream limit is reached (each stream holds a thread)
+        sub = Subscription(post_ids, notify)
+        with self._lock:
+            if self.subscribers >= self.max_subscribers:
+                return None
+            self.subscribers += 1
+            for post_id in sub.post_ids:
+                self._watchers.setdefault(post_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self.subscribers -= 1
+            for post_id in sub.post_ids:
+                watchers = self._watchers.get(post_id)
+                if watchers is None:
+                    continue
+                watchers.discard(sub)
+                if not watchers:
+                    del self._watchers[post_id]
+                    self._scores.pop(post_id, None)
+
+    def watched(self, post_ids):
+        # The posts someone is watching: only these are worth a read after a write
+        with self._lock:
+            return sorted(p for p in set(post_ids) if p in self._watchers)
+
+    def publish_scores(self, scores):
+        # {post_id: upvotes} as just read back from the database
+        with self._lock:
+            for post_id, upvotes in scores.items():
+                if post_id not in self._watchers:
+                    continue
+                update = {"UPVOTES": upvotes}
+                previous = self._scores.get(post_id)
+                if previous is not None:
+                    update["DELTA"] = upvotes - previous
+                self._scores[post_id] = upvotes
+                _merge(self._pending, post_id, update)
+                self.published += 1
+        self._signal()
+
+    def publish_comment(self, post_id):
+        with self._lock:
+            if post_id not in self._watchers:
+                return
+            _merge(self._pending, post_id, {"NEW_COMMENTS": 1})
+            self.published += 1
+        self._signal()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            targets = [(update, list(self._watchers.get(post_id, ()))) for post_id, update in batch.items()]
+            if batch:
+                self.flushes += 1
+        delivered = 0
+        for update, subs in targets:
+            for sub in subs:
+                sub.deliver(update["POST_ID"], update)
+                delivered += 1
+        with self._lock:
+            self.delivered += delivered
+        return len(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": self.subscribers,
+                "watched_posts": len(self._watchers),
+                "published": self.published,
+                "delivered": self.delivered,
+                "flushes": self.flushes,
+            }
+
+    def _signal(self):
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='live-updates', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        # The first update of a burst goes out at once; the rest of the burst
+        # collects for one interval and goes out merged
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+            time.sleep(self.interval)
+
+
+def parse_post_ids(raw):
+    # ?posts=1,2,3
+    try:
+        post_ids = {int(p) for p in (raw or '').split(',') if p.strip()}
+    except ValueError:
+        raise ValueError(f"Invalid posts: {raw}")
+    if not post_ids or len(post_ids) > Config.LIVE_MAX_POSTS:
+        raise ValueError(f"Watch between 1 and {Config.LIVE_MAX_POSTS} posts")
+    return post_ids
+
+
+def format_event(update, dumps):
+    return b"event: post\ndata: " + dumps(update) + b"\n\n"
+
+
+def publish_vote_totals(cursor, post_ids):
+    # After votes on post_ids are committed: read back the totals of the
+    # watched ones (primary-key reads) and publish them. The votes are in
+    # either way, so a failure here is only logged.
+    watched = live_updates.watched(post_ids)
+    try:
+        for start in range(0, len(watched), 1000):  # Oracle's IN-list limit
+            query, params = build_post_scores_query(watched[start:start + 1000])
+            cursor.execute(query, params)
+            live_updates.publish_scores(dict(cursor.fetchall()))
+    except Exception:
+        live_log.exception("Error publishing vote totals")
+
+
+live_updates = LiveUpdates(Config.LIVE_UPDATE_INTERVAL, Config.LIVE_MAX_SUBSCRIBERS)
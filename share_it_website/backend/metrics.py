@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+from flask import g, has_request_context, request
+from config import Config
+from json_provider import FastJSONProvider
+
+# Request instrumentation, exported in Prometheus text format at /api/metrics.
+# Per route: latency histogram, request count by status, DB time, JSON
+# serialization time and query count. Statements slower than SLOW_QUERY_MS
+# are logged with their bind values.
+
+slow_query_log = logging.getLogger('shareit.slow_query')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_routes = {}  # (method, rule) -> per-route counters
+_slow_queries = 0
+
+
+def _route_stats(key):
+    stats = _routes.get(key)
+    if stats is None:
+        stats = _routes[key] = {
+            "buckets": [0] * len(LATENCY_BUCKETS),
+            "count": 0,
+            "sum": 0.0,
+            "status": {},
+            "db_seconds": 0.0,
+            "serialize_seconds": 0.0,
+            "queries": 0,
+        }
+    return stats
+
+
+# -----------------------------------------------------------------------------
+#  DB timing: wraps connections handed out by db.get_db_connection
+# -----------------------------------------------------------------------------
+
+def _record_db(elapsed, statement=None, params=None):
+    global _slow_queries
+    if has_request_context():
+        g.db_seconds = g.get('db_seconds', 0.0) + elapsed
+        if statement is not None:
+            g.db_queries = g.get('db_queries', 0) + 1
+    if statement is not None and elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        with _lock:
+            _slow_queries += 1
+        slow_query_log.warning("Slow query (%.1f ms): %s | Params: %r",
+                               elapsed * 1000, " ".join(str(statement).split()), params)
+
+
+class TimedCursor:
+    def __init__(self, cursor):
+        object.__setattr__(self, '_cursor', cursor)
+
+    def _timed(self, fn, statement, params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record_db(time.perf_counter() - start, statement, params)
+
+    def execute(self, statement, params=None, **kwargs):
+        return self._timed(self._cursor.execute, statement, params, statement, params, **kwargs)
+
+    def executemany(self, statement, params, **kwargs):
+        return self._timed(self._cursor.executemany, statement, f"<{len(params)} rows>", statement, params, **kwargs)
+
+    def callproc(self, name, params=None, **kwargs):
+        return self._timed(self._cursor.callproc, name, params, name, params or [], **kwargs)
+
+    # Fetches can be round-trips too; they count toward DB time, not queries
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone, None, None)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchmany, None, None, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall, None, None)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # rowfactory, arraysize, prefetchrows, ... belong to the real cursor
+        setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._cursor.close()
+
+
+class TimedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return self._conn.commit()
+        finally:
+            _record_db(time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._conn.close()
+
+
+def instrument_connection(conn):
+    return TimedConnection(conn) if conn is not None else None
+
+
+# -----------------------------------------------------------------------------
+#  Serialization timing
+# -----------------------------------------------------------------------------
+
+class TimedJSONProvider(FastJSONProvider):
+    def dumps_bytes(self, obj):
+        start = time.perf_counter()
+        try:
+            return super().dumps_bytes(obj)
+        finally:
+            if has_request_context():
+                g.serialize_seconds = g.get('serialize_seconds', 0.0) + time.perf_counter() - start
+
+
+# -----------------------------------------------------------------------------
+#  Flask hooks
+# -----------------------------------------------------------------------------
+
+def _before_request():
+    g.request_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.get('request_start')
+    if start is None or request.url_rule is None:
+        return response
+    elapsed = time.perf_counter() - start
+    key = (request.method, request.url_rule.rule)
+    with _lock:
+        stats = _route_stats(key)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                stats["buckets"][i] += 1
+        stats["count"] += 1
+        stats["sum"] += elapsed
+        stats["status"][response.status_code] = stats["status"].get(response.status_code, 0) + 1
+        stats["db_seconds"] += g.get('db_seconds', 0.0)
+        stats["serialize_seconds"] += g.get('serialize_seconds', 0.0)
+        stats["queries"] += g.get('db_queries', 0)
+    return response
+
+
+def init_app(app):
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+# -----------------------------------------------------------------------------
+#  Prometheus exposition
+# -----------------------------------------------------------------------------
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus(extra=None):
+    # extra: {metric_name: (help, 'gauge' | 'counter', {label tuple or (): value})}
+    # from other subsystems; totals that only ever grow are counters, so rate() works on them
+    lines = []
+    with _lock:
+        routes = {k: {**v, "buckets": list(v["buckets"]), "status": dict(v["status"])} for k, v in _routes.items()}
+        slow = _slow_queries
+
+    lines.append("# HELP shareit_request_duration_seconds Request latency by route.")
+    lines.append("# TYPE shareit_request_duration_seconds histogram")
+    for (method, rule), s in sorted(routes.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        for bound, n in zip(LATENCY_BUCKETS, s["buckets"]):
+            lines.append(f"shareit_request_duration_seconds_bucket{_labels(method=method, route=rule, le=bound)} {n}")
+        lines.append(f"shareit_request_duration_seconds_bucket{_labels(method=method, route=rule, le='+Inf')} {s['count']}")
+        lines.append(f"shareit_request_duration_seconds_sum{_labels(method=method, route=rule)} {s['sum']:.6f}")
+        lines.append(f"shareit_request_duration_seconds_count{_labels(method=method, route=rule)} {s['count']}")
+
+    counters = [
+        ("shareit_requests_total", "Requests by route and status code.", None),
+        ("shareit_request_db_seconds_total", "Time spent in DB calls, by route.", "db_seconds"),
+        ("shareit_request_serialize_seconds_total", "Time spent encoding JSON responses, by route.", "serialize_seconds"),
+        ("shareit_request_queries_total", "DB statements executed, by route.", "queries"),
+    ]
+    for name, help_text, field in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (method, rule), s in sorted(routes.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+            if field is None:
+                for status, n in sorted(s["status"].items()):
+                    lines.append(f"{name}{_labels(method=method, route=rule, status=status)} {n}")
+            else:
+                value = s[field]
+                lines.append(f"{name}{_labels(method=method, route=rule)} {value:.6f}" if isinstance(value, float)
+                             else f"{name}{_labels(method=method, route=rule)} {value}")
+
+    lines.append("# HELP shareit_slow_queries_total Statements slower than SLOW_QUERY_MS.")
+    lines.append("# TYPE shareit_slow_queries_total counter")
+    lines.append(f"shareit_slow_queries_total {slow}")
+
+    for name, (help_text, metric_type, samples) in (extra or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples.items():
+            lines.append(f"{name}{_labels(**dict(labels)) if labels else ''} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,807 @@
+# In-memory stand-in for the Oracle schema (USE_MOCK_DB=True).
+#
+# MockStore keeps the rows plus the same access paths the real schema has
+# indexes for, and MockDB answers the statements the routes actually send
+# (queries.py and the shareit_pkg calls), so mock mode runs the real code
+# path instead of a separate one:
+#   - posts/users/subforums by id and by name: dicts
+#   - feed orders (created_at, upvotes, hot_score; post_id breaks ties),
+#     globally and per subforum: sorted int64 arrays, so a page is a bisect
+#     to the cursor plus one step per row, like an index range scan
+#   - comments by post and by (post, parent), votes by (user, post),
+#     subscriptions by user
+#   - messages by receiver and by sender in (sent_at, message_id) order,
+#     unread messages by receiver
+#   - users by (karma DESC, user_id), like idx_users_karma
+#   - reports by (subforum, status) in (reported_at, report_id) order, like
+#     idx_reports_queue, and moderated subforums by user
+#   - per-subforum counters (subscribers, newest post, and the SUBFORUM_STATS
+#     figures, which here are always current rather than a minute behind)
+# Rows are __slots__ objects and index entries are (sort key, post_id)
+# packed into one 8-byte int, so a million posts cost little beyond their
+# text. Search uses a word index built on the first search, so feed-only
+# runs do not pay for it. Statements the store does not know raise NotImplementedError rather
+# than quietly returning nothing.
+
+import datetime
+import heapq
+import re
+import threading
+import oracledb
+from array import array
+from itertools import islice
+from bisect import bisect_left, bisect_right, insort
+
+from queries import (SUBFORUM_ID_QUERY, SUBSCRIPTIONS_QUERY, LOGIN_QUERY, FEED_VERSION_QUERY, SUBFORUM_VERSION_QUERY,
+                     POST_VERSION_QUERY, POST_DETAIL_QUERY, COMMENTS_QUERY, SNIPPET_LENGTH,
+                     REPORT_POSTS_QUERY, REPORT_USERS_QUERY, UNREAD_COUNT_QUERY, MAILBOX_OWNER_COLUMNS,
+                     SUBFORUMS_QUERY, LEADERBOARD_QUERY, MODERATED_SUBFORUMS_QUERY)
+from ranking import hot_score
+
+# Index entries: (sort key + _KEY_OFFSET) << _ID_BITS | post_id
+_ID_BITS = 28
+_ID_MASK = (1 << _ID_BITS) - 1
+_KEY_OFFSET = 1 << 34
+
+# Sort column (as in ranking.SORT_COLUMNS) -> integer sort key of a value.
+# DATE has second precision; hot scores are compared to 1e-6.
+_SORT_KEYS = {
+    'p.created_at': lambda value: int(value.timestamp()),
+    'p.upvotes': lambda value: int(value),
+    'p.hot_score': lambda value: round(value * 1e6),
+}
+_SORT_ATTRS = {'p.created_at': 'created_at', 'p.upvotes': 'upvotes', 'p.hot_score': 'hot_score'}
+
+
+def _pack(sort_col, value, post_id):
+    return ((_SORT_KEYS[sort_col](value) + _KEY_OFFSET) << _ID_BITS) | post_id
+
+
+def _karma_key(karma, user_id):
+    # Descending walks give karma DESC, then user_id ascending
+    return ((int(karma) + _KEY_OFFSET) << _ID_BITS) | (_ID_MASK - user_id)
+
+
+def _karma_user_id(key):
+    return _ID_MASK - (key & _ID_MASK)
+
+
+_WORD = re.compile(r"\w+")
+
+
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+class _User:
+    __slots__ = ('user_id', 'username', 'email', 'password_hash', 'karma', 'unread_messages')
+
+    def __init__(self, user_id, username, email, password_hash, karma=0):
+        self.user_id, self.username, self.email = user_id, username, email
+        self.password_hash, self.karma = password_hash, karma
+        self.unread_messages = 0
+
+
+class _Post:
+    __slots__ = ('post_id', 'user_id', 'subforum_id', 'title', 'content', 'upvotes', 'hot_score', 'created_at',
+                 'version')
+
+    def __init__(self, post_id, user_id, subforum_id, title, content, upvotes, created_at):
+        self.post_id, self.user_id, self.subforum_id = post_id, user_id, subforum_id
+        self.title, self.content, self.upvotes = title, content, upvotes
+        self.created_at = created_at.replace(microsecond=0)
+        self.hot_score = hot_score(upvotes, self.created_at)
+        self.version = 0
+
+
+class _Comment:
+    __slots__ = ('comment_id', 'post_id', 'user_id', 'parent_id', 'content', 'created_at')
+
+    def __init__(self, comment_id, post_id, user_id, parent_id, content, created_at):
+        self.comment_id, self.post_id, self.user_id = comment_id, post_id, user_id
+        self.parent_id, self.content, self.created_at = parent_id, content, created_at.replace(microsecond=0)
+
+
+class _Message:
+    __slots__ = ('message_id', 'sender_id', 'receiver_id', 'subject', 'body', 'sent_at', 'is_read')
+
+    def __init__(self, message_id, sender_id, receiver_id, subject, body, sent_at):
+        self.message_id, self.sender_id, self.receiver_id = message_id, sender_id, receiver_id
+        self.subject, self.body, self.sent_at = subject, body, sent_at.replace(microsecond=0)
+        self.is_read = 0
+
+
+class _Report:
+    __slots__ = ('report_id', 'reporter_id', 'post_id', 'comment_id', 'subforum_id', 'reason', 'status',
+                 'reported_at', 'resolved_by')
+
+    def __init__(self, report_id, reporter_id, post_id, comment_id, subforum_id, reason, reported_at):
+        self.report_id, self.reporter_id = report_id, reporter_id
+        self.post_id, self.comment_id, self.subforum_id = post_id, comment_id, subforum_id
+        self.reason, self.status, self.reported_at = reason, 'OPEN', reported_at.replace(microsecond=0)
+        self.resolved_by = None
+
+
+class _SortedIndex:
+    __slots__ = ('keys',)
+
+    def __init__(self, keys=()):
+        self.keys = array('q', sorted(keys))
+
+    def add(self, key):
+        insort(self.keys, key)
+
+    def remove(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def descending_keys(self, below=None):
+        # Keys in descending order, starting after the cursor key
+        keys = self.keys
+        i = len(keys) if below is None else bisect_left(keys, below)
+        for j in range(i - 1, -1, -1):
+            yield keys[j]
+
+    def ascending_keys(self, above=None):
+        keys = self.keys
+        i = 0 if above is None else bisect_right(keys, above)
+        for j in range(i, len(keys)):
+            yield keys[j]
+
+    def descending(self, below=None):
+        for key in self.descending_keys(below):
+            yield key & _ID_MASK
+
+
+class MockStore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.users, self.users_by_name, self.emails = {}, {}, set()
+        self.subforums, self.subforum_ids = {}, {}
+        self.subforum_versions = {}  # subforum_id -> subforums.version
+        self.subforum_stats = {}     # subforum_id -> [subscriber_count, last_post_at, post_count, total_upvotes]
+        self.posts, self.comments = {}, {}
+        self.comments_by_post = {}    # post_id -> [comment_id]
+        self.comments_by_parent = {}  # (post_id, parent_comment_id or None) -> [comment_id]
+        self.votes = {}            # (user_id, post_id) -> vote_type
+        self.subscriptions = {}    # user_id -> set of subforum_ids
+        self.messages = {}
+        self.mailboxes = {'inbox': {}, 'sent': {}}  # box -> {user_id: index of (sent_at, message_id)}
+        self.unread = {}           # receiver_id -> set of unread message_ids
+        self.reports = {}
+        self.report_queues = {}    # (subforum_id, status) -> index of (reported_at, report_id)
+        self.moderators = {}       # user_id -> set of subforum_ids
+        self.sequences = {"users": 0, "subforums": 0, "posts": 0, "comments": 0, "messages": 0, "reports": 0}
+        # sort column -> (global index, {subforum_id: index})
+        self.indexes = {col: (_SortedIndex(), {}) for col in _SORT_KEYS}
+        self.karma_index = _SortedIndex()
+        self.text_index = None  # {'post'|'comment': {word: array of item_id << 8 | count}}, built lazily
+
+    def max_ids(self):
+        return dict(self.sequences)
+
+    def _next_id(self, table, given=None):
+        # seq_<table>_id.nextval, or an explicit id from a bulk load
+        if given:
+            self.sequences[table] = max(self.sequences[table], given)
+            return given
+        self.sequences[table] += 1
+        return self.sequences[table]
+
+    # Writes (mirror the shareit_pkg procedures, including their triggers)
+
+    def add_user(self, username, email, password_hash, user_id=None, karma=0, index=True):
+        if username in self.users_by_name or email in self.emails:
+            return None  # dup_val_on_index is swallowed by add_user
+        user_id = self._next_id('users', user_id)
+        user = self.users[user_id] = _User(user_id, username, email, password_hash, karma)
+        self.users_by_name[username] = user
+        self.emails.add(email)
+        if index:
+            self.karma_index.add(_karma_key(karma, user_id))
+        return user
+
+    def _add_karma(self, user_id, delta):
+        user = self.users[user_id]
+        self.karma_index.remove(_karma_key(user.karma, user_id))
+        user.karma += delta
+        self.karma_index.add(_karma_key(user.karma, user_id))
+
+    def _count_post(self, post):
+        stats = self.subforum_stats[post.subforum_id]
+        stats[1] = max(stats[1], post.created_at) if stats[1] else post.created_at
+        stats[2] += 1
+        stats[3] += post.upvotes
+
+    def add_subforum(self, name, description, subforum_id=None):
+        subforum_id = self._next_id('subforums', subforum_id)
+        self.subforums[subforum_id] = (subforum_id, name, description)
+        self.subforum_ids[name] = subforum_id
+        self.subforum_versions[subforum_id] = 0
+        self.subforum_stats[subforum_id] = [0, None, 0, 0]
+        return subforum_id
+
+    def subscribe(self, user_id, subforum_id):
+        if user_id in self.users and subforum_id in self.subforums:
+            subscribed = self.subscriptions.setdefault(user_id, set())
+            if subforum_id not in subscribed:
+                subscribed.add(subforum_id)
+                self.subforum_stats[subforum_id][0] += 1
+
+    def _index(self, post):
+        for col, (everything, by_subforum) in self.indexes.items():
+            key = _pack(col, getattr(post, _SORT_ATTRS[col]), post.post_id)
+            everything.add(key)
+            by_subforum.setdefault(post.subforum_id, _SortedIndex()).add(key)
+
+    def _unindex(self, post):
+        for col, (everything, by_subforum) in self.indexes.items():
+            key = _pack(col, getattr(post, _SORT_ATTRS[col]), post.post_id)
+            everything.remove(key)
+            by_subforum[post.subforum_id].remove(key)
+
+    def add_post(self, user_id, subforum_id, title, content, created_at=None, post_id=None):
+        if user_id not in self.users or subforum_id not in self.subforums:
+            return None  # foreign key violation, swallowed by create_post
+        post_id = self._next_id('posts', post_id)
+        post = self.posts[post_id] = _Post(post_id, user_id, subforum_id, title, content, 0,
+                                           created_at or datetime.datetime.now())
+        self._index(post)
+        self._index_text('post', post_id, f"{title} {content or ''}")
+        self._count_post(post)
+        self.subforum_versions[subforum_id] += 1
+        return post
+
+    def add_comment(self, post_id, user_id, content, parent_id=None, created_at=None, comment_id=None):
+        if post_id not in self.posts or user_id not in self.users:
+            return None
+        comment_id = self._next_id('comments', comment_id)
+        comment = self.comments[comment_id] = _Comment(comment_id, post_id, user_id, parent_id, content,
+                                                       created_at or datetime.datetime.now())
+        self.comments_by_post.setdefault(post_id, []).append(comment_id)
+        self.comments_by_parent.setdefault((post_id, parent_id), []).append(comment_id)
+        self._index_text('comment', comment_id, content)
+        self.posts[post_id].version += 1
+        return comment
+
+    def vote(self, user_id, post_id, vote_type):
+        # Upsert/delete in post_votes, then what trg_post_votes_aggregate does
+        # False when the vote breaks a foreign key (no such post or user)
+        post = self.posts.get(post_id)
+        if post is None or user_id not in self.users:
+            return False
+        old = self.votes.get((user_id, post_id), 0)
+        if not (old or vote_type):
+            return True  # nothing to delete, no row touched
+        if vote_type:
+            self.votes[(user_id, post_id)] = vote_type
+        else:
+            self.votes.pop((user_id, post_id), None)
+        delta = vote_type - old
+        if delta:
+            self._unindex(post)
+            post.upvotes += delta
+            post.hot_score = hot_score(post.upvotes, post.created_at)
+            self._index(post)
+            self._add_karma(post.user_id, delta)
+            self.subforum_stats[post.subforum_id][3] += delta
+        # trg_posts_version (posts are updated even when the delta is 0)
+        post.version += 1
+        self.subforum_versions[post.subforum_id] += 1
+        return True
+
+    def send_message(self, sender_id, receiver_id, subject, body, sent_at=None):
+        for user_id, constraint in ((sender_id, "FK_MSG_SENDER"), (receiver_id, "FK_MSG_RECEIVER")):
+            if user_id not in self.users:
+                raise _db_error(2291, f"integrity constraint ({constraint}) violated - parent key not found",
+                                oracledb.IntegrityError)
+        message_id = self._next_id('messages')
+        message = self.messages[message_id] = _Message(message_id, sender_id, receiver_id, subject, body,
+                                                       sent_at or datetime.datetime.now())
+        key = _pack('p.created_at', message.sent_at, message_id)  # same DATE key as posts
+        self.mailboxes['inbox'].setdefault(receiver_id, _SortedIndex()).add(key)
+        self.mailboxes['sent'].setdefault(sender_id, _SortedIndex()).add(key)
+        # trg_messages_unread
+        self.unread.setdefault(receiver_id, set()).add(message_id)
+        self.users[receiver_id].unread_messages += 1
+        return message
+
+    def mark_read(self, user_id, message_ids):
+        unread = self.unread.get(user_id, set())
+        marked = unread.intersection(message_ids)
+        for message_id in marked:
+            self.messages[message_id].is_read = 1
+        unread -= marked
+        if user_id in self.users:
+            self.users[user_id].unread_messages -= len(marked)
+
+    def add_moderator(self, user_id, subforum_id):
+        self.moderators.setdefault(user_id, set()).add(subforum_id)
+
+    def _queue(self, report):
+        return self.report_queues.setdefault((report.subforum_id, report.status), _SortedIndex())
+
+    def report_item(self, reporter_id, post_id, comment_id, reason, reported_at=None):
+        # trg_reports_subforum: the subforum of the post, or of the comment's post
+        if comment_id is not None and post_id is None:
+            comment = self.comments.get(comment_id)
+            post_id_of_item = comment.post_id if comment else None
+        else:
+            post_id_of_item = post_id
+        post = self.posts.get(post_id_of_item)
+        if post is None:
+            raise _db_error(20005, "Reported post or comment not found")  # trg_reports_subforum
+        if reporter_id not in self.users:
+            raise _db_error(2291, "integrity constraint (FK_REPORTS_REPORTER) violated - parent key not found",
+                            oracledb.IntegrityError)
+        report_id = self._next_id('reports')
+        report = self.reports[report_id] = _Report(report_id, reporter_id, post_id, comment_id, post.subforum_id,
+                                                   reason, reported_at or datetime.datetime.now())
+        self._queue(report).add(_pack('p.created_at', report.reported_at, report_id))
+        return report
+
+    def set_reports_status(self, moderator_id, report_ids, status):
+        moderated = self.moderators.get(moderator_id, set())
+        for report_id in report_ids:
+            report = self.reports.get(report_id)
+            if report is None or report.status != 'OPEN' or report.subforum_id not in moderated:
+                continue
+            key = _pack('p.created_at', report.reported_at, report_id)
+            self._queue(report).remove(key)
+            report.status, report.resolved_by = status, moderator_id
+            self._queue(report).add(key)
+
+    def bulk_load(self, users=(), subforums=(), subscriptions=(), posts=()):
+        # Rows as benchmarks.dataset generates them. Indexes are sorted once
+        # at the end instead of per insert; the word index is rebuilt on the
+        # next search.
+        self.text_index = None
+        karma_keys = []
+        for user_id, username, email, password_hash, karma, _ in users:
+            if self.add_user(username, email, password_hash, user_id=user_id, karma=karma, index=False):
+                karma_keys.append(_karma_key(karma, user_id))
+        self.karma_index = _SortedIndex(list(self.karma_index.keys) + karma_keys)
+        for subforum_id, name, description, _, _ in subforums:
+            self.add_subforum(name, description, subforum_id=subforum_id)
+        for user_id, subforum_id, _ in subscriptions:
+            self.subscribe(user_id, subforum_id)
+        pending = {col: ([], {}) for col in _SORT_KEYS}
+        for post_id, user_id, subforum_id, title, content, upvotes, created_at in posts:
+            self._next_id('posts', post_id)
+            post = self.posts[post_id] = _Post(post_id, user_id, subforum_id, title, content, upvotes, created_at)
+            self._count_post(post)
+            for col, (everything, by_subforum) in pending.items():
+                key = _pack(col, getattr(post, _SORT_ATTRS[col]), post_id)
+                everything.append(key)
+                by_subforum.setdefault(subforum_id, []).append(key)
+        for col, (everything, by_subforum) in pending.items():
+            index, subforum_indexes = self.indexes[col]
+            index.keys = array('q', sorted(list(index.keys) + everything))
+            for subforum_id, keys in by_subforum.items():
+                existing = subforum_indexes.get(subforum_id)
+                subforum_indexes[subforum_id] = _SortedIndex((list(existing.keys) if existing else []) + keys)
+
+    # Reads (row shapes match queries.py)
+
+    def _feed_row(self, post, user_id, preview_len):
+        content = post.content[:preview_len] if preview_len and post.content else post.content
+        return (post.post_id, post.title, content, post.upvotes, post.created_at,
+                self.users[post.user_id].username, self.subforums[post.subforum_id][1], post.subforum_id,
+                post.user_id, self.votes.get((user_id, post.post_id)), post.hot_score)
+
+    def feed(self, sort_col, params):
+        everything, by_subforum = self.indexes[sort_col]
+        if params.get("subforum_id") is not None:
+            index = by_subforum.get(params["subforum_id"])
+            if index is None:
+                return []
+        else:
+            index = everything
+        below = _pack(sort_col, params["after_key"], params["after_id"]) if "after_key" in params else None
+        since = None
+        if params.get("window_days"):
+            since = datetime.datetime.now() - datetime.timedelta(days=params["window_days"])
+
+        rows = []
+        for post_id in index.descending(below):
+            post = self.posts[post_id]
+            if since and post.created_at < since:
+                if sort_col == 'p.created_at':
+                    break  # everything after this is older still
+                continue
+            rows.append(self._feed_row(post, params["user_id"], params.get("preview_len")))
+            if len(rows) == params["limit_plus_one"]:
+                break
+        return rows
+
+    def home_feed(self, params):
+        # Merge the newest-first streams of each subscribed subforum
+        _, by_subforum = self.indexes['p.created_at']
+        below = _pack('p.created_at', params["after_key"], params["after_id"]) if "after_key" in params else None
+        streams = [by_subforum[s].descending_keys(below)
+                   for s in self.subscriptions.get(params["user_id"], ()) if s in by_subforum]
+        rows = []
+        for key in heapq.merge(*streams, reverse=True):
+            rows.append(self._feed_row(self.posts[key & _ID_MASK], params["user_id"], params.get("preview_len")))
+            if len(rows) == params["limit_plus_one"]:
+                break
+        return rows
+
+    def post_detail(self, user_id, post_id):
+        post = self.posts.get(post_id)
+        if post is None:
+            return []
+        return [self._feed_row(post, user_id, None)[:10] + (post.version,)]
+
+    def _replies(self, post_id, parent_id):
+        replies = [self.comments[c] for c in self.comments_by_parent.get((post_id, parent_id), ())]
+        replies.sort(key=lambda c: (c.created_at, c.comment_id))
+        return replies
+
+    def post_comments(self, post_id):
+        comments = [self.comments[c] for c in self.comments_by_post.get(post_id, ())]
+        comments.sort(key=lambda c: c.created_at)
+        return [(c.comment_id, c.content, c.created_at, self.users[c.user_id].username) for c in comments]
+
+    def comment_tree(self, params):
+        # Same rows, in the same pre-order, as the CONNECT BY in get_comment_tree
+        post_id, max_depth = params["post_id"], params["max_depth"]
+        roots = self._replies(post_id, params.get("parent_id"))
+        if "after_ts" in params:
+            after = (params["after_ts"], params["after_id"])
+            roots = [c for c in roots if (c.created_at, c.comment_id) > after]
+        roots = roots[:params["limit_plus_one"]]
+        rows = []
+
+        def visit(comment, level):
+            replies = self._replies(post_id, comment.comment_id)
+            rows.append((comment.comment_id, comment.parent_id, comment.content, comment.created_at,
+                         self.users[comment.user_id].username, level,
+                         len(replies) if level == max_depth else None, len(roots)))
+            if level < max_depth:
+                for reply in replies:
+                    visit(reply, level + 1)
+
+        for root in roots[:params["limit"]]:
+            visit(root, 1)
+        return rows
+
+    def _message_row(self, message):
+        return (message.message_id, message.sender_id, self.users[message.sender_id].username,
+                message.receiver_id, self.users[message.receiver_id].username,
+                message.subject, message.body, message.sent_at, message.is_read)
+
+    def _message_stream(self, box, user_id, params):
+        index = self.mailboxes[box].get(user_id)
+        if index is None:
+            return iter(())
+        below = _pack('p.created_at', params["after_key"], params["after_id"]) if "after_key" in params else None
+        return index.descending_keys(below)
+
+    def mailbox(self, box, params):
+        stream = self._message_stream(box, params["user_id"], params)
+        return [self._message_row(self.messages[key & _ID_MASK])
+                for key in islice(stream, params["limit_plus_one"])]
+
+    def thread(self, params):
+        # Both halves walk the owner's mailbox, filtered on the other party
+        user_id, other_id = params["user_id"], params["other_id"]
+        received = (k for k in self._message_stream('inbox', user_id, params)
+                    if self.messages[k & _ID_MASK].sender_id == other_id)
+        sent = (k for k in self._message_stream('sent', user_id, params)
+                if self.messages[k & _ID_MASK].receiver_id == other_id)
+        return [self._message_row(self.messages[key & _ID_MASK])
+                for key in islice(heapq.merge(received, sent, reverse=True), params["limit_plus_one"])]
+
+    def moderated_subforums(self, user_id):
+        return sorted(((s, self.subforums[s][1], len(self.report_queues.get((s, 'OPEN'), _SortedIndex()).keys))
+                       for s in self.moderators.get(user_id, ())), key=lambda row: row[1])
+
+    def mod_queue(self, params):
+        # One ascending walk per moderated subforum, merged
+        subforum_ids = self.moderators.get(params["user_id"], set())
+        if "subforum_id" in params:
+            subforum_ids = subforum_ids & {params["subforum_id"]}
+        above = _pack('p.created_at', params["after_key"], params["after_id"]) if "after_key" in params else None
+        walks = [self.report_queues[(s, params["status"])].ascending_keys(above) for s in subforum_ids
+                 if (s, params["status"]) in self.report_queues]
+        rows = []
+        for key in islice(heapq.merge(*walks), params["limit_plus_one"]):
+            report = self.reports[key & _ID_MASK]
+            comment = self.comments.get(report.comment_id)
+            post = self.posts[report.post_id or comment.post_id]
+            rows.append((report.report_id, report.subforum_id, self.subforums[report.subforum_id][1],
+                         report.post_id, report.comment_id, post.title,
+                         comment.content[:SNIPPET_LENGTH] if comment else None, report.reason, report.status,
+                         report.reported_at, report.reporter_id, self.users[report.reporter_id].username))
+        return rows
+
+    def _texts(self, kind):
+        if kind == 'post':
+            return ((p.post_id, f"{p.title} {p.content or ''}") for p in self.posts.values())
+        return ((c.comment_id, c.content) for c in self.comments.values())
+
+    def _index_text(self, kind, item_id, text):
+        if self.text_index is None:
+            return
+        counts = {}
+        for word in _WORD.findall(text.lower()):
+            counts[word] = counts.get(word, 0) + 1
+        postings = self.text_index[kind]
+        for word, n in counts.items():
+            postings.setdefault(word, array('q')).append((item_id << 8) | min(n, 255))
+
+    def build_text_index(self):
+        # word -> packed item_id/count, per kind; kept up to date by the
+        # writes once built
+        self.text_index = {'post': {}, 'comment': {}}
+        for kind in self.text_index:
+            for item_id, text in self._texts(kind):
+                self._index_text(kind, item_id, text)
+
+    def _matches(self, kind, terms):
+        # {item_id: score} for items containing every term
+        if self.text_index is None:
+            self.build_text_index()
+        postings = [self.text_index[kind].get(t) for t in set(terms)]
+        if not all(postings):
+            return {}
+        postings.sort(key=len)
+        scores = {entry >> 8: entry & 255 for entry in postings[0]}
+        for other in postings[1:]:
+            scores = {entry >> 8: scores[entry >> 8] + (entry & 255) for entry in other if entry >> 8 in scores}
+        return scores
+
+    def search(self, kinds, params):
+        # Every term required, scored by term frequency (capped at 100 like
+        # Oracle Text SCORE)
+        terms = re.findall(r"\{(\w+)\}", params["text_query"])
+        after = None
+        if "after_score" in params:
+            after = (params["after_score"], params["after_kind"], params["after_id"])
+        keys = []
+        for kind in kinds:
+            for item_id, score in self._matches(kind, terms).items():
+                key = (min(100, score), kind, item_id)
+                if after is None or key < after:
+                    keys.append(key)
+
+        rows = []
+        for score, kind, item_id in heapq.nlargest(params["limit_plus_one"], keys):
+            if kind == 'post':
+                item = post = self.posts[item_id]
+                snippet = post.content or ''
+            else:
+                item = self.comments[item_id]
+                post, snippet = self.posts[item.post_id], item.content
+            rows.append((kind, item_id, post.post_id, post.title, snippet[:SNIPPET_LENGTH], item.created_at,
+                         self.users[item.user_id].username, self.subforums[post.subforum_id][1], score))
+        return rows
+
+
+    def report_posts(self, params):
+        # Matching index keys are copied under the lock (8 bytes a post);
+        # rows are built as they are fetched, like the pipelined function
+        everything, by_subforum = self.indexes['p.upvotes']
+        index = everything
+        if params["subforum_name"] is not None:
+            index = by_subforum.get(self.subforum_ids.get(params["subforum_name"]))
+            if index is None:
+                return iter(())
+        keys = index.keys[bisect_left(index.keys, _pack('p.upvotes', params["min_upvotes"], 0)):]
+        return ((post.post_id, post.title, post.upvotes, self.subforums[post.subforum_id][1],
+                 self.users[post.user_id].username, post.created_at)
+                for post in (self.posts[key & _ID_MASK] for key in reversed(keys)))
+
+    def _by_karma(self, min_karma=None):
+        keys = self.karma_index.keys
+        stop = 0 if min_karma is None else bisect_left(keys, _karma_key(min_karma, _ID_MASK))
+        for i in range(len(keys) - 1, stop - 1, -1):
+            user = self.users[_karma_user_id(keys[i])]
+            yield (user.user_id, user.username, user.karma)
+
+    def report_users(self, params):
+        return self._by_karma(params["min_karma"])
+
+    def leaderboard(self, params):
+        return list(islice(self._by_karma(), params["limit"]))
+
+    def subforum_list(self):
+        return [self.subforums[s] + tuple(self.subforum_stats[s]) for s in sorted(self.subforums)]
+
+
+def _seed(store):
+    now = datetime.datetime.now()
+    store.bulk_load(
+        users=[(1, "jdoe", "jdoe@example.com", "$2b$12$K.X.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8.8", 10, now),
+               (2, "admin", "admin@example.com", "hashed_secret", 100, now)],
+        subforums=[(1, "general", "General discussion", now, None),
+                   (2, "news", "Latest news", now, None)],
+        posts=[(1, 1, 1, "Hello World", "This is the first post!", 5, now),
+               (2, 2, 2, "Big News", "Something big happened.", 20, now)])
+    store.add_moderator(2, 2)
+    return store
+
+
+class _OraError:
+    # What oracledb errors carry in args[0]
+    def __init__(self, code, message):
+        self.code, self.message = code, message
+
+    def __str__(self):
+        return f"ORA-{self.code:05d}: {self.message}"
+
+
+def _db_error(code, message, kind=oracledb.DatabaseError):
+    return kind(_OraError(code, message))
+
+
+class _Var:
+    # OUT bind (cursor.var)
+    def __init__(self):
+        self.value = None
+
+    def setvalue(self, pos, value):
+        self.value = value
+
+    def getvalue(self, pos=0):
+        return self.value
+
+
+_ORDER_BY = re.compile(r"ORDER BY (p\.\w+) DESC, p\.post_id DESC FETCH FIRST :limit_plus_one ROWS ONLY$")
+
+
+class MockDB:
+    # Process-wide data, shared by every connection like a real database
+    store = _seed(MockStore())
+    arraysize = 100
+    prefetchrows = 2
+
+    def __init__(self):
+        self._rows = iter(())
+        self.rowfactory = None
+
+    def get_connection(self):
+        return self
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None, **kwargs):
+        sql = _normalize(query)
+        with self.store.lock:
+            self._rows = iter(self._run(sql, params))
+        self.rowfactory = None
+        return None
+
+    def _run(self, sql, params):
+        store = self.store
+        if sql == _normalize(SUBFORUM_ID_QUERY):
+            subforum_id = store.subforum_ids.get(params[0])
+            return [(subforum_id,)] if subforum_id else []
+        if sql == _normalize(SUBSCRIPTIONS_QUERY):
+            return [(s,) for s in sorted(store.subscriptions.get(params["user_id"], ()))]
+        if sql == FEED_VERSION_QUERY:
+            return [(len(store.subforums), sum(store.subforum_versions.values()))]
+        if sql == SUBFORUM_VERSION_QUERY:
+            version = store.subforum_versions.get(params[0])
+            return [(version,)] if version is not None else []
+        if sql == POST_VERSION_QUERY:
+            post = store.posts.get(params[0])
+            return [(post.version,)] if post else []
+        if sql == _normalize(POST_DETAIL_QUERY):
+            return store.post_detail(params[0], params[1])
+        if sql == _normalize(COMMENTS_QUERY):
+            return store.post_comments(params[0] if isinstance(params, (list, tuple)) else params["post_id"])
+        if sql == _normalize(LOGIN_QUERY):
+            user = store.users_by_name.get(params[0] if isinstance(params, (list, tuple)) else params["username"])
+            return [(user.user_id, user.username, user.password_hash, user.karma)] if user else []
+        if sql == _normalize(SUBFORUMS_QUERY):
+            return store.subforum_list()
+        if sql == _normalize(LEADERBOARD_QUERY):
+            return store.leaderboard(params)
+        if sql.startswith("WITH pushed AS"):
+            return store.home_feed(params)
+        if sql.startswith("SELECT p.post_id, p.title,") and "FROM posts p" in sql:
+            match = _ORDER_BY.search(sql)
+            if match and match.group(1) in _SORT_KEYS:
+                return store.feed(match.group(1), params)
+        if "CONNECT BY PRIOR c.comment_id = c.parent_comment_id" in sql:
+            return store.comment_tree(params)
+        if "CONTAINS(" in sql:
+            kinds = [k for k, marker in (('post', "CONTAINS(p.content_text"), ('comment', "CONTAINS(c.content"))
+                     if marker in sql]
+            return store.search(kinds, params)
+        if sql.startswith("SELECT post_id, upvotes FROM posts WHERE post_id IN ("):
+            return [(p, store.posts[p].upvotes) for p in params.values() if p in store.posts]
+        if sql == UNREAD_COUNT_QUERY:
+            user = store.users.get(params[0])
+            return [(user.unread_messages,)] if user else []
+        if sql.startswith("SELECT m.message_id,") and "FROM messages m" in sql:
+            for box, column in MAILBOX_OWNER_COLUMNS.items():
+                if f"WHERE m.{column} = :user_id" in sql:
+                    return store.mailbox(box, params)
+        if sql.startswith("WITH received AS"):
+            return store.thread(params)
+        if sql == _normalize(MODERATED_SUBFORUMS_QUERY):
+            return store.moderated_subforums(params[0])
+        if sql.startswith("WITH page AS") and "FROM reports r" in sql:
+            return store.mod_queue(params)
+        if sql == _normalize(REPORT_POSTS_QUERY):
+            return store.report_posts(params)
+        if sql == REPORT_USERS_QUERY:
+            return store.report_users(params)
+        if sql.startswith("BEGIN shareit_pkg.create_post("):
+            store.add_post(int(params[0]), int(params[1]), params[2], params[3])
+            return []
+        if sql.startswith("BEGIN shareit_pkg.create_comment("):
+            post_id, user_id, content, parent_id = params
+            store.add_comment(post_id, user_id, content, parent_id)
+            return []
+        raise NotImplementedError(f"MockDB does not support: {sql[:120]}")
+
+    def _map(self, rows):
+        factory = self.rowfactory
+        return [factory(*row) for row in rows] if factory else list(rows)
+
+    def fetchall(self):
+        return self._map(self._rows)
+
+    def fetchone(self):
+        row = next(self._rows, None)
+        return row if row is None or self.rowfactory is None else self.rowfactory(*row)
+
+    def fetchmany(self, size=None):
+        return self._map(islice(self._rows, size or self.arraysize))
+
+    def arrayvar(self, typ, values):
+        return list(values)
+
+    def var(self, typ):
+        return _Var()
+
+    def callproc(self, name, params):
+        store = self.store
+        with store.lock:
+            if name == 'shareit_pkg.add_user':
+                store.add_user(params[0], params[1], params[2])
+            elif name == 'shareit_pkg.update_user_password':
+                user = store.users.get(params[0])
+                if user:
+                    user.password_hash = params[1]
+            elif name == 'shareit_pkg.vote_post':
+                store.vote(int(params[0]), int(params[1]), int(params[2]))
+            elif name == 'shareit_pkg.vote_posts_bulk':
+                # Votes for a missing post or user are skipped and counted
+                # (removals of them have nothing to delete either way)
+                rejected = sum(not store.vote(int(user_id), int(post_id), int(vote_type)) and int(vote_type) != 0
+                               for user_id, post_id, vote_type in zip(*params[:3]))
+                params[3].setvalue(0, rejected)
+            elif name == 'shareit_pkg.subscribe_user':
+                store.subscribe(int(params[0]), int(params[1]))
+            elif name == 'shareit_pkg.send_message':
+                store.send_message(*params)
+            elif name == 'shareit_pkg.mark_messages_read':
+                store.mark_read(int(params[0]), [int(m) for m in params[1]])
+            elif name == 'shareit_pkg.mark_all_messages_read':
+                store.mark_read(int(params[0]), list(store.unread.get(int(params[0]), ())))
+            elif name == 'shareit_pkg.report_item':
+                store.report_item(*params)
+            elif name == 'shareit_pkg.set_reports_status':
+                store.set_reports_status(int(params[0]), [int(r) for r in params[1]], params[2])
+            else:
+                raise NotImplementedError(f"MockDB does not support: {name}")
+        return params
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
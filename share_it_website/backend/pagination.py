@@ -0,0 +1,75 @@
+import base64
+import datetime
+import json
+from config import Config
+
+# Keyset pagination helpers.
+# A cursor is the sort key of the last row on a page, e.g. (created_at, post_id),
+# encoded so clients treat it as an opaque token and pass it back unchanged.
+# A decoded cursor is checked against the key of the query it is used with,
+# so a token from another endpoint or another ?sort is a 400, not a bind error.
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# Key type of numeric columns; JSON may give either back
+NUMBER = (int, float)
+
+
+def encode_cursor(*values):
+    parts = []
+    for v in values:
+        if isinstance(v, datetime.datetime):
+            parts.append({"ts": v.isoformat()})
+        else:
+            parts.append(v)
+    raw = json.dumps(parts, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, *types):
+    # types: the type of each value of the key, in order
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        parts = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = []
+        for p in parts:
+            if isinstance(p, dict) and 'ts' in p:
+                values.append(datetime.datetime.fromisoformat(p['ts']))
+            else:
+                values.append(p)
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+    if len(values) != len(types) or not all(
+            isinstance(v, t) and not isinstance(v, bool) for v, t in zip(values, types)):
+        raise InvalidCursor(f"Invalid cursor: {token}")
+    return tuple(values)
+
+
+def parse_limit(raw, default=None, maximum=None):
+    default = default or Config.PAGE_SIZE
+    maximum = maximum or Config.MAX_PAGE_SIZE
+    if raw is None or raw == '':
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError(f"Invalid limit: {raw}")
+    if limit < 1:
+        raise ValueError(f"Invalid limit: {raw}")
+    return min(limit, maximum)
+
+
+def parse_preview_length(raw):
+    # None means "send the full body"
+    if raw is None or raw == '':
+        return None
+    try:
+        length = int(raw)
+    except ValueError:
+        raise ValueError(f"Invalid preview length: {raw}")
+    if length < 1:
+        raise ValueError(f"Invalid preview length: {raw}")
+    # DBMS_LOB.SUBSTR returns a VARCHAR2, capped at 4000 bytes in SQL
+    return min(length, Config.MAX_PREVIEW_LENGTH)
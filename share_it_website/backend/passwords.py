@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+from config import Config
+
+# Password hashing off the request thread.
+# bcrypt is deliberately slow (~250ms at cost 12) and releases the GIL while
+# hashing, so a small dedicated thread pool caps how many cores a login
+# burst can take. Requests beyond the pool plus BCRYPT_QUEUE_LIMIT waiting
+# are rejected with PasswordPoolBusy (the routes answer 429) rather than
+# queueing up behind each other and starving the read endpoints; so are the
+# ones still waiting for a worker after BCRYPT_TIMEOUT seconds.
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+_executor = ThreadPoolExecutor(max_workers=Config.BCRYPT_WORKERS, thread_name_prefix='bcrypt')
+_slots = threading.BoundedSemaphore(Config.BCRYPT_WORKERS + Config.BCRYPT_QUEUE_LIMIT)
+_stats_lock = threading.Lock()
+_stats = {"hashed": 0, "checked": 0, "rehashed": 0, "rejected": 0, "timed_out": 0}
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        _count("rejected")
+        raise PasswordPoolBusy("Too many concurrent password operations, try again shortly")
+    try:
+        future = _executor.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda f: _slots.release())
+    try:
+        return future.result(timeout=Config.BCRYPT_TIMEOUT)
+    except FutureTimeout:
+        _count("timed_out")
+        raise PasswordPoolBusy("Password operation timed out, try again shortly")
+
+
+def hash_password(password):
+    hashed = _submit(lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)))
+    _count("hashed")
+    return hashed.decode('utf-8')
+
+
+def check_password(password, password_hash):
+    ok = _submit(lambda: bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')))
+    _count("checked")
+    return ok
+
+
+def rehash_password(password):
+    hashed = hash_password(password)
+    _count("rehashed")
+    return hashed
+
+
+def hash_cost(password_hash):
+    # "$2b$12$..." -> 12; None for anything that is not a bcrypt hash
+    parts = password_hash.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(password_hash):
+    return hash_cost(password_hash) != Config.BCRYPT_ROUNDS
+
+
+def password_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update({"workers": Config.BCRYPT_WORKERS, "queue_limit": Config.BCRYPT_QUEUE_LIMIT,
+                  "rounds": Config.BCRYPT_ROUNDS})
+    return stats
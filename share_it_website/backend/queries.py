@@ -0,0 +1,469 @@
+# SQL and result columns for the read endpoints, shared by the Flask routes
+# (routes.py) and the async serving mode (asgi.py). Rows are mapped onto the
+# *_COLUMNS names by results.py.
+
+import re
+
+SUBFORUM_ID_QUERY = "SELECT subforum_id FROM subforums WHERE name = :1"
+
+SUBSCRIPTIONS_QUERY = "SELECT subforum_id FROM user_subscriptions WHERE user_id = :user_id"
+
+LOGIN_QUERY = "SELECT user_id, username, password_hash, karma FROM users WHERE username = :username"
+LOGIN_COLUMNS = ("USER_ID", "USERNAME", "PASSWORD_HASH", "KARMA")
+
+# Version stamps for ETags (see http_cache.py). The all-subforums stamp also
+# counts the rows, so dropping a subforum changes it too.
+FEED_VERSION_QUERY = "SELECT COUNT(*), NVL(SUM(version), 0) FROM subforums"
+SUBFORUM_VERSION_QUERY = "SELECT version FROM subforums WHERE subforum_id = :1"
+POST_VERSION_QUERY = "SELECT version FROM posts WHERE post_id = :1"
+
+
+def build_post_scores_query(post_ids):
+    # Current vote totals for live updates (live_updates.publish_vote_totals)
+    binds = {f"p{i}": int(post_id) for i, post_id in enumerate(post_ids)}
+    query = f"SELECT post_id, upvotes FROM posts WHERE post_id IN ({', '.join(':' + b for b in binds)})"
+    return query, binds
+
+
+# Subforum list with its statistics: subscriber_count and last_post_at are
+# kept on SUBFORUMS by triggers, post_count/total_upvotes come from the
+# SUBFORUM_STATS materialized view (refreshed every minute).
+SUBFORUMS_QUERY = """
+    SELECT s.subforum_id, s.name, s.description, s.subscriber_count, s.last_post_at,
+           NVL(st.post_count, 0), NVL(st.total_upvotes, 0)
+    FROM subforums s
+    LEFT JOIN subforum_stats st ON st.subforum_id = s.subforum_id
+"""
+
+
+SUBFORUMS_COLUMNS = ("SUBFORUM_ID", "NAME", "DESCRIPTION", "SUBSCRIBER_COUNT", "LAST_POST_AT", "POST_COUNT",
+                     "TOTAL_UPVOTES")
+
+
+# Top-N by karma: reads the first :limit entries of idx_users_karma
+LEADERBOARD_QUERY = """
+    SELECT user_id, username, karma
+    FROM users
+    ORDER BY karma DESC, user_id
+    FETCH FIRST :limit ROWS ONLY
+"""
+
+
+# RANK is added to each row after the fetch (position in the result)
+LEADERBOARD_COLUMNS = ("USER_ID", "USERNAME", "KARMA")
+
+
+# Streaming exports over the pipelined functions in 05_reporting.sql
+REPORT_POSTS_QUERY = ("SELECT post_id, title, upvotes, subforum_name, username, created_at "
+                      "FROM TABLE(report_filtered_posts(:min_upvotes, :subforum_name))")
+REPORT_POSTS_COLUMNS = ("POST_ID", "TITLE", "UPVOTES", "SUBFORUM_NAME", "USERNAME", "CREATED_AT")
+REPORT_USERS_QUERY = "SELECT user_id, username, karma FROM TABLE(report_user_karma(:min_karma))"
+REPORT_USERS_COLUMNS = ("USER_ID", "USERNAME", "KARMA")
+
+
+def build_feed_query(user_id, sort_col, limit, subforum_id=None, window_days=None, after=None, preview_len=None):
+    # 1. Base Query
+    # LEFT JOIN with post_votes to get the current user's vote on each post.
+    # Not logged in -> bind -1 so the join matches nothing.
+    # With preview_len the body is cut down on the server, so the feed never ships full CLOBs.
+    content_col = "DBMS_LOB.SUBSTR(p.content_text, :preview_len, 1)" if preview_len else "p.content_text"
+    query = f"""
+        SELECT p.post_id, p.title, {content_col}, p.upvotes, p.created_at,
+               u.username, s.name as subforum_name, p.subforum_id, p.user_id,
+               pv.vote_type as user_vote, p.hot_score
+        FROM posts p
+        JOIN users u ON p.user_id = u.user_id
+        JOIN subforums s ON p.subforum_id = s.subforum_id
+        LEFT JOIN post_votes pv ON p.post_id = pv.post_id AND pv.user_id = :user_id
+    """
+    params = {"user_id": int(user_id) if user_id else -1}
+    if preview_len:
+        params["preview_len"] = preview_len
+    filters = []
+
+    # 2. Subforum filter on p.subforum_id walks the (subforum_id, <sort column>, post_id) index
+    if subforum_id is not None:
+        filters.append("p.subforum_id = :subforum_id")
+        params["subforum_id"] = subforum_id
+
+    # 3. Restrict to the ?window time range
+    if window_days:
+        filters.append("p.created_at >= SYSDATE - :window_days")
+        params["window_days"] = window_days
+
+    # 4. Resume after the last row of the previous page
+    if after:
+        filters.append(f"({sort_col} < :after_key OR ({sort_col} = :after_key AND p.post_id < :after_id))")
+        params["after_key"], params["after_id"] = after
+
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+
+    # 5. Order By must match the index column order for a stop-key range scan.
+    # Fetch one extra row to know whether there is a next page.
+    query += f" ORDER BY {sort_col} DESC, p.post_id DESC FETCH FIRST :limit_plus_one ROWS ONLY"
+    params["limit_plus_one"] = limit + 1
+    return query, params
+
+
+def build_home_feed_query(user_id, limit, after=None, preview_len=None):
+    # Newest posts from the user's subscriptions, from two sources:
+    # 1. USER_FEED, filled on post insert (fan-out on write): one IOT range scan.
+    # 2. Subscribed subforums in feed_on_read mode (fan-out on read): newest
+    #    posts of each via idx_posts_subforum_created. Only very large
+    #    subforums are in this mode, so a user has few of them.
+    # Each source stops at limit + 1 rows, so the first page costs the same
+    # however many subforums the user follows.
+    content_col = "DBMS_LOB.SUBSTR(p.content_text, :preview_len, 1)" if preview_len else "p.content_text"
+    params = {"user_id": int(user_id), "limit_plus_one": limit + 1}
+    if preview_len:
+        params["preview_len"] = preview_len
+    feed_after = post_after = ""
+    if after:
+        feed_after = "AND (f.created_at < :after_key OR (f.created_at = :after_key AND f.post_id < :after_id))"
+        post_after = "AND (p.created_at < :after_key OR (p.created_at = :after_key AND p.post_id < :after_id))"
+        params["after_key"], params["after_id"] = after
+
+    query = f"""
+        WITH pushed AS (
+            SELECT f.post_id, f.created_at
+            FROM user_feed f
+            JOIN subforums s ON f.subforum_id = s.subforum_id
+            WHERE f.user_id = :user_id
+              AND s.feed_on_read = 0 {feed_after}
+            ORDER BY f.created_at DESC, f.post_id DESC
+            FETCH FIRST :limit_plus_one ROWS ONLY
+        ), pulled AS (
+            SELECT lp.post_id, lp.created_at
+            FROM user_subscriptions us
+            JOIN subforums s ON us.subforum_id = s.subforum_id
+            CROSS APPLY (
+                SELECT p.post_id, p.created_at
+                FROM posts p
+                WHERE p.subforum_id = us.subforum_id {post_after}
+                ORDER BY p.created_at DESC, p.post_id DESC
+                FETCH FIRST :limit_plus_one ROWS ONLY
+            ) lp
+            WHERE us.user_id = :user_id
+              AND s.feed_on_read = 1
+        ), page AS (
+            SELECT post_id, created_at FROM pushed
+            UNION ALL
+            SELECT post_id, created_at FROM pulled
+            ORDER BY created_at DESC, post_id DESC
+            FETCH FIRST :limit_plus_one ROWS ONLY
+        )
+        SELECT p.post_id, p.title, {content_col}, p.upvotes, p.created_at,
+               u.username, s.name as subforum_name, p.subforum_id, p.user_id,
+               pv.vote_type as user_vote, p.hot_score
+        FROM page
+        JOIN posts p ON p.post_id = page.post_id
+        JOIN users u ON p.user_id = u.user_id
+        JOIN subforums s ON p.subforum_id = s.subforum_id
+        LEFT JOIN post_votes pv ON p.post_id = pv.post_id AND pv.user_id = :user_id
+        ORDER BY p.created_at DESC, p.post_id DESC
+    """
+    return query, params
+
+
+FEED_COLUMNS = ("POST_ID", "TITLE", "CONTENT_TEXT", "UPVOTES", "CREATED_AT", "USERNAME", "SUBFORUM_NAME",
+                "SUBFORUM_ID", "USER_ID", "USER_VOTE", "HOT_SCORE")
+# ?preview=N feeds: the shortened body comes back as PREVIEW
+FEED_PREVIEW_COLUMNS = FEED_COLUMNS[:2] + ("PREVIEW",) + FEED_COLUMNS[3:]
+
+
+POST_DETAIL_QUERY = """
+    SELECT p.post_id, p.title, p.content_text, p.upvotes, p.created_at,
+           u.username, s.name as subforum_name, p.subforum_id, p.user_id,
+           pv.vote_type as user_vote, p.version
+    FROM posts p
+    JOIN users u ON p.user_id = u.user_id
+    JOIN subforums s ON p.subforum_id = s.subforum_id
+    LEFT JOIN post_votes pv ON p.post_id = pv.post_id AND pv.user_id = :1
+    WHERE p.post_id = :2
+"""
+
+
+# VERSION feeds the ETag and is taken out of the body
+POST_DETAIL_COLUMNS = ("POST_ID", "TITLE", "CONTENT_TEXT", "UPVOTES", "CREATED_AT", "USERNAME", "SUBFORUM_NAME",
+                       "SUBFORUM_ID", "USER_ID", "USER_VOTE", "VERSION")
+
+
+COMMENTS_QUERY = """
+    SELECT c.comment_id, c.content, c.created_at, u.username
+    FROM comments c
+    JOIN users u ON c.user_id = u.user_id
+    WHERE c.post_id = :post_id
+    ORDER BY c.created_at ASC
+"""
+
+
+# Key kept as CONTENT_TEXT for frontend compatibility
+COMMENTS_COLUMNS = ("COMMENT_ID", "CONTENT_TEXT", "CREATED_AT", "USERNAME")
+
+
+# Rows of build_comment_tree_query; MORE_REPLIES is only set at the depth
+# limit, ROOT_COUNT repeats the number of starting comments found
+COMMENT_TREE_COLUMNS = ("COMMENT_ID", "PARENT_COMMENT_ID", "CONTENT_TEXT", "CREATED_AT", "USERNAME", "DEPTH",
+                        "MORE_REPLIES", "ROOT_COUNT")
+
+
+def build_comment_tree_query(post_id, depth, limit, parent_id=None, after=None):
+    # 1. Page of starting comments (children of parent_id, or roots),
+    #    one extra to detect a next page.
+    root_filters = ["post_id = :post_id"]
+    params = {"post_id": post_id, "limit": limit, "limit_plus_one": limit + 1, "max_depth": depth}
+    if parent_id is not None:
+        root_filters.append("parent_comment_id = :parent_id")
+        params["parent_id"] = parent_id
+    else:
+        root_filters.append("parent_comment_id IS NULL")
+    if after:
+        root_filters.append("(created_at > :after_ts OR (created_at = :after_ts AND comment_id > :after_id))")
+        params["after_ts"], params["after_id"] = after
+
+    # 2. Walk the subtrees of this page in one CONNECT BY over
+    #    idx_comments_post_parent, siblings oldest first.
+    query = f"""
+        WITH roots AS (
+            SELECT comment_id, created_at
+            FROM comments
+            WHERE {" AND ".join(root_filters)}
+            ORDER BY created_at, comment_id
+            FETCH FIRST :limit_plus_one ROWS ONLY
+        ), page AS (
+            SELECT comment_id
+            FROM roots
+            ORDER BY created_at, comment_id
+            FETCH FIRST :limit ROWS ONLY
+        )
+        SELECT t.comment_id, t.parent_comment_id, t.content, t.created_at,
+               u.username, t.depth, t.hidden_replies,
+               (SELECT COUNT(*) FROM roots) AS root_count
+        FROM (
+            -- ROWNUM taken after ORDER SIBLINGS BY keeps the pre-order through the join
+            SELECT h.*, ROWNUM AS tree_order
+            FROM (
+                SELECT c.comment_id, c.parent_comment_id, c.content, c.created_at, c.user_id,
+                       LEVEL AS depth,
+                       CASE WHEN LEVEL = :max_depth THEN
+                           (SELECT COUNT(*) FROM comments ch
+                            WHERE ch.post_id = c.post_id AND ch.parent_comment_id = c.comment_id)
+                       END AS hidden_replies
+                FROM comments c
+                START WITH c.comment_id IN (SELECT comment_id FROM page)
+                CONNECT BY PRIOR c.comment_id = c.parent_comment_id
+                       AND c.post_id = :post_id
+                       AND LEVEL <= :max_depth
+                ORDER SIBLINGS BY c.created_at, c.comment_id
+            ) h
+        ) t
+        JOIN users u ON t.user_id = u.user_id
+        ORDER BY t.tree_order
+    """
+    return query, params
+
+
+SNIPPET_LENGTH = 200
+SEARCH_KINDS = ('post', 'comment')
+
+
+def search_terms(q):
+    # Only word characters reach CONTAINS; Oracle Text operators and
+    # punctuation in user input would otherwise change the query.
+    return re.findall(r"\w+", q.lower())
+
+
+def build_search_query(terms, limit, kinds=SEARCH_KINDS, after=None):
+    # Every term must match ({} escapes reserved words like AND / NEAR).
+    # Results are ranked by Oracle Text SCORE, ties broken by kind then id,
+    # and resumed from (score, kind, id) of the last row of the previous page.
+    params = {"text_query": " AND ".join("{" + t + "}" for t in terms), "limit_plus_one": limit + 1}
+    page_filter = ""
+    if after:
+        page_filter = """WHERE (score < :after_score
+                      OR (score = :after_score AND (kind < :after_kind
+                      OR (kind = :after_kind AND item_id < :after_id))))"""
+        params["after_score"], params["after_kind"], params["after_id"] = after
+
+    # Each branch takes at most limit + 1 of its own best matches before the
+    # union, so neither index is read past the page being served.
+    branches = []
+    if 'post' in kinds:
+        branches.append(f"""
+            SELECT * FROM (
+                SELECT * FROM (
+                    SELECT 'post' AS kind, p.post_id AS item_id, p.post_id, p.title,
+                           DBMS_LOB.SUBSTR(p.content_text, {SNIPPET_LENGTH}, 1) AS snippet,
+                           p.created_at, p.user_id, p.subforum_id, SCORE(1) AS score
+                    FROM posts p
+                    WHERE CONTAINS(p.content_text, :text_query, 1) > 0
+                ) {page_filter}
+                ORDER BY score DESC, kind DESC, item_id DESC
+                FETCH FIRST :limit_plus_one ROWS ONLY
+            )""")
+    if 'comment' in kinds:
+        branches.append(f"""
+            SELECT * FROM (
+                SELECT * FROM (
+                    SELECT 'comment' AS kind, c.comment_id AS item_id, c.post_id, p.title,
+                           SUBSTR(c.content, 1, {SNIPPET_LENGTH}) AS snippet,
+                           c.created_at, c.user_id, p.subforum_id, SCORE(2) AS score
+                    FROM comments c
+                    JOIN posts p ON c.post_id = p.post_id
+                    WHERE CONTAINS(c.content, :text_query, 2) > 0
+                ) {page_filter}
+                ORDER BY score DESC, kind DESC, item_id DESC
+                FETCH FIRST :limit_plus_one ROWS ONLY
+            )""")
+
+    query = f"""
+        SELECT r.kind, r.item_id, r.post_id, r.title, r.snippet, r.created_at,
+               u.username, s.name AS subforum_name, r.score
+        FROM ({" UNION ALL ".join(branches)}) r
+        JOIN users u ON r.user_id = u.user_id
+        JOIN subforums s ON r.subforum_id = s.subforum_id
+        ORDER BY r.score DESC, r.kind DESC, r.item_id DESC
+        FETCH FIRST :limit_plus_one ROWS ONLY
+    """
+    return query, params
+
+
+SEARCH_COLUMNS = ("TYPE", "ID", "POST_ID", "TITLE", "SNIPPET", "CREATED_AT", "USERNAME", "SUBFORUM_NAME", "SCORE")
+
+
+# Direct messages. Inbox and sent box read idx_messages_inbox/idx_messages_sent
+# newest first; the unread badge is the counter trg_messages_unread keeps.
+UNREAD_COUNT_QUERY = "SELECT unread_messages FROM users WHERE user_id = :1"
+
+MAILBOX_OWNER_COLUMNS = {'inbox': 'receiver_id', 'sent': 'sender_id'}
+
+_MESSAGE_COLUMNS = """m.message_id, m.sender_id, su.username, m.receiver_id, ru.username,
+           m.subject, m.body, m.sent_at, m.is_read"""
+
+
+def build_mailbox_query(box, user_id, limit, after=None):
+    # Keyset on (sent_at, message_id): one index range scan per page
+    params = {"user_id": int(user_id), "limit_plus_one": limit + 1}
+    after_clause = ""
+    if after:
+        after_clause = "AND (m.sent_at < :after_key OR (m.sent_at = :after_key AND m.message_id < :after_id))"
+        params["after_key"], params["after_id"] = after
+
+    query = f"""
+        SELECT {_MESSAGE_COLUMNS}
+        FROM messages m
+        JOIN users su ON m.sender_id = su.user_id
+        JOIN users ru ON m.receiver_id = ru.user_id
+        WHERE m.{MAILBOX_OWNER_COLUMNS[box]} = :user_id {after_clause}
+        ORDER BY m.sent_at DESC, m.message_id DESC
+        FETCH FIRST :limit_plus_one ROWS ONLY
+    """
+    return query, params
+
+
+def build_thread_query(user_id, other_id, limit, after=None):
+    # Both directions of a conversation, newest first. Each half is a range
+    # scan of the owner's inbox/sent index filtered on the trailing column,
+    # stopping at limit + 1 rows, then the halves are merged.
+    params = {"user_id": int(user_id), "other_id": int(other_id), "limit_plus_one": limit + 1}
+    after_clause = ""
+    if after:
+        after_clause = "AND (m.sent_at < :after_key OR (m.sent_at = :after_key AND m.message_id < :after_id))"
+        params["after_key"], params["after_id"] = after
+
+    query = f"""
+        WITH received AS (
+            SELECT m.message_id, m.sent_at
+            FROM messages m
+            WHERE m.receiver_id = :user_id AND m.sender_id = :other_id {after_clause}
+            ORDER BY m.sent_at DESC, m.message_id DESC
+            FETCH FIRST :limit_plus_one ROWS ONLY
+        ), sent AS (
+            SELECT m.message_id, m.sent_at
+            FROM messages m
+            WHERE m.sender_id = :user_id AND m.receiver_id = :other_id {after_clause}
+            ORDER BY m.sent_at DESC, m.message_id DESC
+            FETCH FIRST :limit_plus_one ROWS ONLY
+        ), page AS (
+            SELECT message_id, sent_at FROM received
+            UNION ALL
+            SELECT message_id, sent_at FROM sent
+            ORDER BY sent_at DESC, message_id DESC
+            FETCH FIRST :limit_plus_one ROWS ONLY
+        )
+        SELECT {_MESSAGE_COLUMNS}
+        FROM page
+        JOIN messages m ON m.message_id = page.message_id
+        JOIN users su ON m.sender_id = su.user_id
+        JOIN users ru ON m.receiver_id = ru.user_id
+        ORDER BY m.sent_at DESC, m.message_id DESC
+    """
+    return query, params
+
+
+MESSAGE_COLUMNS = ("MESSAGE_ID", "SENDER_ID", "SENDER_USERNAME", "RECEIVER_ID", "RECEIVER_USERNAME", "SUBJECT",
+                   "BODY", "SENT_AT", "IS_READ")
+
+
+# Moderation queue. Reports carry the subforum of the reported item
+# (trg_reports_subforum), so each moderated subforum is a range scan of
+# idx_reports_queue; nothing is joined through posts/comments to find them.
+REPORT_STATUSES = ('OPEN', 'RESOLVED', 'DISMISSED')
+
+MODERATED_SUBFORUMS_QUERY = """
+    SELECT s.subforum_id, s.name,
+           (SELECT COUNT(*) FROM reports r WHERE r.subforum_id = m.subforum_id AND r.status = 'OPEN')
+    FROM moderators m
+    JOIN subforums s ON s.subforum_id = m.subforum_id
+    WHERE m.user_id = :1
+    ORDER BY s.name
+"""
+MODERATED_SUBFORUMS_COLUMNS = ("SUBFORUM_ID", "NAME", "OPEN_REPORTS")
+
+
+def build_mod_queue_query(moderator_id, status, limit, subforum_id=None, after=None):
+    # Oldest first, keyset on (reported_at, report_id). Each subforum the
+    # user moderates contributes at most limit + 1 index entries, then the
+    # merged page is joined to the report details.
+    params = {"user_id": int(moderator_id), "status": status, "limit_plus_one": limit + 1}
+    after_clause = ""
+    if after:
+        after_clause = "AND (r.reported_at > :after_key OR (r.reported_at = :after_key AND r.report_id > :after_id))"
+        params["after_key"], params["after_id"] = after
+    subforum_clause = ""
+    if subforum_id is not None:
+        subforum_clause = "AND m.subforum_id = :subforum_id"
+        params["subforum_id"] = int(subforum_id)
+
+    query = f"""
+        WITH page AS (
+            SELECT q.report_id, q.reported_at
+            FROM moderators m
+            CROSS APPLY (
+                SELECT r.report_id, r.reported_at
+                FROM reports r
+                WHERE r.subforum_id = m.subforum_id AND r.status = :status {after_clause}
+                ORDER BY r.reported_at, r.report_id
+                FETCH FIRST :limit_plus_one ROWS ONLY
+            ) q
+            WHERE m.user_id = :user_id {subforum_clause}
+            ORDER BY q.reported_at, q.report_id
+            FETCH FIRST :limit_plus_one ROWS ONLY
+        )
+        SELECT r.report_id, r.subforum_id, s.name, r.post_id, r.comment_id, p.title,
+               SUBSTR(c.content, 1, {SNIPPET_LENGTH}), r.reason, r.status, r.reported_at,
+               r.reporter_id, u.username
+        FROM page
+        JOIN reports r ON r.report_id = page.report_id
+        JOIN subforums s ON s.subforum_id = r.subforum_id
+        JOIN users u ON u.user_id = r.reporter_id
+        LEFT JOIN comments c ON c.comment_id = r.comment_id
+        JOIN posts p ON p.post_id = NVL(r.post_id, c.post_id)
+        ORDER BY r.reported_at, r.report_id
+    """
+    return query, params
+
+
+MOD_QUEUE_COLUMNS = ("REPORT_ID", "SUBFORUM_ID", "SUBFORUM_NAME", "POST_ID", "COMMENT_ID", "POST_TITLE",
+                     "COMMENT_SNIPPET", "REASON", "STATUS", "REPORTED_AT", "REPORTER_ID", "REPORTER_USERNAME")
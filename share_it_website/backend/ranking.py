@@ -0,0 +1,39 @@
+import datetime
+import math
+from pagination import NUMBER
+
+# Feed orderings for GET /api/posts?sort=...
+# Each maps to (SQL column, response key); the column is the leading key of
+# the keyset cursor and of the backing index in 01_ddl.sql.
+SORT_COLUMNS = {
+    'new': ('p.created_at', 'CREATED_AT'),
+    'hot': ('p.hot_score', 'HOT_SCORE'),
+    'top': ('p.upvotes', 'UPVOTES'),
+}
+
+# Type of each sort key in a decoded cursor (see pagination.decode_cursor)
+SORT_KEY_TYPES = {
+    'new': datetime.datetime,
+    'hot': NUMBER,
+    'top': int,
+}
+
+# ?window=... -> how many days back to look (None = no limit)
+WINDOW_DAYS = {
+    'day': 1,
+    'week': 7,
+    'all': None,
+}
+
+_UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def hot_score(upvotes, created_at):
+    # Python mirror of shareit_pkg.hot_score (Reddit-style):
+    # log10 of the net score plus an age term, so every 45000s (12.5h) of
+    # recency is worth a 10x score. Only used by the mock DB; Oracle keeps
+    # posts.hot_score up to date in trg_posts_hot_score.
+    order = math.log10(max(abs(upvotes), 1))
+    sign = (upvotes > 0) - (upvotes < 0)
+    seconds = (created_at - _UNIX_EPOCH).total_seconds() - 1134028003
+    return sign * order + seconds / 45000
@@ -0,0 +1,67 @@
+import csv
+import io
+import logging
+from flask import Response
+from config import Config
+from results import stream_columns
+
+# Streaming exports for /api/reports/...
+# The cursor fetches REPORT_FETCH_SIZE rows per round-trip and each batch is
+# written to the client as soon as it arrives, as NDJSON (one JSON object per
+# line), CSV, or one JSON document in the ?format=columns shape of results.py
+# (each batch encoded from its tuples in one call). Only one batch is held in
+# memory at a time, on either side of the connection, so multi-million-row
+# reports stream at constant memory.
+
+report_log = logging.getLogger('shareit.reports')
+
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv', 'columns': 'application/json'}
+
+
+def open_report(conn, query, params):
+    cursor = conn.cursor()
+    cursor.arraysize = Config.REPORT_FETCH_SIZE
+    # The first batch comes back with the execute round-trip
+    cursor.prefetchrows = Config.REPORT_FETCH_SIZE
+    cursor.execute(query, params)
+    return cursor
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def stream_report(conn, cursor, columns, fmt, name, dumps):
+    # dumps: the app's JSON encoder (object -> bytes), so NDJSON rows match
+    # the other endpoints. Takes ownership of conn and closes it when the
+    # response is done, including when the client disconnects.
+    def batches():
+        while True:
+            batch = cursor.fetchmany(Config.REPORT_FETCH_SIZE)
+            if not batch:
+                return
+            yield batch
+
+    def generate():
+        try:
+            if fmt == 'columns':
+                yield from stream_columns(batches(), columns, dumps)
+                return
+            if fmt == 'csv':
+                yield _csv_chunk([columns])
+            for batch in batches():
+                if fmt == 'csv':
+                    yield _csv_chunk(batch)
+                else:
+                    yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in batch)
+        except Exception:
+            # Headers are already sent; the client sees a truncated body
+            report_log.exception("Error streaming report %s", name)
+
+    response = Response(generate(), mimetype=FORMATS[fmt])
+    response.call_on_close(conn.close)
+    if fmt == 'csv':
+        response.headers['Content-Disposition'] = f'attachment; filename="{name}.csv"'
+    return response
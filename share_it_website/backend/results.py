@@ -0,0 +1,102 @@
+from pagination import encode_cursor
+
+# Result sets of the read endpoints: how they are fetched and how they are
+# shaped into JSON. Each query's column names sit next to it in queries.py
+# (*_COLUMNS), and the rows are turned into dicts by the driver as it fetches
+# them (cursor.rowfactory), so there is no per-route mapping loop over the
+# tuples. Page queries are fetched in a single round-trip: arraysize and
+# prefetchrows are sized to the page, the look-ahead row included.
+#
+# ?format=columns skips the dicts altogether: the body is
+# {"COLUMNS": [...], "ROWS": [[...], ...]} built from the fetched tuples,
+# which the JSON encoder writes as arrays in one pass (and which is smaller
+# on the wire, as the keys are not repeated per row).
+#
+# The default rows format is still fetched whole (fetchall) and encoded as
+# one list of dicts. These bodies are bounded: a page of at most
+# MAX_PAGE_SIZE rows, a leaderboard, the subforum list or one comment tree,
+# and the routes need them in hand anyway (look-ahead row, pending votes,
+# tree building, caching). Unbounded result sets go through /api/reports,
+# which streams every format batch by batch (reports.py).
+
+FORMATS = ('rows', 'columns')
+
+
+def parse_format(raw):
+    if raw is None or raw == '':
+        return 'rows'
+    if raw not in FORMATS:
+        raise ValueError(f"Invalid format: {raw}")
+    return raw
+
+
+def tune(cursor, rows):
+    # Fetch `rows` rows with the execute round-trip. One more than expected,
+    # so the driver also sees the end of the result without another fetch.
+    cursor.arraysize = rows + 1
+    cursor.prefetchrows = rows + 1
+
+
+def map_rows(cursor, columns):
+    # Set once the query is executed; fetches then return dicts
+    cursor.rowfactory = lambda *row: dict(zip(columns, row))
+
+
+def fetch_rows(cursor, query, params, columns, fmt='rows', rows=None, **kwargs):
+    # All rows of a query; rows: how many to expect, when it is known
+    if rows is not None:
+        tune(cursor, rows)
+    cursor.execute(query, params, **kwargs)
+    if fmt == 'rows':
+        map_rows(cursor, columns)
+    return cursor.fetchall()
+
+
+def fetch_one(cursor, query, params, columns, **kwargs):
+    tune(cursor, 1)
+    cursor.execute(query, params, **kwargs)
+    map_rows(cursor, columns)
+    return cursor.fetchone()
+
+
+def fetch_page(cursor, query, params, columns, limit, fmt='rows', **kwargs):
+    # A page query returns up to limit + 1 rows (the extra one means there is a next page)
+    return fetch_rows(cursor, query, params, columns, fmt, rows=limit + 1, **kwargs)
+
+
+def value_getter(columns, fmt):
+    # row -> value of a column, for either row shape
+    if fmt == 'rows':
+        return lambda row, column: row[column]
+    positions = {column: i for i, column in enumerate(columns)}
+    return lambda row, column: row[positions[column]]
+
+
+def split_page(rows, columns, fmt, limit, cursor_columns):
+    # (rows of the page, X-Next-Cursor or None) from what fetch_page
+    # returned; cursor_columns: the keyset of the query, in order
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    value = value_getter(columns, fmt)
+    return rows, encode_cursor(*(value(rows[-1], column) for column in cursor_columns))
+
+
+def list_body(rows, columns, fmt):
+    if fmt == 'columns':
+        return {"COLUMNS": list(columns), "ROWS": rows}
+    return rows
+
+
+def stream_columns(batches, columns, dumps):
+    # The ?format=columns body written batch by batch: each batch of tuples
+    # is encoded in one call and spliced into the ROWS array
+    yield b'{"COLUMNS":' + dumps(list(columns)) + b',"ROWS":['
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        encoded = dumps(batch)[1:-1]  # drop the list's own brackets
+        yield encoded if first else b"," + encoded
+        first = False
+    yield b"]}\n"
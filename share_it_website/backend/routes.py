@@ -1,20 +1,105 @@
-from flask import request, jsonify, session
+from flask import request, jsonify, session, Response
 from app import app
-from db import get_db_connection
-import bcrypt
+from db import get_db_connection, get_pool_stats
+from pagination import encode_cursor, decode_cursor, parse_limit, parse_preview_length, NUMBER
+from ranking import SORT_COLUMNS, SORT_KEY_TYPES, WINDOW_DAYS
+from cache import subforum_list_cache, subforum_id_cache, post_detail_cache, leaderboard_cache, cache_stats
+from vote_buffer import vote_buffer, write_votes, apply_pending_votes, pending_votes_key
+from http_cache import make_etag, matching_etag, not_modified
+from live_updates import live_updates, parse_post_ids, format_event, publish_vote_totals
+from reports import FORMATS as REPORT_FORMATS, open_report, stream_report
+from metrics import render_prometheus
+from results import parse_format, fetch_rows, fetch_one, fetch_page, split_page, list_body
+from queries import (SUBFORUM_ID_QUERY, FEED_VERSION_QUERY, SUBFORUM_VERSION_QUERY, POST_VERSION_QUERY,
+                     LOGIN_QUERY, LOGIN_COLUMNS, POST_DETAIL_QUERY, COMMENTS_QUERY, SEARCH_KINDS,
+                     REPORT_POSTS_QUERY, REPORT_POSTS_COLUMNS, REPORT_USERS_QUERY, REPORT_USERS_COLUMNS,
+                     UNREAD_COUNT_QUERY, MAILBOX_OWNER_COLUMNS, SUBFORUMS_QUERY, LEADERBOARD_QUERY,
+                     REPORT_STATUSES, MODERATED_SUBFORUMS_QUERY, MODERATED_SUBFORUMS_COLUMNS,
+                     FEED_COLUMNS, FEED_PREVIEW_COLUMNS, POST_DETAIL_COLUMNS, COMMENTS_COLUMNS, SEARCH_COLUMNS,
+                     MESSAGE_COLUMNS, SUBFORUMS_COLUMNS, MOD_QUEUE_COLUMNS, LEADERBOARD_COLUMNS, COMMENT_TREE_COLUMNS,
+                     build_feed_query, build_home_feed_query, build_search_query, search_terms,
+                     build_mailbox_query, build_thread_query, build_mod_queue_query, build_comment_tree_query)
+from passwords import hash_password, check_password, needs_rehash, rehash_password, password_stats, PasswordPoolBusy
+import datetime
 import oracledb
-
-# Helper to dictionary-ize rows (since oracledb defaults to tuples)
-def dict_factory(cursor, row):
-    d = {}
-    for idx, col in enumerate(cursor.description):
-        d[col[0]] = row[idx]
-    return d
+import threading
+
+# Oracle error numbers the write routes map to client errors
+ORA_PARENT_KEY_NOT_FOUND = 2291  # foreign key: the referenced row does not exist
+ORA_REPORTED_ITEM_NOT_FOUND = 20005  # trg_reports_subforum
+
+def db_error_code(e):
+    # ORA- number of a database error, or None
+    error = e.args[0] if isinstance(e, oracledb.DatabaseError) and e.args else None
+    return getattr(error, 'code', None)
+
+def lookup_subforum_id(cursor, name):
+    cursor.execute(SUBFORUM_ID_QUERY, [name])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def feed_version(cursor, subforum_id):
+    # Version stamp of one subforum's posts, or of all of them
+    if subforum_id is None:
+        cursor.execute(FEED_VERSION_QUERY)
+        return tuple(cursor.fetchone())
+    cursor.execute(SUBFORUM_VERSION_QUERY, [subforum_id])
+    row = cursor.fetchone()
+    return row[0] if row else None
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "ok", "mock_db": app.config['USE_MOCK_DB']})
 
+@app.route('/api/pool/stats', methods=['GET'])
+def pool_stats():
+    # Connection pool usage, for sizing ORACLE_POOL_MIN / ORACLE_POOL_MAX
+    return jsonify(get_pool_stats()), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    # Prometheus text exposition: request metrics plus pool/cache/vote-buffer/password metrics
+    pool = get_pool_stats()
+    caches = cache_stats()
+    votes = vote_buffer.stats()
+    extra = {
+        "shareit_pool_connections": ("Connection pool state.", "gauge",
+                                     {(("state", k),): pool[k] for k in ("in_use", "waiting", "created", "max")}),
+        "shareit_cache_hits_total": ("Read cache hits.", "counter",
+                                     {(("cache", n),): c["hits"] for n, c in caches.items()}),
+        "shareit_cache_misses_total": ("Read cache misses.", "counter",
+                                       {(("cache", n),): c["misses"] for n, c in caches.items()}),
+        "shareit_vote_buffer_pending": ("Votes waiting for the next flush.", "gauge", {(): votes["pending"]}),
+        "shareit_password_ops_total": ("Password hash/check operations.", "counter",
+                                       {(("op", k),): v for k, v in password_stats().items()
+                                        if k in ("hashed", "checked", "rehashed", "rejected", "timed_out")}),
+    }
+    return Response(render_prometheus(extra), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats_route():
+    # Hit/miss counters per cache; every hit is a query the DB did not run
+    return jsonify(cache_stats()), 200
+
+def parse_id(raw, name):
+    # JSON ids: numbers or numeric strings, never booleans (True == 1)
+    if isinstance(raw, bool) or not isinstance(raw, (int, str)):
+        raise ValueError(f"Invalid {name}: {raw}")
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {raw}")
+
+def parse_vote_type(raw):
+    if isinstance(raw, bool) or raw not in (1, -1, 0):
+        raise ValueError("Invalid vote_type")
+    return raw
+
+def password_pool_busy(e):
+    response = jsonify({"error": str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 429
+
 @app.route('/api/register', methods=['POST'])
 def register():
     data = request.json
@@ -25,8 +110,11 @@ def register():
     if not all([username, email, password]):
         return jsonify({"error": "Missing fields"}), 400
 
-    # Hash password
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    # Hash password (on the bounded bcrypt pool, not this request thread)
+    try:
+        hashed = hash_password(password)
+    except PasswordPoolBusy as e:
+        return password_pool_busy(e)
 
     conn = get_db_connection()
     try:
@@ -50,34 +138,17 @@ def login():
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        # In real oracledb, we need to set rowfactory to get dicts if we want easier access,
-        # but for compatibility with MockDB (which returns dicts) and real DB (which returns tuples by default),
-        # let's be explicit.
-
-        # Real DB returns tuples, so we need to map columns.
-        # However, MockDB returns list of dicts.
-
-        if app.config['USE_MOCK_DB']:
-             query = "SELECT * FROM users WHERE username = :username"
-             # MockDB execute expects named params in a dict if configured that way, or list.
-             # My MockDB implementation used params dict in execute
-             cursor.execute(query, {'username': username})
-             user = cursor.fetchone() # MockDB returns dict
-        else:
-             query = "SELECT user_id, username, password_hash, karma FROM users WHERE username = :username"
-             cursor.execute(query, [username]) # Positional or named
-             row = cursor.fetchone()
-             if row:
-                 user = {
-                     "USER_ID": row[0],
-                     "USERNAME": row[1],
-                     "PASSWORD_HASH": row[2],
-                     "KARMA": row[3]
-                 }
-             else:
-                 user = None
-
-        if user and bcrypt.checkpw(password.encode('utf-8'), user['PASSWORD_HASH'].encode('utf-8')):
+        user = fetch_one(cursor, LOGIN_QUERY, [username], LOGIN_COLUMNS)
+
+        if user and check_password(password, user['PASSWORD_HASH']):
+            # Upgrade hashes made with a different BCRYPT_ROUNDS while we have the plaintext
+            # (best-effort: with the pool busy the login goes ahead and a later one upgrades it)
+            if needs_rehash(user['PASSWORD_HASH']):
+                try:
+                    cursor.callproc('shareit_pkg.update_user_password', [user['USER_ID'], rehash_password(password)])
+                    conn.commit()
+                except PasswordPoolBusy:
+                    pass
             return jsonify({
                 "message": "Login successful",
                 "user": {
@@ -88,6 +159,8 @@ def login():
             }), 200
         else:
             return jsonify({"error": "Invalid credentials"}), 401
+    except PasswordPoolBusy as e:
+        return password_pool_busy(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
@@ -95,92 +168,140 @@ def login():
 
 @app.route('/api/posts', methods=['GET'])
 def get_posts():
-    # Get the optional query parameter
+    # Get the optional query parameters
     subforum_name = request.args.get('subforum_name')
     current_user_id = request.args.get('current_user_id')
+    sort = request.args.get('sort', 'new')
+    window = request.args.get('window', 'all')
+
+    if sort not in SORT_COLUMNS:
+        return jsonify({"error": f"Invalid sort: {sort}"}), 400
+    if window not in WINDOW_DAYS:
+        return jsonify({"error": f"Invalid window: {window}"}), 400
+    sort_col, sort_key = SORT_COLUMNS[sort]
+    window_days = WINDOW_DAYS[window]
+
+    # Keyset pagination: ?limit=N&cursor=<X-Next-Cursor from the previous page>
+    # ?preview=N returns the first N characters as PREVIEW instead of the full CONTENT_TEXT.
+    # ?format=columns sends {"COLUMNS": [...], "ROWS": [...]} (see results.py).
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor'], SORT_KEY_TYPES[sort], int) if request.args.get('cursor') else None
+        preview_len = parse_preview_length(request.args.get('preview'))
+        fmt = parse_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        if app.config['USE_MOCK_DB']:
-            # For mock DB, we can just filter in python or ignore (filtering not critical for mock here)
-            cursor.execute("SELECT * FROM posts ORDER BY created_at DESC")
-            all_posts = cursor.fetchall()
-            posts = all_posts
-            if subforum_name:
-                 # Simple mock filtering if needed, though strictly mock db might not support complex queries
-                 # But let's keep it simple and just return all or filter in python for mock
-                 pass 
-        else:
-            # 1. Base Query
-            # We need to LEFT JOIN with post_votes to get the user's vote on this post
-            # NOTE: We bind current_user_id twice if we use it in the join condition? 
-            # Or simpler: LEFT JOIN post_votes pv ON p.post_id = pv.post_id AND pv.user_id = :current_user
-            
-                
-            query = """
-                SELECT p.post_id, p.title, p.content_text, p.upvotes, p.created_at,
-                       u.username, s.name as subforum_name, p.subforum_id, p.user_id,
-                       pv.vote_type as user_vote
-                FROM posts p
-                JOIN users u ON p.user_id = u.user_id
-                JOIN subforums s ON p.subforum_id = s.subforum_id
-                LEFT JOIN post_votes pv ON p.post_id = pv.post_id AND pv.user_id = :1
-            """
-            
-            params = []
-            # We need to provide current_user_id first for the JOIN
-            # Handle case where current_user_id might be None (not logged in) -> use -1 or similar safe value
-            safe_user_id = int(current_user_id) if current_user_id else -1
-            params.append(safe_user_id)
-            
-            # 2. Add Filter if subforum_name is provided
-            if subforum_name:
-                # First check if subforum exists
-                check_query = "SELECT COUNT(*) FROM subforums WHERE name = :1"
-                cursor.execute(check_query, [subforum_name])
-                exists = cursor.fetchone()[0]
-                if exists == 0:
-                     return jsonify({"error": "Subforum not found"}), 404
-
-                query += " WHERE s.name = :2" # Parameter index 2 because :1 (current_user) is used
-                params.append(subforum_name)
-            
-            # 3. Add Order By
-            query += " ORDER BY p.created_at DESC"
-
-            with open("backend_debug.log", "a") as f:
-                f.write(f"DEBUG: Executing query with params: {params}\n")
-                cursor.execute(query, params)
-                
-                rows = cursor.fetchall()
-                f.write(f"DEBUG: Found {len(rows)} rows\n")
-            
-            posts = []
-            for r in rows:
-                content = r[2]
-                if isinstance(content, oracledb.LOB):
-                    content = content.read()
-                
-                posts.append({
-                    "POST_ID": r[0],
-                    "TITLE": r[1],
-                    "CONTENT_TEXT": content,
-                    "UPVOTES": r[3],
-                    "CREATED_AT": r[4],
-                    "USERNAME": r[5],
-                    "SUBFORUM_NAME": r[6],
-                    "SUBFORUM_ID": r[7],
-                    "USER_ID": r[8],
-                    "USER_VOTE": r[9] # NEW FIELD
-                })
-
-        return jsonify(posts), 200
+        subforum_id = None
+        if subforum_name:
+            # Resolve the name first so the feed query can filter on p.subforum_id
+            subforum_id = subforum_id_cache.get_or_load(
+                subforum_name, lambda: lookup_subforum_id(cursor, subforum_name))
+            if subforum_id is None:
+                 return jsonify({"error": "Subforum not found"}), 404
+
+        # A matching If-None-Match costs one stamp read instead of the feed
+        # query. ?window feeds change as posts age out, which no stamp
+        # records, so they are always sent in full.
+        etag = None
+        if not window_days:
+            etag = make_etag('posts', request.full_path, feed_version(cursor, subforum_id),
+                             pending_votes_key(current_user_id))
+            matched = matching_etag(request.if_none_match, etag)
+            if matched:
+                return not_modified(app.response_class, matched)
+
+        query, params = build_feed_query(current_user_id, sort_col, limit, subforum_id=subforum_id,
+                                         window_days=window_days, after=after, preview_len=preview_len)
+
+        # fetch_lobs=False returns CLOBs inline as str instead of LOB locators
+        # that would each need another round-trip to read().
+        columns = FEED_PREVIEW_COLUMNS if preview_len else FEED_COLUMNS
+        rows = fetch_page(cursor, query, params, columns, limit, fmt, fetch_lobs=False)
+        posts, next_cursor = split_page(rows, columns, fmt, limit, (sort_key, 'POST_ID'))
+
+        # The cursor for the next page travels in a header so the body stays a plain list.
+        apply_pending_votes(posts, current_user_id, columns if fmt == 'columns' else None)
+        response = jsonify(list_body(posts, columns, fmt))
+        if etag:
+            response.set_etag(etag)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except Exception as e:
+        app.logger.exception("Error fetching posts")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/feed', methods=['GET'])
+def get_home_feed():
+    # Newest posts from the subforums the user is subscribed to.
+    # Same paging (?limit, ?cursor -> X-Next-Cursor) and ?preview as /api/posts.
+    current_user_id = request.args.get('current_user_id', type=int)
+    if not current_user_id:
+        return jsonify({"error": "Missing current_user_id"}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor'], datetime.datetime, int) if request.args.get('cursor') else None
+        preview_len = parse_preview_length(request.args.get('preview'))
+        fmt = parse_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        query, params = build_home_feed_query(current_user_id, limit, after=after, preview_len=preview_len)
+        columns = FEED_PREVIEW_COLUMNS if preview_len else FEED_COLUMNS
+        rows = fetch_page(cursor, query, params, columns, limit, fmt, fetch_lobs=False)
+        posts, next_cursor = split_page(rows, columns, fmt, limit, ('CREATED_AT', 'POST_ID'))
+
+        apply_pending_votes(posts, current_user_id, columns if fmt == 'columns' else None)
+        response = jsonify(list_body(posts, columns, fmt))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except Exception as e:
+        app.logger.exception("Error fetching home feed")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    # ?q=words searches post titles/bodies and comments, best matches first.
+    # ?type=post|comment narrows it; ?limit/?cursor page through (X-Next-Cursor header).
+    terms = search_terms(request.args.get('q', ''))
+    if not terms:
+        return jsonify({"error": "Missing search query"}), 400
+    kind = request.args.get('type')
+    if kind and kind not in SEARCH_KINDS:
+        return jsonify({"error": f"Invalid type: {kind}"}), 400
+    kinds = (kind,) if kind else SEARCH_KINDS
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor'], NUMBER, str, int) if request.args.get('cursor') else None
+        fmt = parse_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        query, params = build_search_query(terms, limit, kinds=kinds, after=after)
+        rows = fetch_page(cursor, query, params, SEARCH_COLUMNS, limit, fmt)
+        results, next_cursor = split_page(rows, SEARCH_COLUMNS, fmt, limit, ('SCORE', 'TYPE', 'ID'))
+
+        response = jsonify(list_body(results, SEARCH_COLUMNS, fmt))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
     except Exception as e:
-        with open("backend_debug.log", "a") as f:
-            f.write(f"ERROR: {str(e)}\n")
-            import traceback
-            f.write(traceback.format_exc() + "\n")
+        app.logger.exception("Error searching")
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
@@ -188,83 +309,60 @@ def get_posts():
 @app.route('/api/posts/<int:post_id>', methods=['GET'])
 def get_post_details(post_id):
     current_user_id = request.args.get('current_user_id')
+
+    # Anonymous views are identical for everyone, so serve them from cache.
+    # Personalised views carry USER_VOTE and always go to the DB.
+    if not current_user_id:
+        cached = post_detail_cache.get(post_id)
+        if cached is not None:
+            etag, payload = cached
+            matched = matching_etag(request.if_none_match, etag)
+            if matched:
+                return not_modified(app.response_class, matched)
+            response = jsonify(payload)
+            response.set_etag(etag)
+            return response, 200
+
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        
+        pending = pending_votes_key(current_user_id)
+
+        # Conditional request: check the stamp before running the joins
+        if request.if_none_match:
+            cursor.execute(POST_VERSION_QUERY, [post_id])
+            row = cursor.fetchone()
+            if row:
+                etag = make_etag('post', post_id, row[0], current_user_id, pending)
+                matched = matching_etag(request.if_none_match, etag)
+                if matched:
+                    return not_modified(app.response_class, matched)
+
         # 1. Fetch Post Details
-        if app.config['USE_MOCK_DB']:
-             # Mock implementation
-             cursor.execute("SELECT * FROM posts WHERE post_id = :id", {'id': post_id})
-             # ... mock processing ...
-             post = {"POST_ID": post_id, "TITLE": "Mock Post", "CONTENT_TEXT": "Mock Content", "UPVOTES": 10, "SUBFORUM_NAME": "MockSub", "USERNAME": "MockUser", "CREATED_AT": "2024-01-01"}
-             comments = []
+        safe_user_id = int(current_user_id) if current_user_id else -1
+        # Full body, fetched inline rather than through a LOB locator
+        post = fetch_one(cursor, POST_DETAIL_QUERY, [safe_user_id, post_id], POST_DETAIL_COLUMNS,
+                         fetch_lobs=False)
+
+        if not post:
+            return jsonify({"error": "Post not found"}), 404
+        # Stamp read with the post itself; a comment added before the next
+        # query only makes the tag older than the body, never newer
+        etag = make_etag('post', post_id, post.pop('VERSION'), current_user_id, pending)
+
+        # 2. Fetch Comments
+        comments = fetch_rows(cursor, COMMENTS_QUERY, [post_id], COMMENTS_COLUMNS)
+
+        payload = {"post": post, "comments": comments}
+        if not current_user_id:
+            post_detail_cache.set(post_id, (etag, payload))
         else:
-             query = """
-                SELECT p.post_id, p.title, p.content_text, p.upvotes, p.created_at,
-                       u.username, s.name as subforum_name, p.subforum_id, p.user_id,
-                       pv.vote_type as user_vote
-                FROM posts p
-                JOIN users u ON p.user_id = u.user_id
-                JOIN subforums s ON p.subforum_id = s.subforum_id
-                LEFT JOIN post_votes pv ON p.post_id = pv.post_id AND pv.user_id = :1
-                WHERE p.post_id = :2
-            """
-             safe_user_id = int(current_user_id) if current_user_id else -1
-             cursor.execute(query, [safe_user_id, post_id])
-             row = cursor.fetchone()
-             
-             if not row:
-                 return jsonify({"error": "Post not found"}), 404
-             
-             content = row[2]
-             if isinstance(content, oracledb.LOB):
-                 content = content.read()
-
-             post = {
-                "POST_ID": row[0],
-                "TITLE": row[1],
-                "CONTENT_TEXT": content,
-                "UPVOTES": row[3],
-                "CREATED_AT": row[4],
-                "USERNAME": row[5],
-                "SUBFORUM_NAME": row[6],
-                "SUBFORUM_ID": row[7],
-                "USER_ID": row[8],
-                "USER_VOTE": row[9]
-             }
-
-             # 2. Fetch Comments
-             # Assuming comments table: comment_id, post_id, user_id, content_text, created_at
-             # And joining with users for username
-             comment_query = """
-                SELECT c.comment_id, c.content, c.created_at, u.username
-                FROM comments c
-                JOIN users u ON c.user_id = u.user_id
-                WHERE c.post_id = :post_id
-                ORDER BY c.created_at ASC
-             """
-             cursor.execute(comment_query, [post_id])
-             comment_rows = cursor.fetchall()
-             comments = []
-             for cr in comment_rows:
-                 c_text = cr[1]
-                 if isinstance(c_text, oracledb.LOB):
-                     c_text = c_text.read()
-                 
-                 comments.append({
-                     "COMMENT_ID": cr[0],
-                     "CONTENT_TEXT": c_text, # Keep key as CONTENT_TEXT for frontend compatibility
-                     "CREATED_AT": cr[2],
-                     "USERNAME": cr[3]
-                 })
-
-        return jsonify({"post": post, "comments": comments}), 200
+            apply_pending_votes([post], current_user_id)
+        response = jsonify(payload)
+        response.set_etag(etag)
+        return response, 200
     except Exception as e:
-        with open("backend_debug.log", "a") as f:
-            f.write(f"ERROR IN DETAILS: {str(e)}\n")
-            import traceback
-            f.write(traceback.format_exc() + "\n")
+        app.logger.exception("Error fetching post details")
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
@@ -302,9 +400,62 @@ def create_post():
         cursor.execute(sql, [int(user_id), int(subforum_id), title, content])
         
         conn.commit()
+        # The subforum list carries LAST_POST_AT and POST_COUNT
+        subforum_list_cache.clear()
         return jsonify({"message": "Post created"}), 201
     except Exception as e:
-        print(f"Error creating post: {e}")
+        app.logger.exception("Error creating post")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+def build_comment_tree(rows):
+    # rows: COMMENT_TREE_COLUMNS dicts in CONNECT BY pre-order, so a parent
+    # always comes before its replies.
+    nodes = {}
+    tree = []
+    for node in rows:
+        del node["ROOT_COUNT"]
+        node["REPLIES"] = []
+        # Replies below the depth limit; fetch them with ?parent_id=COMMENT_ID
+        node["MORE_REPLIES"] = node["MORE_REPLIES"] or 0
+        nodes[node["COMMENT_ID"]] = node
+        parent = nodes.get(node["PARENT_COMMENT_ID"])
+        if parent is not None:
+            parent["REPLIES"].append(node)
+        else:
+            tree.append(node)
+    return tree
+
+@app.route('/api/posts/<int:post_id>/comments', methods=['GET'])
+def get_comment_tree(post_id):
+    # ?parent_id=X returns the replies under comment X ("continue this thread"),
+    # otherwise the top-level comments. ?depth limits how many levels come back;
+    # ?limit/?cursor page through the starting comments (X-Next-Cursor header).
+    parent_id = request.args.get('parent_id', type=int)
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor'], datetime.datetime, int) if request.args.get('cursor') else None
+        depth = int(request.args.get('depth', app.config['COMMENT_TREE_DEPTH']))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    depth = max(1, min(depth, app.config['MAX_COMMENT_TREE_DEPTH']))
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        query, params = build_comment_tree_query(post_id, depth, limit, parent_id=parent_id, after=after)
+        rows = fetch_rows(cursor, query, params, COMMENT_TREE_COLUMNS, rows=app.config['COMMENT_TREE_FETCH_SIZE'])
+        more = bool(rows) and rows[0]["ROOT_COUNT"] > limit
+
+        tree = build_comment_tree(rows)
+        response = jsonify(tree)
+        if more:
+            last = tree[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(last['CREATED_AT'], last['COMMENT_ID'])
+        return response, 200
+    except Exception as e:
+        app.logger.exception("Error fetching comment tree")
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
@@ -336,12 +487,11 @@ def create_comment(post_id):
         """
         cursor.execute(sql, [post_id, int(user_id), content, parent_comment_id])
         conn.commit()
+        post_detail_cache.invalidate(post_id)
+        live_updates.publish_comment(post_id)
         return jsonify({"message": "Comment created"}), 201
     except Exception as e:
-        with open("backend_debug.log", "a") as f:
-            f.write(f"ERROR COMMENTING: {str(e)}\n")
-            import traceback
-            f.write(traceback.format_exc() + "\n")
+        app.logger.exception("Error creating comment")
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
@@ -362,35 +512,53 @@ def subscribe_subforum(subforum_id):
         conn.commit()
         return jsonify({"message": "Subscribed successfully"}), 200
     except Exception as e:
-        print(f"Error subscribing: {e}")
+        app.logger.exception("Error subscribing")
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
 
 @app.route('/api/subforums', methods=['GET'])
 def get_subforums():
+    cached = subforum_list_cache.get('all')
+    if cached is not None:
+        return jsonify(cached), 200
+
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        if app.config['USE_MOCK_DB']:
-            cursor.execute("SELECT * FROM subforums")
-            subs = cursor.fetchall()
-        else:
-            cursor.execute("SELECT subforum_id, name, description FROM subforums")
-            rows = cursor.fetchall()
-            subs = []
-            for r in rows:
-                subs.append({
-                    "SUBFORUM_ID": r[0],
-                    "NAME": r[1],
-                    "DESCRIPTION": r[2]
-                })
+        subs = fetch_rows(cursor, SUBFORUMS_QUERY, None, SUBFORUMS_COLUMNS)
+        subforum_list_cache.set('all', subs)
         return jsonify(subs), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
 
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    # Top ?limit users by karma (default LEADERBOARD_SIZE)
+    try:
+        limit = parse_limit(request.args.get('limit'), default=app.config['LEADERBOARD_SIZE'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    cached = leaderboard_cache.get(limit)
+    if cached is not None:
+        return jsonify(cached), 200
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        leaders = fetch_rows(cursor, LEADERBOARD_QUERY, {"limit": limit}, LEADERBOARD_COLUMNS, rows=limit)
+        for rank, leader in enumerate(leaders, 1):
+            leader["RANK"] = rank
+        leaderboard_cache.set(limit, leaders)
+        return jsonify(leaders), 200
+    except Exception as e:
+        app.logger.exception("Error fetching leaderboard")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
 @app.route('/api/posts/<int:post_id>/vote', methods=['POST'])
 def vote_post(post_id):
     data = request.json
@@ -399,6 +567,16 @@ def vote_post(post_id):
 
     if user_id is None or vote_type is None:
         return jsonify({"error": "Missing fields"}), 400
+    try:
+        user_id = parse_id(user_id, 'user_id')
+        vote_type = parse_vote_type(vote_type)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Buffered: collapsed with any repeat clicks and written by the next flush
+    if app.config['VOTE_BUFFER_ENABLED']:
+        vote_buffer.submit(user_id, post_id, vote_type)
+        return jsonify({"message": "Vote cast"}), 200
 
     conn = get_db_connection()
     try:
@@ -406,12 +584,360 @@ def vote_post(post_id):
         # Machine overload: vote_post(p_user_id, p_post_id, p_vote_type)
         cursor.callproc('shareit_pkg.vote_post', [user_id, post_id, vote_type])
         conn.commit()
+        post_detail_cache.invalidate(post_id)
+        publish_vote_totals(cursor, [post_id])
         return jsonify({"message": "Vote cast"}), 200
     except Exception as e:
-        with open("backend_debug.log", "a") as f:
-            f.write(f"ERROR: {str(e)}\n")
-            import traceback
-            f.write(traceback.format_exc() + "\n")
+        app.logger.exception("Error casting vote")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/votes/batch', methods=['POST'])
+def vote_batch():
+    # Body: {"votes": [{"user_id": 1, "post_id": 2, "vote_type": 1}, ...]}
+    data = request.json
+    votes = data.get('votes') if data else None
+
+    if not isinstance(votes, list) or not votes:
+        return jsonify({"error": "Missing votes"}), 400
+
+    # Later entries win, same as repeated single votes
+    collapsed = {}
+    for v in votes:
+        if not isinstance(v, dict) or None in (v.get('user_id'), v.get('post_id'), v.get('vote_type')):
+            return jsonify({"error": "Missing fields"}), 400
+        try:
+            key = (parse_id(v['user_id'], 'user_id'), parse_id(v['post_id'], 'post_id'))
+            collapsed[key] = parse_vote_type(v['vote_type'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    if app.config['VOTE_BUFFER_ENABLED']:
+        for (user_id, post_id), vote_type in collapsed.items():
+            vote_buffer.submit(user_id, post_id, vote_type)
+        return jsonify({"message": "Votes cast", "count": len(collapsed)}), 200
+
+    try:
+        # Votes for posts or users that no longer exist are not cast
+        rejected = write_votes(collapsed)
+        return jsonify({"message": "Votes cast", "count": len(collapsed) - rejected, "rejected": rejected}), 200
+    except Exception as e:
+        app.logger.exception("Error casting votes")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/votes/stats', methods=['GET'])
+def vote_buffer_stats():
+    return jsonify(vote_buffer.stats()), 200
+
+@app.route('/api/live', methods=['GET'])
+def live_stream():
+    # Server-Sent Events for ?posts=1,2,3: one "post" event per changed post
+    # per LIVE_UPDATE_INTERVAL with UPVOTES (and DELTA) and/or NEW_COMMENTS
+    try:
+        post_ids = parse_post_ids(request.args.get('posts'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    wakeup = threading.Event()
+    sub = live_updates.subscribe(post_ids, wakeup.set)
+    if sub is None:
+        return jsonify({"error": "Too many live streams, try again later"}), 503
+    dumps = app.json.dumps_bytes
+    heartbeat = app.config['LIVE_HEARTBEAT_SECONDS']
+
+    def stream():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                # The keep-alive also finds closed clients: the write fails
+                # and the server closes this generator
+                if not wakeup.wait(heartbeat):
+                    yield b": keep-alive\n\n"
+                    continue
+                wakeup.clear()
+                for update in sub.drain():
+                    yield format_event(update, dumps)
+        finally:
+            live_updates.unsubscribe(sub)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/live/stats', methods=['GET'])
+def live_stats():
+    return jsonify(live_updates.stats()), 200
+
+def report_route(name, query, columns, params):
+    # ?format=ndjson (default) or csv; the body streams as rows are fetched
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in REPORT_FORMATS:
+        return jsonify({"error": f"Invalid format: {fmt}"}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = open_report(conn, query, params)
+    except Exception as e:
+        conn.close()
+        app.logger.exception("Error running report %s", name)
+        return jsonify({"error": str(e)}), 500
+    return stream_report(conn, cursor, columns, fmt, name, app.json.dumps_bytes)
+
+@app.route('/api/reports/posts', methods=['GET'])
+def report_posts():
+    # ?min_upvotes=N&subforum_name=X, most upvoted first
+    try:
+        min_upvotes = int(request.args.get('min_upvotes', 0))
+    except ValueError:
+        return jsonify({"error": "Invalid min_upvotes"}), 400
+    params = {"min_upvotes": min_upvotes, "subforum_name": request.args.get('subforum_name')}
+    return report_route('posts_report', REPORT_POSTS_QUERY, REPORT_POSTS_COLUMNS, params)
+
+@app.route('/api/reports/users', methods=['GET'])
+def report_users():
+    # ?min_karma=N, highest karma first
+    try:
+        min_karma = int(request.args.get('min_karma', 0))
+    except ValueError:
+        return jsonify({"error": "Invalid min_karma"}), 400
+    return report_route('user_karma_report', REPORT_USERS_QUERY, REPORT_USERS_COLUMNS, {"min_karma": min_karma})
+
+def message_page(build_query, *args):
+    # Shared paging for the message lists: ?limit/?cursor -> X-Next-Cursor
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor'], datetime.datetime, int) if request.args.get('cursor') else None
+        fmt = parse_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        query, params = build_query(*args, limit, after=after)
+        rows = fetch_page(cursor, query, params, MESSAGE_COLUMNS, limit, fmt)
+        messages, next_cursor = split_page(rows, MESSAGE_COLUMNS, fmt, limit, ('SENT_AT', 'MESSAGE_ID'))
+
+        response = jsonify(list_body(messages, MESSAGE_COLUMNS, fmt))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except Exception as e:
+        app.logger.exception("Error fetching messages")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/messages/<box>', methods=['GET'])
+def get_mailbox(box):
+    # Received (inbox) or sent messages of ?current_user_id, newest first
+    current_user_id = request.args.get('current_user_id', type=int)
+    if box not in MAILBOX_OWNER_COLUMNS:
+        return jsonify({"error": "Not found"}), 404
+    if not current_user_id:
+        return jsonify({"error": "Missing current_user_id"}), 400
+    return message_page(build_mailbox_query, box, current_user_id)
+
+@app.route('/api/messages/thread/<int:other_user_id>', methods=['GET'])
+def get_message_thread(other_user_id):
+    # Messages between ?current_user_id and other_user_id, both directions, newest first
+    current_user_id = request.args.get('current_user_id', type=int)
+    if not current_user_id:
+        return jsonify({"error": "Missing current_user_id"}), 400
+    return message_page(build_thread_query, current_user_id, other_user_id)
+
+@app.route('/api/messages/unread', methods=['GET'])
+def get_unread_count():
+    # Badge count for polling: a primary-key read of users.unread_messages
+    current_user_id = request.args.get('current_user_id', type=int)
+    if not current_user_id:
+        return jsonify({"error": "Missing current_user_id"}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(UNREAD_COUNT_QUERY, [current_user_id])
+        row = cursor.fetchone()
+        if not row:
+            return jsonify({"error": "User not found"}), 404
+        return jsonify({"UNREAD": row[0]}), 200
+    except Exception as e:
+        app.logger.exception("Error fetching unread count")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/messages', methods=['POST'])
+def send_message():
+    data = request.json
+    sender_id = data.get('sender_id')
+    receiver_id = data.get('receiver_id')
+    subject = data.get('subject')
+    body = data.get('body')
+
+    if not all([sender_id, receiver_id, body]):
+        return jsonify({"error": "Missing fields"}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # send_message(p_sender_id, p_receiver_id, p_subject, p_body)
+        cursor.callproc('shareit_pkg.send_message', [int(sender_id), int(receiver_id), subject, body])
+        conn.commit()
+        return jsonify({"message": "Message sent"}), 201
+    except oracledb.DatabaseError as e:
+        if db_error_code(e) == ORA_PARENT_KEY_NOT_FOUND:
+            return jsonify({"error": "Sender or receiver not found"}), 404
+        app.logger.exception("Error sending message")
+        return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        app.logger.exception("Error sending message")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/messages/read', methods=['POST'])
+def mark_messages_read():
+    # Body: {"user_id": 1, "message_ids": [3, 4, ...]} or {"user_id": 1, "all": true}
+    data = request.json or {}
+    user_id = data.get('user_id')
+    message_ids = data.get('message_ids')
+
+    if not user_id:
+        return jsonify({"error": "Missing user_id"}), 400
+    if not data.get('all') and (not isinstance(message_ids, list) or not message_ids
+                                or not all(isinstance(m, int) for m in message_ids)):
+        return jsonify({"error": "Missing message_ids"}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        if data.get('all'):
+            cursor.callproc('shareit_pkg.mark_all_messages_read', [int(user_id)])
+        else:
+            # One array bind, one UPDATE statement (FORALL) for the whole list
+            cursor.callproc('shareit_pkg.mark_messages_read',
+                            [int(user_id), cursor.arrayvar(oracledb.NUMBER, message_ids)])
+        conn.commit()
+        return jsonify({"message": "Messages marked read"}), 200
+    except Exception as e:
+        app.logger.exception("Error marking messages read")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/moderation/reports', methods=['POST'])
+def report_item():
+    # Body: {"reporter_id": 1, "post_id": 2, "reason": "..."} or "comment_id" instead of "post_id"
+    data = request.json or {}
+    reporter_id = data.get('reporter_id')
+    post_id = data.get('post_id')
+    comment_id = data.get('comment_id')
+    reason = data.get('reason')
+
+    if not reporter_id or not reason or not (post_id or comment_id):
+        return jsonify({"error": "Missing fields"}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # report_item(p_reporter_id, p_post_id, p_comment_id, p_reason)
+        cursor.callproc('shareit_pkg.report_item', [int(reporter_id), int(post_id) if post_id else None,
+                                                    int(comment_id) if comment_id else None, reason])
+        conn.commit()
+        return jsonify({"message": "Report filed"}), 201
+    except oracledb.DatabaseError as e:
+        code = db_error_code(e)
+        if code == ORA_REPORTED_ITEM_NOT_FOUND:
+            return jsonify({"error": "Post or comment not found"}), 404
+        if code == ORA_PARENT_KEY_NOT_FOUND:
+            return jsonify({"error": "Reporter not found"}), 400
+        app.logger.exception("Error filing report")
+        return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        app.logger.exception("Error filing report")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/moderation/subforums', methods=['GET'])
+def get_moderated_subforums():
+    # Subforums ?current_user_id moderates, with their open report counts
+    current_user_id = request.args.get('current_user_id', type=int)
+    if not current_user_id:
+        return jsonify({"error": "Missing current_user_id"}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        return jsonify(fetch_rows(cursor, MODERATED_SUBFORUMS_QUERY, [current_user_id],
+                                  MODERATED_SUBFORUMS_COLUMNS)), 200
+    except Exception as e:
+        app.logger.exception("Error fetching moderated subforums")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/moderation/queue', methods=['GET'])
+def get_moderation_queue():
+    # Reports in the subforums ?current_user_id moderates (or only
+    # ?subforum_id), oldest first; ?status defaults to OPEN
+    current_user_id = request.args.get('current_user_id', type=int)
+    subforum_id = request.args.get('subforum_id', type=int)
+    status = request.args.get('status', 'OPEN').upper()
+    if not current_user_id:
+        return jsonify({"error": "Missing current_user_id"}), 400
+    if status not in REPORT_STATUSES:
+        return jsonify({"error": f"Invalid status: {status}"}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor'], datetime.datetime, int) if request.args.get('cursor') else None
+        fmt = parse_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        query, params = build_mod_queue_query(current_user_id, status, limit, subforum_id=subforum_id, after=after)
+        rows = fetch_page(cursor, query, params, MOD_QUEUE_COLUMNS, limit, fmt)
+        reports, next_cursor = split_page(rows, MOD_QUEUE_COLUMNS, fmt, limit, ('REPORTED_AT', 'REPORT_ID'))
+
+        response = jsonify(list_body(reports, MOD_QUEUE_COLUMNS, fmt))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except Exception as e:
+        app.logger.exception("Error fetching moderation queue")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+@app.route('/api/moderation/reports/close', methods=['POST'])
+def close_reports():
+    # Body: {"moderator_id": 2, "report_ids": [3, 4, ...], "status": "RESOLVED" | "DISMISSED"}
+    data = request.json or {}
+    moderator_id = data.get('moderator_id')
+    report_ids = data.get('report_ids')
+    status = str(data.get('status', '')).upper()
+
+    if not moderator_id:
+        return jsonify({"error": "Missing moderator_id"}), 400
+    if not isinstance(report_ids, list) or not report_ids or not all(isinstance(r, int) for r in report_ids):
+        return jsonify({"error": "Missing report_ids"}), 400
+    if status not in ('RESOLVED', 'DISMISSED'):
+        return jsonify({"error": f"Invalid status: {status}"}), 400
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # One array bind, one UPDATE statement (FORALL) for the whole batch
+        cursor.callproc('shareit_pkg.set_reports_status',
+                        [int(moderator_id), cursor.arrayvar(oracledb.NUMBER, report_ids), status])
+        conn.commit()
+        return jsonify({"message": f"Reports {status.lower()}"}), 200
+    except Exception as e:
+        app.logger.exception("Error closing reports")
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
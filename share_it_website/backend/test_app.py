@@ -1,7 +1,16 @@
 import unittest
+import gzip
 import json
+import threading
+import time
 from app import app
-from db import get_db_connection
+from config import Config
+from db import get_db_connection, MockDB
+import passwords
+from passwords import hash_cost
+from vote_buffer import vote_buffer
+from live_updates import live_updates
+from pagination import encode_cursor
 
 class BackendTestCase(unittest.TestCase):
     def setUp(self):
@@ -15,6 +24,22 @@ class BackendTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json['mock_db'], True)
 
+    def test_pool_stats(self):
+        response = self.app.get('/api/pool/stats')
+        self.assertEqual(response.status_code, 200)
+        for key in ('in_use', 'waiting', 'created', 'max'):
+            self.assertIn(key, response.json)
+
+    def test_metrics(self):
+        self.app.get('/api/posts')
+        response = self.app.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertIn('shareit_request_duration_seconds_bucket{method="GET",route="/api/posts"', body)
+        self.assertIn('shareit_request_queries_total{method="GET",route="/api/posts"}', body)
+        self.assertIn('# TYPE shareit_cache_hits_total counter', body)
+        self.assertIn('# TYPE shareit_vote_buffer_pending gauge', body)
+
     def test_get_posts(self):
         response = self.app.get('/api/posts')
         self.assertEqual(response.status_code, 200)
@@ -23,6 +48,49 @@ class BackendTestCase(unittest.TestCase):
         self.assertTrue(len(data) > 0)
         self.assertIn('TITLE', data[0])
 
+    def test_get_posts_keyset_pagination(self):
+        first = self.app.get('/api/posts?limit=1')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json), 1)
+        cursor = first.headers.get('X-Next-Cursor')
+        self.assertIsNotNone(cursor)
+
+        second = self.app.get(f'/api/posts?limit=1&cursor={cursor}')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json), 1)
+        self.assertNotEqual(first.json[0]['POST_ID'], second.json[0]['POST_ID'])
+
+    def test_get_posts_bad_cursor(self):
+        response = self.app.get('/api/posts?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        # Well-formed tokens that do not fit the query's key
+        for url in ('/api/posts?sort=top&cursor=' + encode_cursor(1),
+                    '/api/posts?sort=top&cursor=' + encode_cursor("x", "y"),
+                    '/api/posts/1/comments?cursor=' + encode_cursor(1, 2),
+                    '/api/search?q=database&cursor=' + encode_cursor(1, 2),
+                    '/api/messages/inbox?current_user_id=1&cursor=' + encode_cursor("x", 1),
+                    '/api/moderation/queue?current_user_id=2&cursor=' + encode_cursor(True, 1)):
+            self.assertEqual(self.app.get(url).status_code, 400, url)
+        # A ?sort=new cursor reused with ?sort=top
+        cursor = self.app.get('/api/posts?limit=1').headers['X-Next-Cursor']
+        self.assertEqual(self.app.get('/api/posts?sort=top&cursor=' + cursor).status_code, 400)
+
+    def test_get_posts_preview(self):
+        response = self.app.get('/api/posts?preview=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('CONTENT_TEXT', response.json[0])
+        self.assertLessEqual(len(response.json[0]['PREVIEW']), 5)
+
+    def test_get_posts_sorted_by_top(self):
+        response = self.app.get('/api/posts?sort=top&window=week')
+        self.assertEqual(response.status_code, 200)
+        scores = [p['UPVOTES'] for p in response.json]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_get_posts_invalid_sort(self):
+        response = self.app.get('/api/posts?sort=best')
+        self.assertEqual(response.status_code, 400)
+
     def test_get_subforums(self):
         response = self.app.get('/api/subforums')
         self.assertEqual(response.status_code, 200)
@@ -30,6 +98,172 @@ class BackendTestCase(unittest.TestCase):
         self.assertTrue(len(data) > 0)
         self.assertEqual(data[0]['NAME'], 'general')
 
+    def test_post_detail_cache(self):
+        before = self.app.get('/api/cache/stats').json['post_detail']['hits']
+        self.app.get('/api/posts/1')
+        self.app.get('/api/posts/1')
+        after = self.app.get('/api/cache/stats').json['post_detail']['hits']
+        self.assertGreaterEqual(after - before, 1)
+
+        # A vote invalidates the cached detail once it is written
+        self.app.post('/api/posts/1/vote',
+                      data=json.dumps({"user_id": 1, "vote_type": 1}),
+                      content_type='application/json')
+        vote_buffer.flush()
+        self.app.get('/api/posts/1')
+        self.assertEqual(self.app.get('/api/cache/stats').json['post_detail']['hits'], after)
+
+    def test_feed_etag(self):
+        res = self.app.get('/api/posts?subforum_name=general')
+        etag = res.headers['ETag']
+        again = self.app.get('/api/posts?subforum_name=general', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b'')
+
+        # A new post bumps the subforum's version stamp
+        self.app.post('/api/posts', data=json.dumps({"user_id": 1, "subforum_id": 1, "title": "Etag",
+                                                      "content": "bump"}), content_type='application/json')
+        res = self.app.get('/api/posts?subforum_name=general', headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers['ETag'], etag)
+        self.assertNotIn('ETag', self.app.get('/api/posts?window=week').headers)
+
+    def test_post_detail_etag(self):
+        etag = self.app.get('/api/posts/2?current_user_id=1').headers['ETag']
+        res = self.app.get('/api/posts/2?current_user_id=1', headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 304)
+
+        # The user's own buffered vote changes their view before it is written
+        self.app.post('/api/posts/2/vote', data=json.dumps({"user_id": 1, "vote_type": 1}),
+                      content_type='application/json')
+        res = self.app.get('/api/posts/2?current_user_id=1', headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 200)
+        vote_buffer.flush()
+        self.assertNotEqual(self.app.get('/api/posts/2?current_user_id=1').headers['ETag'], etag)
+
+    def test_compression(self):
+        # The mock feed is small; compress anything but the health check
+        min_size, Config.COMPRESS_MIN_SIZE = Config.COMPRESS_MIN_SIZE, 100
+        self.addCleanup(setattr, Config, 'COMPRESS_MIN_SIZE', min_size)
+        res = self.app.get('/api/posts?limit=100', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(res.headers.get('Content-Encoding'), 'gzip')
+        self.assertTrue(res.headers['ETag'].endswith('-gzip"'))
+        posts = json.loads(gzip.decompress(res.data))
+        self.assertEqual(posts, self.app.get('/api/posts?limit=100').json)
+        # Small bodies are not worth it
+        self.assertNotIn('Content-Encoding', self.app.get('/api/health', headers={'Accept-Encoding': 'gzip'}).headers)
+        self.assertEqual(self.app.get('/api/posts?limit=100', headers={
+            'If-None-Match': res.headers['ETag'], 'Accept-Encoding': 'gzip'}).status_code, 304)
+
+    def test_json_dates_match_flask(self):
+        import datetime
+        from flask.json.provider import DefaultJSONProvider
+        from json_provider import FastJSONProvider
+        value = {"b": datetime.datetime(2024, 2, 29, 13, 5, 9), "a": [datetime.date(2023, 1, 1), 1.5, None]}
+        self.assertEqual(FastJSONProvider(app).dumps(value),
+                         DefaultJSONProvider(app).dumps(value, separators=(",", ":")))
+
+    def test_vote_batch_collapses_repeats(self):
+        votes = [
+            {"user_id": 1, "post_id": 2, "vote_type": 1},
+            {"user_id": 1, "post_id": 2, "vote_type": -1},
+            {"user_id": 2, "post_id": 2, "vote_type": 1},
+        ]
+        res = self.app.post('/api/votes/batch',
+                            data=json.dumps({"votes": votes}),
+                            content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json['count'], 2)
+        self.assertEqual(vote_buffer.pending_for_user(1).get(2), -1)
+        vote_buffer.flush()
+        self.assertEqual(vote_buffer.stats()['pending'], 0)
+
+    def test_vote_flush_drops_rejected_votes(self):
+        # A vote for a missing post is dropped, not requeued; the rest are written
+        before = vote_buffer.stats()
+        vote_buffer.submit(1, 987654, 1)
+        vote_buffer.submit(2, 1, 1)
+        self.assertEqual(vote_buffer.flush(), 1)
+        stats = vote_buffer.stats()
+        self.assertEqual(stats['rejected'], before['rejected'] + 1)
+        self.assertEqual(stats['errors'], before['errors'])
+        self.assertEqual(stats['pending'], 0)
+
+    def test_vote_invalid_type(self):
+        res = self.app.post('/api/posts/1/vote',
+                            data=json.dumps({"user_id": 1, "vote_type": 5}),
+                            content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        for body in ({"user_id": 1, "vote_type": True}, {"user_id": "abc", "vote_type": 1}):
+            res = self.app.post('/api/posts/1/vote', data=json.dumps(body), content_type='application/json')
+            self.assertEqual(res.status_code, 400, body)
+        for vote in ({"user_id": 1, "post_id": "x", "vote_type": 1}, {"user_id": 1, "post_id": 2, "vote_type": False}):
+            res = self.app.post('/api/votes/batch', data=json.dumps({"votes": [vote]}),
+                                content_type='application/json')
+            self.assertEqual(res.status_code, 400, vote)
+
+    def test_vote_batch_reports_rejected(self):
+        # Written directly: votes for missing posts are not counted as cast
+        original = app.config['VOTE_BUFFER_ENABLED']
+        app.config['VOTE_BUFFER_ENABLED'] = False
+        try:
+            votes = [{"user_id": 1, "post_id": 987654, "vote_type": 1}, {"user_id": 2, "post_id": 1, "vote_type": 1}]
+            res = self.app.post('/api/votes/batch', data=json.dumps({"votes": votes}),
+                                content_type='application/json')
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual((res.json['count'], res.json['rejected']), (1, 1))
+        finally:
+            app.config['VOTE_BUFFER_ENABLED'] = original
+
+    def test_get_comment_tree(self):
+        response = self.app.get('/api/posts/1/comments?depth=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(isinstance(response.json, list))
+
+    def test_comment_tree_after_create(self):
+        def post_comment(body):
+            return self.app.post('/api/posts/2/comments', data=json.dumps(body), content_type='application/json')
+
+        self.assertEqual(post_comment({"user_id": 1, "content": "tree root"}).status_code, 201)
+        root_id = MockDB.store.sequences['comments']
+        post_comment({"user_id": 2, "content": "tree reply", "parent_comment_id": root_id})
+        post_comment({"user_id": 1, "content": "tree deep", "parent_comment_id": root_id + 1})
+
+        tree = self.app.get('/api/posts/2/comments?depth=2').json
+        root = next(c for c in tree if c['COMMENT_ID'] == root_id)
+        self.assertEqual(root['REPLIES'][0]['CONTENT_TEXT'], "tree reply")
+        self.assertEqual(root['REPLIES'][0]['MORE_REPLIES'], 1)
+        detail = self.app.get('/api/posts/2').json
+        self.assertIn("tree deep", [c['CONTENT_TEXT'] for c in detail['comments']])
+
+    def test_mock_store_vote_reorders_top(self):
+        from mock_db import MockStore, _seed
+        store = _seed(MockStore())
+        store.vote(1, 1, 1)
+        self.assertEqual(store.posts[1].upvotes, 6)
+        store.vote(1, 1, -1)  # upsert, not a second vote
+        self.assertEqual(store.posts[1].upvotes, 4)
+        for user_id in range(3, 30):
+            store.add_user(f"voter{user_id}", f"voter{user_id}@example.com", "x")
+            store.vote(user_id, 1, 1)
+        top, _ = store.indexes['p.upvotes']
+        self.assertEqual(list(top.descending())[:2], [1, 2])
+        self.assertEqual(self.app.get('/api/posts/9999').status_code, 404)
+
+    def test_build_comment_tree(self):
+        from routes import build_comment_tree
+        from queries import COMMENT_TREE_COLUMNS
+        rows = [dict(zip(COMMENT_TREE_COLUMNS, r)) for r in [
+            (1, None, "root", None, "jdoe", 1, None, 2),
+            (2, 1, "reply", None, "admin", 2, None, 2),
+            (3, 2, "deep", None, "jdoe", 3, 4, 2),
+            (4, None, "second root", None, "admin", 1, None, 2),
+        ]]
+        tree = build_comment_tree(rows)
+        self.assertEqual([c['COMMENT_ID'] for c in tree], [1, 4])
+        self.assertEqual(tree[0]['REPLIES'][0]['REPLIES'][0]['MORE_REPLIES'], 4)
+        self.assertNotIn('ROOT_COUNT', tree[1])
+
     def test_register_login_flow(self):
         # Register
         user_data = {
@@ -53,6 +287,309 @@ class BackendTestCase(unittest.TestCase):
         self.assertEqual(res_login.status_code, 200)
         self.assertEqual(res_login.json['user']['username'], 'testuser')
 
+    def test_login_rehashes_on_cost_change(self):
+        original = Config.BCRYPT_ROUNDS
+        try:
+            Config.BCRYPT_ROUNDS = 4
+            user_data = {"username": "rehash_user", "email": "rehash@example.com", "password": "pw"}
+            self.app.post('/api/register', data=json.dumps(user_data), content_type='application/json')
+
+            Config.BCRYPT_ROUNDS = 5
+            res = self.app.post('/api/login',
+                                data=json.dumps({"username": "rehash_user", "password": "pw"}),
+                                content_type='application/json')
+            self.assertEqual(res.status_code, 200)
+            stored = MockDB.store.users_by_name['rehash_user']
+            self.assertEqual(hash_cost(stored.password_hash), 5)
+        finally:
+            Config.BCRYPT_ROUNDS = original
+
+    def test_password_timeouts(self):
+        # A hash still running after BCRYPT_TIMEOUT: register answers 429, login
+        # skips the cost upgrade and still succeeds
+        original = (Config.BCRYPT_ROUNDS, Config.BCRYPT_TIMEOUT, passwords.bcrypt.hashpw)
+        real_hashpw = passwords.bcrypt.hashpw
+        try:
+            Config.BCRYPT_ROUNDS = 4
+            user_data = {"username": "slow_user", "email": "slow@example.com", "password": "pw"}
+            self.app.post('/api/register', data=json.dumps(user_data), content_type='application/json')
+
+            Config.BCRYPT_ROUNDS, Config.BCRYPT_TIMEOUT = 5, 0.01
+            passwords.bcrypt.hashpw = lambda *args: time.sleep(0.1) or real_hashpw(*args)
+            user_data = {"username": "slow_user2", "email": "slow2@example.com", "password": "pw"}
+            res = self.app.post('/api/register', data=json.dumps(user_data), content_type='application/json')
+            self.assertEqual(res.status_code, 429)
+
+            res = self.app.post('/api/login', data=json.dumps({"username": "slow_user", "password": "pw"}),
+                                content_type='application/json')
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(hash_cost(MockDB.store.users_by_name['slow_user'].password_hash), 4)
+        finally:
+            Config.BCRYPT_ROUNDS, Config.BCRYPT_TIMEOUT, passwords.bcrypt.hashpw = original
+
+    def test_register_busy_returns_429(self):
+        original = passwords._slots
+        passwords._slots = threading.BoundedSemaphore(1)
+        passwords._slots.acquire()
+        try:
+            user_data = {"username": "busy", "email": "busy@example.com", "password": "pw"}
+            res = self.app.post('/api/register', data=json.dumps(user_data), content_type='application/json')
+            self.assertEqual(res.status_code, 429)
+            self.assertIn('Retry-After', res.headers)
+        finally:
+            passwords._slots = original
+
+    def test_asgi_routes_to_flask_in_mock_mode(self):
+        import asgi
+        scope = {'type': 'http', 'path': '/api/posts/1', 'method': 'GET'}
+        self.assertFalse(asgi._served_async(scope))
+        original = Config.USE_MOCK_DB
+        Config.USE_MOCK_DB = False
+        try:
+            self.assertTrue(asgi._served_async(scope))
+            self.assertFalse(asgi._served_async({'type': 'http', 'path': '/api/posts', 'method': 'POST'}))
+        finally:
+            Config.USE_MOCK_DB = original
+
+    def test_asgi_get_posts(self):
+        # The async feed route, with the async pool replaced by the mock DB
+        import asyncio
+        import asgi
+        from results import map_rows
+
+        def run(query, params, columns, fetch):
+            cursor = MockDB()
+            cursor.execute(query, params)
+            if columns is not None:
+                map_rows(cursor, columns)
+            return fetch(cursor)
+
+        async def fetch_one(query, params, columns=None, **kwargs):
+            return run(query, params, columns, MockDB.fetchone)
+
+        async def fetch_all(query, params, columns=None, rows=None, **kwargs):
+            return run(query, params, columns, MockDB.fetchall)
+
+        async def get(path):
+            res = await asgi.async_app.test_client().get(path)
+            return res.status_code, await res.get_json(), res.headers
+
+        original = asgi.fetch_one, asgi.fetch_all
+        asgi.fetch_one, asgi.fetch_all = fetch_one, fetch_all
+        try:
+            status, posts, headers = asyncio.run(get('/api/posts?limit=1'))
+            self.assertEqual(status, 200)
+            self.assertEqual(len(posts), 1)
+            self.assertIn('ETag', headers)
+            status, body, _ = asyncio.run(get('/api/posts?sort=top&format=columns&subforum_name=news'))
+            self.assertEqual(status, 200)
+            self.assertTrue(all(dict(zip(body['COLUMNS'], r))['SUBFORUM_NAME'] == 'news' for r in body['ROWS']))
+        finally:
+            asgi.fetch_one, asgi.fetch_all = original
+
+    def test_home_feed_only_subscribed(self):
+        res = self.app.get('/api/feed?current_user_id=1')
+        self.assertEqual(json.loads(res.data), [])
+
+        self.app.post('/api/subforums/2/subscribe', data=json.dumps({"user_id": 1}), content_type='application/json')
+        res = self.app.get('/api/feed?current_user_id=1&preview=3')
+        self.assertEqual(res.status_code, 200)
+        posts = json.loads(res.data)
+        self.assertEqual([p['SUBFORUM_ID'] for p in posts], [2])
+        self.assertEqual(posts[0]['PREVIEW'], 'Som')
+
+        self.assertEqual(self.app.get('/api/feed').status_code, 400)
+
+    def test_dataset_generator(self):
+        from benchmarks.dataset import Dataset
+        make = lambda: Dataset(users=50, subforums=5, posts=100, comments=300, votes=400,
+                               subscriptions_per_user=3, id_offsets={"posts": 10})
+        dataset = make()
+        self.assertEqual(list(dataset.posts()), list(make().posts()))
+
+        votes = [(v[0], v[1]) for v in dataset.post_votes()]
+        self.assertEqual(len(votes), len(set(votes)))
+        self.assertTrue(all(11 <= post_id <= 110 for _, post_id in votes))
+
+        seen = set()
+        for comment_id, _, _, parent_id, _, _ in dataset.comments():
+            self.assertTrue(parent_id is None or parent_id in seen)
+            seen.add(comment_id)
+
+    def test_benchmark_regressions(self):
+        from benchmarks.http_suite import find_regressions
+        base = {"feed": {"p95_ms": 10.0, "rps": 100.0, "errors": {}}}
+        ok = {"feed": {"p95_ms": 12.0, "rps": 90.0, "errors": {}}, "new": {"p95_ms": 1.0, "rps": 1.0, "errors": {}}}
+        self.assertEqual(find_regressions(ok, base, 0.25), [])
+        slow = {"feed": {"p95_ms": 20.0, "rps": 50.0, "errors": {"500": 1}}}
+        self.assertEqual(len(find_regressions(slow, base, 0.25)), 3)
+        self.assertEqual(len(find_regressions(slow, base, 0.25, min_delta_ms=15)), 2)
+
+    def test_search(self):
+        res = self.app.get('/api/search?q=big+news')
+        self.assertEqual(res.status_code, 200)
+        results = json.loads(res.data)
+        self.assertEqual([r['POST_ID'] for r in results], [2])
+        self.assertEqual(results[0]['TYPE'], 'post')
+
+        res = self.app.get('/api/search?q=first&type=comment')
+        self.assertEqual(json.loads(res.data), [])
+
+    def test_search_requires_query(self):
+        self.assertEqual(self.app.get('/api/search?q=%20!').status_code, 400)
+        self.assertEqual(self.app.get('/api/search?q=news&type=user').status_code, 400)
+
+    def test_reports_stream(self):
+        res = self.app.get('/api/reports/posts?min_upvotes=5')
+        self.assertEqual(res.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+        upvotes = [r['UPVOTES'] for r in rows]
+        self.assertTrue(upvotes and min(upvotes) >= 5)
+        self.assertEqual(upvotes, sorted(upvotes, reverse=True))
+
+        res = self.app.get('/api/reports/users?format=csv')
+        self.assertEqual(res.mimetype, 'text/csv')
+        lines = res.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'USER_ID,USERNAME,KARMA')
+        karma = [int(line.rsplit(',', 1)[1]) for line in lines[1:]]
+        self.assertEqual(karma, sorted(karma, reverse=True))
+
+        self.assertEqual(self.app.get('/api/reports/users?format=xml').status_code, 400)
+
+    def test_columnar_format(self):
+        # Same rows and paging as the default shape, keyed once in COLUMNS
+        rows = self.app.get('/api/posts?sort=top&limit=1')
+        res = self.app.get('/api/posts?sort=top&limit=1&format=columns')
+        body = json.loads(res.data)
+        self.assertEqual([dict(zip(body['COLUMNS'], r)) for r in body['ROWS']], json.loads(rows.data))
+        self.assertEqual(res.headers.get('X-Next-Cursor'), rows.headers.get('X-Next-Cursor'))
+        self.assertEqual(self.app.get('/api/posts?format=xml').status_code, 400)
+
+        report = json.loads(self.app.get('/api/reports/users?format=columns').data)
+        self.assertEqual(report['COLUMNS'], ['USER_ID', 'USERNAME', 'KARMA'])
+        karma = [r[2] for r in report['ROWS']]
+        self.assertTrue(karma and karma == sorted(karma, reverse=True))
+
+    def test_messages_inbox_and_unread(self):
+        for i in range(3):
+            res = self.app.post('/api/messages', data=json.dumps(
+                {"sender_id": 2, "receiver_id": 1, "subject": f"hi {i}", "body": "hello"}),
+                content_type='application/json')
+            self.assertEqual(res.status_code, 201)
+        unread = json.loads(self.app.get('/api/messages/unread?current_user_id=1').data)['UNREAD']
+        self.assertGreaterEqual(unread, 3)
+        res = self.app.post('/api/messages', data=json.dumps({"sender_id": 2, "receiver_id": 987654, "body": "x"}),
+                            content_type='application/json')
+        self.assertEqual(res.status_code, 404)
+
+        res = self.app.get('/api/messages/inbox?current_user_id=1&limit=2')
+        page = json.loads(res.data)
+        self.assertEqual(len(page), 2)
+        self.assertGreater(page[0]['MESSAGE_ID'], page[1]['MESSAGE_ID'])
+        res = self.app.get('/api/messages/inbox?current_user_id=1&limit=2&cursor=' + res.headers['X-Next-Cursor'])
+        self.assertLess(json.loads(res.data)[0]['MESSAGE_ID'], page[1]['MESSAGE_ID'])
+
+        res = self.app.post('/api/messages/read', data=json.dumps(
+            {"user_id": 1, "message_ids": [m['MESSAGE_ID'] for m in page]}), content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(self.app.get('/api/messages/unread?current_user_id=1').data)['UNREAD'],
+                         unread - 2)
+        self.app.post('/api/messages/read', data=json.dumps({"user_id": 1, "all": True}),
+                      content_type='application/json')
+        self.assertEqual(json.loads(self.app.get('/api/messages/unread?current_user_id=1').data)['UNREAD'], 0)
+
+        thread = json.loads(self.app.get('/api/messages/thread/2?current_user_id=1').data)
+        self.assertTrue(all(m['SENDER_ID'] == 2 and m['IS_READ'] == 1 for m in thread))
+
+    def test_live_stream(self):
+        self.assertEqual(self.app.get('/api/live?posts=x').status_code, 400)
+
+        res = self.app.get('/api/live?posts=1', buffered=False)
+        self.assertEqual(res.mimetype, 'text/event-stream')
+        chunks = iter(res.response)
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+
+        # Two comments and a vote in one interval arrive as a single event
+        for text in ("live one", "live two"):
+            self.app.post('/api/posts/1/comments', data=json.dumps({"user_id": 2, "content": text}),
+                          content_type='application/json')
+        self.app.post('/api/posts/1/vote', data=json.dumps({"user_id": 2, "vote_type": 1}),
+                      content_type='application/json')
+        vote_buffer.flush()
+        live_updates.flush()
+        event = next(chunks).decode()
+        self.assertTrue(event.startswith('event: post\ndata: '))
+        update = json.loads(event.split('data: ', 1)[1])
+        self.assertEqual(update['POST_ID'], 1)
+        self.assertEqual(update['NEW_COMMENTS'], 2)
+        self.assertIn('UPVOTES', update)
+
+        res.close()
+        self.assertEqual(live_updates.watched([1]), [])
+
+    def test_leaderboard_and_subforum_stats(self):
+        leaders = json.loads(self.app.get('/api/leaderboard?limit=2').data)
+        self.assertEqual([l['RANK'] for l in leaders], [1, 2])
+        self.assertGreaterEqual(leaders[0]['KARMA'], leaders[1]['KARMA'])
+        self.assertEqual(self.app.get('/api/leaderboard?limit=0').status_code, 400)
+
+        # The store's karma index follows karma changes, like idx_users_karma
+        store = MockDB.store
+        with store.lock:
+            leader = store.leaderboard({"limit": 1})[0]
+            lift = leader[2] + 1 - store.users[1].karma
+            store._add_karma(1, lift)
+            self.assertEqual(store.leaderboard({"limit": 1})[0][0], 1)
+            store._add_karma(1, -lift)
+
+        subs = {s['NAME']: s for s in json.loads(self.app.get('/api/subforums').data)}
+        self.assertGreaterEqual(subs['news']['POST_COUNT'], 1)
+        for key in ('SUBSCRIBER_COUNT', 'TOTAL_UPVOTES', 'LAST_POST_AT'):
+            self.assertIn(key, subs['news'])
+
+        # A new post shows up in the (cached) list right away
+        post = {"user_id": 1, "subforum_id": subs['news']['SUBFORUM_ID'], "title": "t", "content": "c"}
+        res = self.app.post('/api/posts', data=json.dumps(post), content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        after = {s['NAME']: s for s in json.loads(self.app.get('/api/subforums').data)}
+        self.assertEqual(after['news']['POST_COUNT'], subs['news']['POST_COUNT'] + 1)
+
+    def test_moderation_queue(self):
+        # admin (2) moderates "news" only: the report on post 1 ("general") stays out of the queue
+        for post_id in (2, 2, 2, 1):
+            res = self.app.post('/api/moderation/reports', data=json.dumps(
+                {"reporter_id": 1, "post_id": post_id, "reason": "spam"}), content_type='application/json')
+            self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.app.get('/api/moderation/queue').status_code, 400)
+        for body, status in (({"reporter_id": 1, "post_id": 987654}, 404),
+                             ({"reporter_id": 987654, "post_id": 2}, 400)):
+            res = self.app.post('/api/moderation/reports', data=json.dumps(dict(body, reason="spam")),
+                                content_type='application/json')
+            self.assertEqual(res.status_code, status)
+
+        res = self.app.get('/api/moderation/queue?current_user_id=2&limit=2')
+        page = json.loads(res.data)
+        self.assertEqual(len(page), 2)
+        self.assertTrue(all(r['SUBFORUM_NAME'] == 'news' and r['STATUS'] == 'OPEN' for r in page))
+        self.assertLess(page[0]['REPORT_ID'], page[1]['REPORT_ID'])
+        res = self.app.get('/api/moderation/queue?current_user_id=2&limit=2&cursor=' + res.headers['X-Next-Cursor'])
+        rest = json.loads(res.data)
+        self.assertGreater(rest[0]['REPORT_ID'], page[1]['REPORT_ID'])
+        counts = json.loads(self.app.get('/api/moderation/subforums?current_user_id=2').data)
+        self.assertEqual([c['NAME'] for c in counts], ['news'])
+
+        # One batch; a user who moderates nothing changes nothing
+        ids = [r['REPORT_ID'] for r in page + rest]
+        self.app.post('/api/moderation/reports/close', data=json.dumps(
+            {"moderator_id": 1, "report_ids": ids, "status": "DISMISSED"}), content_type='application/json')
+        res = self.app.post('/api/moderation/reports/close', data=json.dumps(
+            {"moderator_id": 2, "report_ids": ids, "status": "RESOLVED"}), content_type='application/json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(self.app.get('/api/moderation/subforums?current_user_id=2').data)[0]
+                         ['OPEN_REPORTS'], counts[0]['OPEN_REPORTS'] - len(ids))
+        resolved = json.loads(self.app.get('/api/moderation/queue?current_user_id=2&status=resolved').data)
+        self.assertTrue(set(ids) <= {r['REPORT_ID'] for r in resolved})
+
     def test_create_post(self):
         post_data = {
             "user_id": 1,
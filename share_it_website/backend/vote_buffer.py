@@ -0,0 +1,173 @@
+import atexit
+import logging
+import threading
+import oracledb
+from config import Config
+from db import get_db_connection
+from cache import post_detail_cache
+from live_updates import publish_vote_totals
+
+# Write-behind buffer for post votes.
+# Votes are collapsed per (user, post) -- only the latest vote_type matters --
+# and written in batches through shareit_pkg.vote_posts_bulk, so a vote storm
+# on one post becomes one MERGE per flush instead of one commit per click.
+# Votes for posts or users that are gone by the time they are written are
+# dropped by the procedure and counted as rejected; they are never requeued.
+
+vote_log = logging.getLogger('shareit.votes')
+
+# Writes {(user_id, post_id): vote_type} in one round-trip; returns how many
+# votes were rejected.
+def write_votes(votes):
+    if not votes:
+        return 0
+    # Sorting by post keeps row-lock order stable across concurrent flushes.
+    items = sorted(votes.items(), key=lambda kv: (kv[0][1], kv[0][0]))
+    user_ids = [k[0] for k, _ in items]
+    post_ids = [k[1] for k, _ in items]
+    vote_types = [v for _, v in items]
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        rejected = cursor.var(int)
+        cursor.callproc('shareit_pkg.vote_posts_bulk', [
+            cursor.arrayvar(oracledb.NUMBER, user_ids),
+            cursor.arrayvar(oracledb.NUMBER, post_ids),
+            cursor.arrayvar(oracledb.NUMBER, vote_types),
+            rejected
+        ])
+        conn.commit()
+        publish_vote_totals(cursor, post_ids)
+    finally:
+        if conn: conn.close()
+
+    for post_id in set(post_ids):
+        post_detail_cache.invalidate(post_id)
+    return rejected.getvalue() or 0
+
+
+class VoteBuffer:
+    def __init__(self, interval, max_pending):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}   # (user_id, post_id) -> vote_type
+        self._inflight = {}  # batch currently being written
+        self._thread = None
+        self.submitted = 0
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def submit(self, user_id, post_id, vote_type):
+        with self._lock:
+            self._pending[(user_id, post_id)] = vote_type
+            self.submitted += 1
+            full = len(self._pending) >= self.max_pending
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def pending_for_user(self, user_id):
+        # Votes by this user not yet in the DB, so reads can show them (read-your-writes).
+        with self._lock:
+            result = {p: v for (u, p), v in self._inflight.items() if u == user_id}
+            result.update({p: v for (u, p), v in self._pending.items() if u == user_id})
+        return result
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                rejected = write_votes(batch)
+                self.written += len(batch) - rejected
+                self.rejected += rejected
+                self.flushes += 1
+                if rejected:
+                    vote_log.warning("Rejected %d of %d buffered votes", rejected, len(batch))
+                return len(batch) - rejected
+            except oracledb.IntegrityError:
+                # A constraint the procedure did not absorb: the same batch
+                # would fail on every retry, so it is dropped
+                vote_log.exception("Dropping %d buffered votes", len(batch))
+                self.errors += 1
+                self.rejected += len(batch)
+                return 0
+            except Exception:
+                vote_log.exception("Error flushing vote buffer")
+                self.errors += 1
+                # Requeue, unless the user has voted again on that post since
+                with self._lock:
+                    for key, vote_type in batch.items():
+                        self._pending.setdefault(key, vote_type)
+                return 0
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "written": self.written,
+                "flushes": self.flushes,
+                "errors": self.errors,
+                "rejected": self.rejected,
+            }
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+# Overlays a user's buffered votes onto post dicts (UPVOTES and USER_VOTE),
+# so the voter sees their own vote before the next flush lands.
+def apply_pending_votes(posts, user_id, columns=None):
+    # posts: dicts, or with columns given, tuples in that order (?format=columns)
+    # whose updated entries are replaced in the list
+    if not user_id:
+        return posts
+    pending = vote_buffer.pending_for_user(int(user_id))
+    if not pending:
+        return posts
+    for i, post in enumerate(posts):
+        if columns is not None:
+            post = dict(zip(columns, post))
+        new_vote = pending.get(post['POST_ID'])
+        if new_vote is None:
+            continue
+        old_vote = post.get('USER_VOTE') or 0
+        post['UPVOTES'] = (post.get('UPVOTES') or 0) + new_vote - old_vote
+        post['USER_VOTE'] = new_vote or None
+        if columns is not None:
+            posts[i] = tuple(post[c] for c in columns)
+    return posts
+
+
+def pending_votes_key(user_id):
+    # apply_pending_votes changes personalised bodies, so ETags include this
+    if not user_id:
+        return ()
+    return tuple(sorted(vote_buffer.pending_for_user(int(user_id)).items()))
+
+
+vote_buffer = VoteBuffer(Config.VOTE_FLUSH_INTERVAL, Config.VOTE_FLUSH_MAX)
+atexit.register(vote_buffer.flush)
@@ -11,6 +11,11 @@ const PostCard = ({ post }) => {
   const [score, setScore] = React.useState(post.UPVOTES);
   const [voteStatus, setVoteStatus] = React.useState(post.USER_VOTE || 0); // 1, -1, or 0
 
+  // Follow totals pushed by the live stream (the parent updates post.UPVOTES)
+  React.useEffect(() => {
+    setScore(post.UPVOTES);
+  }, [post.UPVOTES]);
+
   const handleVote = async (e, type) => {
     e.stopPropagation(); // Prevent ensuring navigation when clicking vote
     if (!user) {
@@ -117,7 +122,7 @@ const PostCard = ({ post }) => {
           <span>{new Date(post.CREATED_AT).toLocaleDateString()}</span>
         </div>
         <h3 className="text-lg font-medium mb-2">{post.TITLE}</h3>
-        <p className="text-gray-800 text-sm mb-2 break-words">{post.CONTENT_TEXT}</p>
+        <p className="text-gray-800 text-sm mb-2 break-words">{post.CONTENT_TEXT ?? post.PREVIEW}</p>
         <div className="flex space-x-2 text-gray-500 text-sm font-bold">
           <button className="flex items-center space-x-1 hover:bg-gray-100 p-1 rounded">
             <span>💬 Comments</span>
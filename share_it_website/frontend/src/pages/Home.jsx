@@ -2,27 +2,41 @@ import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import PostCard from '../components/PostCard';
 import { useAuth } from '../AuthContext';
+import useLiveUpdates from '../useLiveUpdates';
 
 const Home = () => {
   const { user } = useAuth(); // Put this at the top
   const [posts, setPosts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  const fetchPosts = async (cursor) => {
+    try {
+      // Feed cards only need the start of each post; full text loads on the detail page
+      const params = { preview: 300, sort: 'hot' };
+      if (user) params.current_user_id = user.user_id;
+      if (cursor) params.cursor = cursor;
+      const res = await axios.get('/api/posts', { params });
+      setPosts(prev => cursor ? [...prev, ...res.data] : res.data);
+      // Keyset pagination: the backend sends the next page's cursor in a header
+      setNextCursor(res.headers['x-next-cursor'] || null);
+    } catch (err) {
+      console.error("Failed to fetch posts", err);
+    } finally {
+      setLoading(false);
+    }
+  };
 
   useEffect(() => {
-    const fetchPosts = async () => {
-      try {
-        const userIdParam = user ? `?current_user_id=${user.user_id}` : '';
-        const res = await axios.get(`/api/posts${userIdParam}`);
-        setPosts(res.data);
-      } catch (err) {
-        console.error("Failed to fetch posts", err);
-      } finally {
-        setLoading(false);
-      }
-    };
     fetchPosts();
   }, []);
 
+  // Live vote totals from other users (see useLiveUpdates)
+  useLiveUpdates(posts.map(p => p.POST_ID), (update) => {
+    if (update.UPVOTES === undefined) return;
+    setPosts(prev => prev.map(p => p.POST_ID === update.POST_ID ? { ...p, UPVOTES: update.UPVOTES } : p));
+  });
+
   return (
     <div className="container mx-auto py-4 px-2 md:px-0 flex justify-center">
       <div className="w-full md:w-2/3 lg:w-1/2">
@@ -32,6 +46,14 @@ const Home = () => {
         ) : (
           posts.map(post => <PostCard key={post.POST_ID} post={post} />)
         )}
+        {nextCursor && (
+          <button
+            onClick={() => fetchPosts(nextCursor)}
+            className="w-full bg-white border border-gray-300 rounded py-2 font-bold text-gray-600 hover:bg-gray-50"
+          >
+            Load more
+          </button>
+        )}
       </div>
       {/* Sidebar Placeholder */}
       <div className="hidden md:block w-1/3 ml-4">
@@ -3,6 +3,7 @@ import axios from 'axios';
 import { useParams, Link } from 'react-router-dom';
 import PostCard from '../components/PostCard';
 import { useAuth } from '../AuthContext';
+import useLiveUpdates from '../useLiveUpdates';
 
 const PostDetail = () => {
     const { postId } = useParams();
@@ -54,6 +55,22 @@ const PostDetail = () => {
         fetchPostDetails();
     }, [postId, user]);
 
+    // Pushed score changes and new comments, instead of polling the post
+    useLiveUpdates(post ? [post.POST_ID] : [], async (update) => {
+        if (update.UPVOTES !== undefined) {
+            setPost(prev => prev && { ...prev, UPVOTES: update.UPVOTES });
+        }
+        if (update.NEW_COMMENTS) {
+            try {
+                const userIdParam = user ? `?current_user_id=${user.user_id}` : '';
+                const res = await axios.get(`/api/posts/${postId}${userIdParam}`);
+                setComments(res.data.comments);
+            } catch (err) {
+                console.error("Failed to refresh comments", err);
+            }
+        }
+    });
+
     if (loading) return <div className="container mx-auto py-4 text-center">Loading...</div>;
     if (error) return <div className="container mx-auto py-4 text-center text-red-500">Error: {error}</div>;
     if (!post) return <div className="container mx-auto py-4 text-center">Post not found</div>;
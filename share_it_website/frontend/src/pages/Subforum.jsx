@@ -3,6 +3,7 @@ import axios from 'axios';
 import { useParams } from 'react-router-dom';
 import PostCard from '../components/PostCard';
 import { useAuth } from '../AuthContext';
+import useLiveUpdates from '../useLiveUpdates';
 
 const Subforum = () => {
     const { user } = useAuth();
@@ -19,7 +20,7 @@ const Subforum = () => {
                 console.log(`Fetching posts for: ${subforumName}`);
                 // Pass the subforum name as a query param
                 const userIdParam = user ? `&current_user_id=${user.user_id}` : '';
-                const res = await axios.get(`/api/posts?subforum_name=${subforumName}${userIdParam}`);
+                const res = await axios.get(`/api/posts?subforum_name=${subforumName}&preview=300${userIdParam}`);
                 console.log("Got response:", res.data);
                 setPosts(res.data);
             } catch (err) {
@@ -38,6 +39,12 @@ const Subforum = () => {
         fetchPosts();
     }, [subforumName]); // Refetch if URL changes
 
+    // Live vote totals from other users (see useLiveUpdates)
+    useLiveUpdates(posts.map(p => p.POST_ID), (update) => {
+        if (update.UPVOTES === undefined) return;
+        setPosts(prev => prev.map(p => p.POST_ID === update.POST_ID ? { ...p, UPVOTES: update.UPVOTES } : p));
+    });
+
     return (
         <div className="container mx-auto py-4 px-2 md:px-0 flex justify-center">
             <div className="w-full md:w-2/3 lg:w-1/2">
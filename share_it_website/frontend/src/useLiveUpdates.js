@@ -0,0 +1,25 @@
+import { useEffect, useRef } from 'react';
+
+// Backend limit on posts per stream (LIVE_MAX_POSTS)
+const MAX_WATCHED_POSTS = 100;
+
+// Subscribes to /api/live (Server-Sent Events) for the given posts and calls
+// onUpdate({ POST_ID, UPVOTES?, DELTA?, NEW_COMMENTS? }) whenever one of them
+// changes. The backend merges bursts, so this fires at most about once per
+// second per post. One connection per page; it is reopened only when the set
+// of posts changes.
+const useLiveUpdates = (postIds, onUpdate) => {
+  const handler = useRef(onUpdate);
+  handler.current = onUpdate;
+
+  const key = [...new Set(postIds)].slice(0, MAX_WATCHED_POSTS).join(',');
+
+  useEffect(() => {
+    if (!key || typeof EventSource === 'undefined') return undefined;
+    const source = new EventSource(`/api/live?posts=${key}`);
+    source.addEventListener('post', (e) => handler.current(JSON.parse(e.data)));
+    return () => source.close();
+  }, [key]);
+};
+
+export default useLiveUpdates;